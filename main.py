@@ -1,13 +1,17 @@
-import os, sys, time, csv
-import uuid, json, subprocess
-import pandas as pd
+import os, sys, time
+import uuid, subprocess
 import streamlit as st
 from openai import OpenAI
 from typing_extensions import override
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
 from openai import AssistantEventHandler
 from src.chatbot import *
+from src.context import assemble_context
+from src.conversation import TurnUsage, run_context
+from src.engine import CompletionsEngine, assistant_spec, call_tool
+from src.prefetch import Prefetch, reuse, stats as prefetch_stats
+from src.profiler import profile_turn
+from src.retrieval import shared_retrieval
+from src.sessions import owner_digest, shared_session_store
 from src.tools import *
 from src.settings import *
 from src.parameters import *
@@ -15,154 +19,126 @@ from src.parameters import *
 
 RUN_LOCAL = False
 
-if not RUN_LOCAL:
-    import pysqlite3
-    # Trick to update sqlite
-    __import__('pysqlite3')
-    sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': os.path.join(PERSIST_DIRECTORY, 'db.sqlite3'),
-        }
-    }
-
 REPO_PATH = os.getcwd()
 STOCK_PATH = REPO_PATH + "/database/stock.csv"
-RUN_STOCK_PATH = REPO_PATH + "/run/get_stock.py"
-
-# Loading the vectordatabase
-embedding = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
-database = Chroma(persist_directory=CHROMA_DB_PATH, embedding_function=embedding)
-
-def searchByEan(file_name_csv: str, ean_list: list) -> list:
-    data = {}
-    ean_map = {str(ean): idx for idx, ean in enumerate(ean_list)}
-
-    with open(file_name_csv, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            current_ean = row['ean']
-            if current_ean in ean_list:
-                idx = ean_map[current_ean]
-                stock = int(round(float(row['stock']))) # stock must be an integer
-                data[idx] = f"Stock: {stock}. Precio: ${row['precio']}. Promoción: {row['promo']}."
-    file.close()
-    return data
+RUN_STOCK_MODULE = "run.get_stock"
+
+# Retrieval (vector index, embeddings, catalog and stock): a service shared by every app process if one
+# is configured (run/retrieval_server.py), otherwise loaded in this process
+retrieval = shared_retrieval(REPO_PATH, RETRIEVAL_URL, RETRIEVAL_TIMEOUT, swap_sqlite=not RUN_LOCAL)
+
+def retrieve(vector) -> tuple:
+    # Vector search and stock lookup for an embedded query (also run speculatively, see src/prefetch.py)
+    return retrieval.search(vector, K_VALUE_SEARCH, STOCK_PATH)
 
 def search_in_database(args):
     problem = args['problem']
-    retrived_from_vdb = database.similarity_search_with_score(problem, k=K_VALUE_SEARCH)
-    ean_list = [retrived_from_vdb[i][0].metadata['EAN'] for i in range(K_VALUE_SEARCH)]
-    data = searchByEan(STOCK_PATH, ean_list)
+    # Reuse the retrieval started when the prompt was submitted if the query is close enough to it
+    result, vector, kind, saved = reuse(st.session_state.get('prefetch'), problem, retrieval.embed_query,
+                                        PREFETCH_LEXICAL_THRESHOLD, PREFETCH_COSINE_THRESHOLD)
+    if kind != 'none':
+        logger_chat.info(f"[id:{st.session_state.session_id}] prefetch: {kind}, {saved * 1000:.0f} ms ahorrados; "
+                         f"{prefetch_stats.summary()}.")
+    products, data = result if result is not None else retrieve(vector if vector is not None else retrieval.embed_query(problem))
     if len(data) > 0:
         i = 0
         context = []
         for index, stock in data.items():
-            context.append(f"{retrived_from_vdb[index][0].page_content} {stock}")
+            context.append((products[index]['text'], stock))
             i += 1
             if i >= K_VALUE_THOLD:
                 break
-        context = '\n'.join(context)
+        context, tokens, full_tokens = assemble_context(context, CONTEXT_TOKEN_BUDGET)
+        logger_chat.info(f"[id:{st.session_state.session_id}] search_in_database: {i} productos, "
+                         f"{tokens} tokens de contexto ({full_tokens} sin recortar).")
     else:
         context = "No se encontraron productos en la base de datos."
     output = f"Contexto: {context}"
     return output
 
 def how_many_brands():
-    return "Hay 9 marcas en total."
+    brands = [row for row in retrieval.facets('brand') if row[1] > 0]
+    return f"Hay {len(brands)} marcas en total."
 
 def how_many_products_in_stock():
-    products = 0 
-    with open(STOCK_PATH, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            stock = int(round(float(row['stock']))) # stock must be an integer
-            products += 1 if stock > 0 else 0
-    file.close()
+    products = sum(row[2] for row in retrieval.facets('stock'))
     return f"Hay {products} productos en stock."
 
 def how_many_products_in_sale():
-    df = pd.read_csv(STOCK_PATH)
-    df.columns = df.columns.str.lower()
-    df['promo'] = df['promo'].str.lower()
-    no_sale_value = "no promo" # filter by sale option
-    df = df[df['promo'] != no_sale_value]
-    products_on_sale = len(df)
+    products_on_sale = sum(row[3] for row in retrieval.facets('stock'))
     return f"Hay {products_on_sale} productos en promoción."
 
-def search_products_in_sale():
-    # Get products from chroma database
-    db = database.get()
-    db = {metadata['EAN']: document for metadata, document in zip(db['metadatas'], db['documents'])}
-    df_db = pd.DataFrame(list(db.items()), columns=['ean', 'descripción'])
-    
-    # Get products info from stock spreadsheet
-    df_stock = pd.read_csv(STOCK_PATH)
-    df_stock.columns = df_stock.columns.str.lower()
-    df_stock['promo'] = df_stock['promo'].str.lower()
-    no_sale_value = "no promo" # filter by sale option
-    df_stock = df_stock[df_stock['promo'] != no_sale_value]
-
-    # Get common rows base on EAN
-    df_db_filtered = df_db[df_db['ean'].isin(df_stock['ean'])]
-    df_stock_filtered = df_stock[df_stock['ean'].isin(df_db['ean'])]
-
-    # Create context
-    context = []
-    for product, data in zip(df_db_filtered.itertuples(index=False), df_stock_filtered.itertuples(index=False)):
-        description = product['descripción']
-        features = f"Stock: {data['stock']}. Precio: ${data['precio']}. Promoción: {data['promo']}"
-        context.append(f"{description} {features}")
-    context = '\n'.join(context[:5])
+def search_products_in_sale(args=None):
+    # Read the promo index built when the stock snapshot was published (optional brand filter)
+    brand = (args or {}).get('marca')
+    rows = retrieval.promos(brand, K_VALUE_THOLD)
+    if not rows:
+        return f"No hay productos en promoción{f' de la marca {brand}' if brand else ''}."
+    context = [f"{row['documento']} Stock: {row['stock']}. Precio: ${row['precio']}. Promoción: {row['promo']}" for row in rows]
+    context = '\n'.join(context)
     output = f"Contexto: {context}"
     return output
 
 def how_many_products_with_stock_below_threshold(args):
-    products = 0
     threshold = int(float(args['threshold']))
-    with open(STOCK_PATH, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            stock = int(round(float(row['stock']))) # stock must be an integer
-            products += 1 if stock < threshold else 0
-    file.close()
+    products = retrieval.count_stock(STOCK_PATH, maximum=threshold - 1)
     return f"Hay {products} productos con stock por debajo de {threshold} unidades."
 
 def how_many_products_with_stock_above_threshold(args):
-    products = 0
     threshold = int(float(args['threshold']))
-    with open(STOCK_PATH, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            stock = int(round(float(row['stock']))) # stock must be an integer
-            products += 1 if stock > threshold else 0
-    file.close()
+    products = retrieval.count_stock(STOCK_PATH, minimum=threshold + 1)
     return f"Hay {products} productos con stock por encima de {threshold} unidades."
 
 def how_many_products_with_stock_between_thresholds(args):
-    products = 0
     lt = int(float(args['lower_threshold']))
     ut = int(float(args['upper_threshold']))
-    with open(STOCK_PATH, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            stock = int(round(float(row['stock']))) # stock must be an integer
-            products += 1 if stock >= lt and stock <= ut else 0
-    file.close()
+    products = retrieval.count_stock(STOCK_PATH, minimum=lt, maximum=ut)
     return f"Hay {products} productos con stock entre {lt} y {ut} unidades."
 
 def which_brands():
-    brands = ["Cepage", "Cetaphil", "Eucerin", "Eximia", "Isdin",
-              "Loreal", "La Roche-Posay", "Revlon", "Vichy"]
+    brands = [row[0] for row in retrieval.facets('brand') if row[1] > 0]
     return f"Las marcas son: {', '.join(brands)}."
 
 def is_brand_in_database(args):
-    brands = ["Cepage", "Cetaphil", "Eucerin", "Eximia", "Isdin",
-              "Loreal", "La Roche-Posay", "Revlon", "Vichy"]
-    brands = [brand.lower() for brand in brands]
-    brand = args['marca'].lower()
-    return f"La marca {brand.capitalize()} {'sí' if brand in brands else 'no'} está en la base de datos."
+    brand = args['marca'].strip()
+    row = retrieval.facet('brand', brand)
+    return f"La marca {brand.capitalize()} {'sí' if row is not None and row[1] > 0 else 'no'} está en la base de datos."
+
+# Tools available to the model, shared by both engines (each one receives the parsed arguments)
+TOOLS = {
+    "search_in_database": search_in_database,
+    "how_many_brands": lambda args: how_many_brands(),
+    "which_brands": lambda args: which_brands(),
+    "is_brand_in_database": is_brand_in_database,
+    "how_many_products_in_stock": lambda args: how_many_products_in_stock(),
+    "how_many_products_with_stock_below_threshold": how_many_products_with_stock_below_threshold,
+    "how_many_products_with_stock_above_threshold": how_many_products_with_stock_above_threshold,
+    "how_many_products_with_stock_between_thresholds": how_many_products_with_stock_between_thresholds,
+    "search_products_in_sale": search_products_in_sale,
+    "how_many_products_in_sale": lambda args: how_many_products_in_sale(),
+}
+
+def run_tool(name: str, arguments: str) -> str:
+    print(f"Funcion calling: {name}")
+    output = call_tool(TOOLS, name, arguments)
+    # Keep the latest outputs to carry them (trimmed) into the next turns
+    st.session_state.tool_outputs = (st.session_state.tool_outputs + [(name, output)])[-CONTEXT_TOOL_OUTPUTS:]
+    return output
+
+def stream_response(text_deltas) -> str:
+    # Show the response as it arrives and return the full text
+    left, _ = st.columns(BOT_CHAT_COLUMNS)
+    with left:
+        with st.chat_message("assistant", avatar=BOT_AVATAR):
+            container = st.empty()
+            current_text = ""
+            for text in text_deltas:
+                st.session_state.turn_usage.first_token()
+                text = text.replace('$', '&#36;')
+                current_text += text
+                container.markdown(f'<div class="chat-message bot-message bot-message ul">{current_text}</div>', unsafe_allow_html=True)
+                time.sleep(0.05)
+    return current_text
 
 
 class EventHandler(AssistantEventHandler):
@@ -176,6 +152,7 @@ class EventHandler(AssistantEventHandler):
             st.session_state.requires_action_occurred = True
             self.handle_requires_action(event.data, run_id)
         elif event.event == 'thread.run.completed':
+            st.session_state.turn_usage.add(event.data.usage)
             if st.session_state.requires_action_occurred:
                 st.session_state.requires_action_occurred = False
                 st.session_state.force_stream = False
@@ -183,60 +160,9 @@ class EventHandler(AssistantEventHandler):
                 st.session_state.force_stream = True
     
     def handle_requires_action(self, data, run_id):
-        tool_outputs = []
-        function_calls = []
-
-        for tool in data.required_action.submit_tool_outputs.tool_calls:
-            function_calls.append({
-                "id": tool.id,
-                "name": tool.function.name,
-                "args": json.loads(tool.function.arguments)
-            })
-        for function in function_calls:
-            name = function["name"]
-            print(f"Funcion calling: {name}")
-            if function["name"] == "search_in_database":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": search_in_database(function["args"])})
-            elif function["name"] == "how_many_brands":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": how_many_brands()})
-            elif function["name"] == "which_brands":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": which_brands()})
-            elif function["name"] == "is_brand_in_database":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": is_brand_in_database(function["args"])})
-            elif function["name"] == "how_many_products_in_stock":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": how_many_products_in_stock()})
-            elif function["name"] == "how_many_products_with_stock_below_threshold":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": how_many_products_with_stock_below_threshold(function["args"])})
-            elif function["name"] == "how_many_products_with_stock_above_threshold":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": how_many_products_with_stock_above_threshold(function["args"])})
-            elif function["name"] == "how_many_products_with_stock_between_thresholds":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": how_many_products_with_stock_between_thresholds(function["args"])})
-            elif function["name"] == "search_products_in_sale":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": search_products_in_sale()})
-            elif function["name"] == "how_many_products_in_sale":
-                tool_outputs.append({
-                    "tool_call_id": function["id"], 
-                    "output": how_many_products_in_sale()})
-        
-        # Submit all tool_outputs at the same time
+        # Run every requested tool and submit all tool_outputs at the same time
+        tool_outputs = [{"tool_call_id": tool.id, "output": run_tool(tool.function.name, tool.function.arguments)}
+                        for tool in data.required_action.submit_tool_outputs.tool_calls]
         self.submit_tool_outputs(tool_outputs, run_id)
  
     def submit_tool_outputs(self, tool_outputs, run_id):
@@ -247,26 +173,38 @@ class EventHandler(AssistantEventHandler):
             tool_outputs=tool_outputs,
             event_handler=EventHandler(),
         ) as stream:
-            left, _ = st.columns(BOT_CHAT_COLUMNS)
-            with left:
-                with st.chat_message("assistant", avatar=BOT_AVATAR):
-                    container = st.empty()
-                    current_text = ""
-                    for text in stream.text_deltas:
-                        text = text.replace('$', '&#36;')
-                        current_text += text
-                        container.markdown(f'<div class="chat-message bot-message bot-message ul">{current_text}</div>', unsafe_allow_html=True)
-                        time.sleep(0.05)
-                    #self.st_container.markdown(f'<div class="chat-message bot-message bot-message ul">{current_text}</div>', unsafe_allow_html=True)
+            stream_response(stream.text_deltas)
 
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# Session state shared by every app process, so any replica can serve a conversation
+session_store = shared_session_store(SESSION_BACKEND, REPO_PATH + "/" + SESSION_DB_PATH, SESSION_TTL)
+SESSION_KEYS = ("session_id", "last_active", "send_email", "requires_action_occurred", "force_stream", "turn_id",
+                "tool_outputs", "thread_id", "is_stock", "messages", "last_stock_update")
+
+def save_session():
+    state = {key: st.session_state[key] for key in SESSION_KEYS if key in st.session_state}
+    session_store.save(st.session_state.session_id, state, st.session_state.owner)
+
 def main():
     
-    # Track session with a unique ID and last active time
+    # Restore the session from the shared store (its ID travels in the URL), or track a new one
+    # with a unique ID and last active time. Only the browser that created a session can restore it:
+    # a copied link carries the ID but not the owner cookie
+    if 'owner' not in st.session_state:
+        st.session_state.owner = owner_digest(st.context.cookies.get(SESSION_OWNER_COOKIE, ""))
+        st.session_state.holder = str(uuid.uuid4())     # this app session, for the turn lock
     if 'session_id' not in st.session_state:
-        st.session_state.session_id = str(uuid.uuid4())
-        st.session_state.last_active = time.time()
+        sid = st.query_params.get("sid", "")
+        state = session_store.load(sid, st.session_state.owner) if sid else None
+        if state is not None:
+            st.session_state.update(state)
+        else:
+            if sid:
+                logger_chat.warning(f"[id:{sid}] Sesión no restaurada: no existe, venció o es de otro navegador.")
+            st.session_state.session_id = str(uuid.uuid4())
+            st.session_state.last_active = time.time()
+        st.query_params["sid"] = st.session_state.session_id
     
     # Set email sending flag
     if 'send_email' not in st.session_state:
@@ -278,9 +216,17 @@ def main():
     
     if 'force_stream' not in st.session_state:
         st.session_state.force_stream = False
+
+    # Turn counter, used to tag profiles
+    if 'turn_id' not in st.session_state:
+        st.session_state.turn_id = 0
+
+    # Latest tool outputs, carried into the next runs
+    if 'tool_outputs' not in st.session_state:
+        st.session_state.tool_outputs = []
     
-    # Create thread for the assistant
-    if "thread_id" not in st.session_state:
+    # Create thread for the assistant (the completions engine keeps the conversation locally)
+    if ENGINE_MODE == "assistants" and "thread_id" not in st.session_state:
         thread = client.beta.threads.create()
         st.session_state.thread_id = thread.id
 
@@ -311,7 +257,7 @@ def main():
 
     # Get stock data just once
     if "is_stock" not in st.session_state:
-        subprocess.run([f"{sys.executable}", RUN_STOCK_PATH], check=True)
+        subprocess.run([f"{sys.executable}", "-m", RUN_STOCK_MODULE], check=True, cwd=REPO_PATH)
         st.session_state.is_stock = True
 
     # Add initial message and print the conversation
@@ -327,38 +273,72 @@ def main():
     # Check if it's time to update stock
     if time.time() - st.session_state.last_stock_update >= STOCK_UPDATE_INTERVAL:
         try:
-            subprocess.run([f"{sys.executable}", RUN_STOCK_PATH], check=True)
+            subprocess.run([f"{sys.executable}", "-m", RUN_STOCK_MODULE], check=True, cwd=REPO_PATH)
             st.session_state.last_stock_update = time.time()
         except Exception as e:
             print(e)
 
-    # User input
-    if prompt_input := st.chat_input(ASKING_PROMPT):
-        addMessage("user", prompt_input)
-        printMessage("user", prompt_input, stream=False)
-        client.beta.threads.messages.create(thread_id=st.session_state.thread_id, role="user", content=prompt_input)
-        st.session_state.send_email = True # Activate email sending condition
-
-        # Get assistant response
-        with st.spinner(LOADING_MESSAGE):
-            with client.beta.threads.runs.stream(
-                thread_id=st.session_state.thread_id,
-                assistant_id=ASSISTANT_ID,
-                event_handler=EventHandler()
-            ) as stream:
-                stream.until_done()
-            
-            # Retrieve messages added by the assistant
-            response = retrieveLastMessage(client, st.session_state.thread_id)
-
-        # Display assistant response manually (based on requires_action)
-        if st.session_state.force_stream:
-            printMessage("assistant", response, stream=True)
-        addMessage("assistant", response)
+    # User input. One turn at a time per conversation: another tab with the same session must not
+    # start a run on the thread while this one is active
+    prompt_input = st.chat_input(ASKING_PROMPT)
+    if prompt_input and not session_store.acquire_turn(st.session_state.session_id, st.session_state.holder):
+        st.warning(BUSY_MESSAGE)
+        prompt_input = None
+    if prompt_input:
+        try:
+            st.session_state.turn_id += 1
+            with profile_turn(st.session_state.session_id, st.session_state.turn_id, 
+                              PROFILE_RATE, REPO_PATH + PROFILE_PATH, PROFILE_INTERVAL):
+                # Start retrieval for the raw prompt while the assistant decides which tool to call
+                st.session_state.prefetch = Prefetch(prompt_input, retrieval.embed_query, retrieve)
+                addMessage("user", prompt_input)
+                printMessage("user", prompt_input, stream=False)
+                st.session_state.send_email = True # Activate email sending condition
+
+                # Get assistant response: only the last messages go in full, older ones are summarized
+                thread_messages = st.session_state.messages[1:] # the initial message is not in the thread
+                context = run_context(thread_messages, st.session_state.tool_outputs, CONTEXT_LAST_MESSAGES,
+                                      CONTEXT_SUMMARY_TOKENS, CONTEXT_TOOL_OUTPUTS)
+                st.session_state.turn_usage = TurnUsage()
+                if ENGINE_MODE == "completions":
+                    # Local tool loop on Chat Completions: no thread, run or message retrieval round trips
+                    model, instructions, schemas = assistant_spec(client, ASSISTANT_ID)
+                    engine = CompletionsEngine(client, model, instructions, schemas, run_tool)
+                    with st.spinner(LOADING_MESSAGE):
+                        deltas = engine.stream(thread_messages[-CONTEXT_LAST_MESSAGES:], st.session_state.turn_usage,
+                                               context.get("additional_instructions"))
+                        response = removeBoldItalic(stream_response(deltas))
+                else:
+                    client.beta.threads.messages.create(thread_id=st.session_state.thread_id, role="user", content=prompt_input)
+                    with st.spinner(LOADING_MESSAGE):
+                        with client.beta.threads.runs.stream(
+                            thread_id=st.session_state.thread_id,
+                            assistant_id=ASSISTANT_ID,
+                            event_handler=EventHandler(),
+                            **context
+                        ) as stream:
+                            stream.until_done()
+                    
+                        # Retrieve messages added by the assistant
+                        response = retrieveLastMessage(client, st.session_state.thread_id)
+
+                    # Display assistant response manually (based on requires_action)
+                    if st.session_state.force_stream:
+                        st.session_state.turn_usage.first_token()
+                        printMessage("assistant", response, stream=True)
+                addMessage("assistant", response)
+                st.session_state.prefetch = None
+                logger_chat.info(f"[id:{st.session_state.session_id}] Turno {st.session_state.turn_id} ({ENGINE_MODE}): "
+                                 f"{st.session_state.turn_usage.report()}, {len(thread_messages)} mensajes en el hilo.")
+        finally:
+            session_store.release_turn(st.session_state.session_id, st.session_state.holder)
 
     # After a certain time, send an email with the logs
     checkForEmail2Send(REPO_PATH + LOG_CHAT2EMAIL_PATH, subject="Beta SF chat: Q&A ")
 
+    # Persist the session for the next rerun, wherever it runs
+    save_session()
+
 # Run the main function
 if __name__ == "__main__":
     main()
\ No newline at end of file
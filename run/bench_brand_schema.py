@@ -0,0 +1,44 @@
+'''
+Mide el tiempo de construcción de documentos (`BrandSchema.build`) para un catálogo grande,
+replicando las hojas limpias de cada marca hasta `rows` filas.
+
+Uso desde la raíz del repositorio:
+    python -m run.bench_brand_schema [rows=100000] [folder=database/tables/]
+'''
+
+import os, sys, time
+import pandas as pd
+from src.brands import BRANDS
+from src.database import BrandSchema
+
+def main(**kwargs) -> None:
+    rows = int(kwargs.get('rows', 100000))
+    folder = kwargs.get('folder', 'database/tables/')
+
+    total_rows, total_time = 0, 0.0
+    for key, spec in BRANDS.items():
+        filepath = os.path.join(folder, spec['table'])
+        if not os.path.exists(filepath):
+            print(f"{key:10s} sin libro ({filepath}), se omite.")
+            continue
+        schema = BrandSchema(spec)
+        sheets = schema.read(filepath)
+        n_rows = sum(len(df) for df in sheets)
+        factor = max(rows // max(n_rows, 1), 1)
+        sheets = [pd.concat([df] * factor, ignore_index=True) for df in sheets]
+
+        start = time.perf_counter()
+        documents = schema.build(sheets)
+        elapsed = time.perf_counter() - start
+        total_rows += len(documents)
+        total_time += elapsed
+        print(f"{key:10s} {len(documents):7d} documentos en {elapsed:6.2f} s ({len(documents)/elapsed:8.0f} docs/s)")
+
+    print(f"Total: {total_rows} documentos en {total_time:.2f} s")
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
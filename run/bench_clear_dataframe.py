@@ -0,0 +1,77 @@
+'''
+Compara `clear_dataframe` contra la implementación original (congelada abajo como referencia)
+sobre todas las hojas de todos los libros en `database/tables/`. Verifica que la salida sea
+idéntica celda a celda y reporta los tiempos de ambas versiones.
+
+Uso desde la raíz del repositorio:
+    python -m run.bench_clear_dataframe [folder=database/tables/] [repeat=3]
+'''
+
+import sys, re, glob, time
+import pandas as pd
+from src.database import clear_dataframe, check_string, pattern
+
+def squash_reference(strings: list) -> list:
+    """Implementación original de `squash` (una expresión regular por llamada)."""
+    pattern_units = [r'(\d+)\s*([a-zA-Z]+)', r'\1\2']
+    return re.sub(pattern_units[0], pattern_units[1], strings)
+
+def clear_dataframe_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementación original de `clear_dataframe`, usada como golden de referencia."""
+    df.dropna(how='all', inplace=True)
+    df.drop_duplicates(inplace=True)
+    for column in df.columns:
+        if df[column].dtype in [int, float]:
+            df[column] = df[column].map(lambda x: str(int(float(x))) if not pd.isna(x) else str(x))
+            df[column] = df[column].map(lambda s: squash_reference(s.replace('nan', '')))
+        else:
+            df[column] = df[column].map(str)
+            df[column] = df[column].map(lambda x: x.strip())
+            df[column] = df[column].map(lambda x: re.split(r'\n|\s{2,}', x))
+            df[column] = df[column].map(lambda s: [squash_reference(x.strip()) for x in s] if s != '' else s)
+            df[column] = df[column].map(lambda s: [x.replace('nan', '') for x in s])
+            df[column] = df[column].map(lambda s: [x for x in s if x != ''])
+            df[column] = df[column].map(lambda s: '. '.join(s)+'.' if (s!='') or (not check_string(s, True)) else s)
+            df[column] = df[column].map(lambda s: re.sub(r'\.{2,}', '.', s))
+            df[column] = df[column].map(lambda s: re.sub(r'\s+', ' ', s))
+            df[column] = df[column].map(lambda s: re.sub(pattern, '', s))
+            df[column] = df[column].map(lambda s: s.replace('.', ''))
+    return df
+
+def best_time(function, df: pd.DataFrame, repeat: int) -> tuple:
+    times = []
+    for _ in range(repeat):
+        data = df.copy()
+        start = time.perf_counter()
+        result = function(data)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main(**kwargs) -> None:
+    folder = kwargs.get('folder', 'database/tables/')
+    repeat = int(kwargs.get('repeat', 3))
+
+    total_ref, total_new, mismatches = 0.0, 0.0, 0
+    for filepath in sorted(glob.glob(folder + '**/*.xlsx', recursive=True)):
+        sheets = pd.read_excel(filepath, sheet_name=None, engine='openpyxl')
+        for sheet, df in sheets.items():
+            t_ref, expected = best_time(clear_dataframe_reference, df, repeat)
+            t_new, result = best_time(clear_dataframe, df, repeat)
+            total_ref += t_ref
+            total_new += t_new
+            same = expected.equals(result) and list(expected.dtypes) == list(result.dtypes)
+            mismatches += 0 if same else 1
+            print(f"{'OK  ' if same else 'FAIL'} {filepath} [{sheet}] {df.shape} "
+                  f"ref {1e3*t_ref:8.2f} ms  new {1e3*t_new:8.2f} ms  x{t_ref/max(t_new, 1e-9):5.1f}")
+
+    print(f"Total: ref {1e3*total_ref:.1f} ms, new {1e3*total_new:.1f} ms, "
+          f"speedup x{total_ref/max(total_new, 1e-9):.1f}, {mismatches} hojas distintas.")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
@@ -0,0 +1,121 @@
+'''
+Ejecuta `CompletionsEngine.stream` (ver `src/engine.py`) contra un cliente local que imita el streaming
+de Chat Completions, sin red ni API key. El cliente responde primero con llamadas a herramientas en
+fragmentos (ids, nombres y argumentos partidos en varios chunks, dos llamadas intercaladas por índice)
+y después con texto, y al final de cada respuesta manda un chunk solo con `usage`. Verifica las
+herramientas ejecutadas, los mensajes enviados en cada ronda, el texto devuelto, los tokens y el corte
+por `max_rounds`, y reporta el tiempo propio del motor por turno.
+
+Uso desde la raíz del repositorio:
+    python -m run.bench_completions_engine [turns=1000]
+'''
+
+import sys, json, time
+from types import SimpleNamespace
+from src.conversation import TurnUsage
+from src.engine import CompletionsEngine, call_tool
+
+def chunk(content: str=None, tool_calls: list=None, usage: dict=None) -> SimpleNamespace:
+    """Chunk de streaming con la forma de `ChatCompletionChunk`."""
+    if usage is not None:
+        return SimpleNamespace(choices=[], usage=SimpleNamespace(**usage))
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+def fragment(index: int, id: str=None, name: str=None, arguments: str=None) -> SimpleNamespace:
+    function = SimpleNamespace(name=name, arguments=arguments) if name is not None or arguments is not None else None
+    return SimpleNamespace(index=index, id=id, function=function)
+
+def tool_call_chunks() -> list:
+    """Dos llamadas a herramientas en fragmentos, intercaladas, como las envía la API."""
+    return [
+        chunk(tool_calls=[fragment(0, id="call_a", name="search_in_database", arguments="")]),
+        chunk(tool_calls=[fragment(0, arguments='{"que')]),
+        chunk(tool_calls=[fragment(1, id="call_b", name="how_many_", arguments="")]),
+        chunk(tool_calls=[fragment(0, arguments='ry": "protector '), fragment(1, name="brands")]),
+        chunk(tool_calls=[fragment(1, arguments="{}")]),
+        chunk(tool_calls=[fragment(0, arguments='solar"}')]),
+        chunk(usage={"prompt_tokens": 120, "completion_tokens": 30}),
+    ]
+
+def text_chunks(text: str, size: int=4) -> list:
+    return [chunk(content=text[i:i + size]) for i in range(0, len(text), size)] + [
+        chunk(usage={"prompt_tokens": 200, "completion_tokens": 12})]
+
+class StubCompletions(object):
+    """`chat.completions` local: devuelve las respuestas guardadas en orden y registra cada pedido."""
+
+    def __init__(self, responses: list) -> None:
+        self.responses = list(responses)
+        self.requests = []
+
+    def create(self, **kwargs):
+        # Copy the messages: the engine keeps appending to the same list
+        self.requests.append(dict(kwargs, messages=[dict(message) for message in kwargs["messages"]]))
+        return iter(self.responses.pop(0))
+
+class StubClient(object):
+    def __init__(self, responses: list) -> None:
+        self.chat = SimpleNamespace(completions=StubCompletions(responses))
+
+SCHEMAS = [{"type": "function", "function": {"name": name, "parameters": {"type": "object", "properties": {}}}}
+           for name in ("search_in_database", "how_many_brands")]
+
+def run_turn(responses: list, tools: dict, max_rounds: int=4) -> tuple:
+    client = StubClient(responses)
+    engine = CompletionsEngine(client, "stub-model", "Instrucciones.", SCHEMAS,
+                               lambda name, arguments: call_tool(tools, name, arguments), max_rounds=max_rounds)
+    usage = TurnUsage()
+    text = ''.join(engine.stream([{"role": "user", "content": "¿Tienen protector solar?"}], usage, "Resumen."))
+    return text, client.chat.completions.requests, usage
+
+def check() -> None:
+    called = []
+    tools = {"search_in_database": lambda args: called.append(("search", args)) or "Producto X. Stock: 3.",
+             "how_many_brands": lambda args: called.append(("brands", args)) or "12 marcas."}
+    text, requests, usage = run_turn([tool_call_chunks(), text_chunks("Sí, tenemos el Producto X.")], tools)
+
+    assert text == "Sí, tenemos el Producto X.", text
+    assert called == [("search", {"query": "protector solar"}), ("brands", {})], called
+    assert len(requests) == 2, len(requests)
+    assert requests[0]["messages"][0] == {"role": "system", "content": "Instrucciones.\n\nResumen."}
+    assert requests[0]["stream_options"] == {"include_usage": True} and "tool_choice" not in requests[0]
+    assistant, first, second = requests[1]["messages"][-3:]
+    assert assistant["role"] == "assistant" and assistant["content"] is None, assistant
+    assert [(call["id"], call["function"]["name"], call["function"]["arguments"]) for call in assistant["tool_calls"]] == [
+        ("call_a", "search_in_database", '{"query": "protector solar"}'), ("call_b", "how_many_brands", "{}")]
+    assert first == {"role": "tool", "tool_call_id": "call_a", "content": "Producto X. Stock: 3."}, first
+    assert second == {"role": "tool", "tool_call_id": "call_b", "content": "12 marcas."}, second
+    assert (usage.prompt_tokens, usage.completion_tokens) == (320, 42)
+    assert usage.first is not None
+    print("Llamadas en fragmentos y respuesta en texto: OK")
+
+    # A tool that raises is reported back to the model instead of breaking the turn
+    tools["search_in_database"] = lambda args: 1 / 0
+    _, requests, _ = run_turn([tool_call_chunks(), text_chunks("Sin datos.")], tools)
+    assert "falló (ZeroDivisionError)" in requests[1]["messages"][-2]["content"]
+    print("Herramienta con error: OK")
+
+    # After max_rounds rounds with tools the model is asked to answer in text
+    text, requests, _ = run_turn([tool_call_chunks(), text_chunks("Listo.")], tools, max_rounds=1)
+    assert "tool_choice" not in requests[0] and requests[1]["tool_choice"] == "none" and text == "Listo."
+    print("Corte por max_rounds: OK")
+
+def main(**kwargs) -> None:
+    turns = int(kwargs.get('turns', 1000))
+    check()
+
+    tools = {"search_in_database": lambda args: json.dumps(args), "how_many_brands": lambda args: "12 marcas."}
+    answer = text_chunks("Sí, tenemos el Producto X en stock a $100 con 20% de descuento.")
+    start = time.perf_counter()
+    for _ in range(turns):
+        run_turn([tool_call_chunks(), answer], tools)
+    elapsed = time.perf_counter() - start
+    print(f"{turns} turnos (2 rondas, 2 herramientas): {1e3 * elapsed / turns:.3f} ms por turno en el motor.")
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
@@ -0,0 +1,87 @@
+'''
+Compara `unify` y `reduce_strings` contra sus implementaciones originales (cuadráticas,
+congeladas abajo como referencia) sobre listas sintéticas de palabras clave. Verifica que
+los resultados sean idénticos (mismo contenido y orden) y reporta los tiempos.
+
+Uso desde la raíz del repositorio:
+    python -m run.bench_substring_dedup [sizes=100,1000,5000,20000] [seed=0]
+'''
+
+import sys, time, random
+from src.database import unify, reduce_strings
+
+def reduce_strings_reference(strings: list) -> list:
+    unique_strings = []
+    lower_to_original = {}
+    strings.sort(key=len, reverse=True)
+    for string in strings:
+        stripped_string = string.strip()
+        string_lower = stripped_string.lower()
+        if not any(string_lower in unique.lower() for unique in unique_strings):
+            unique_strings.append(stripped_string)
+            lower_to_original[string_lower] = stripped_string
+    return [lower_to_original[unique.lower()] for unique in unique_strings]
+
+def unify_reference(strings: list) -> list:
+    filter_strings = []
+    unique_strings = []
+    for i in range(len(strings)):
+        is_sub = False
+        for j in range(len(strings)):
+            if (i!=j) and (strings[i] in strings[j]):
+                is_sub = True
+                break
+        if not is_sub:
+            filter_strings.append(strings[i])
+    for s in filter_strings:
+        if s not in unique_strings:
+            unique_strings.append(s)
+    return unique_strings
+
+def synthetic_keywords(n: int, rng: random.Random) -> list:
+    """Palabras clave con repeticiones, mayúsculas y frases contenidas unas en otras."""
+    syllables = ['hi', 'dra', 'tan', 'te', 'pi', 'el', 'se', 'ca', 'ro', 'sa', 'ce', 'a', 'gel', 'sol', 'uv', 'spf']
+    words = [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(max(n // 4, 8))]
+    strings = []
+    for _ in range(n):
+        phrase = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+        phrase = phrase.upper() if rng.random() < 0.1 else phrase
+        strings.append(f" {phrase} " if rng.random() < 0.05 else phrase)
+    return strings
+
+def timed(function, strings: list) -> tuple:
+    start = time.perf_counter()
+    result = function(list(strings))
+    return time.perf_counter() - start, result
+
+def main(**kwargs) -> None:
+    sizes = [int(n) for n in kwargs.get('sizes', '100,1000,5000,20000').split(',')]
+    rng = random.Random(int(kwargs.get('seed', 0)))
+
+    # Equivalence on random lists (empty strings, duplicates, case, separators); the last
+    # ones are above AUTOMATON_MIN_SIZE and go through the suffix automaton
+    for i in range(2020):
+        size = rng.randint(0, 300) if i < 2000 else rng.randint(1000, 1500)
+        strings = [''.join(rng.choice('aAbc\0 ') for _ in range(rng.randint(0, 6))) for _ in range(size)]
+        assert unify(list(strings)) == unify_reference(list(strings)), strings
+        assert reduce_strings(list(strings)) == reduce_strings_reference(list(strings)), strings
+    print("Equivalencia en 2020 listas aleatorias: OK")
+
+    for n in sizes:
+        strings = synthetic_keywords(n, rng)
+        for name, new, reference in [('unify', unify, unify_reference),
+                                     ('reduce_strings', reduce_strings, reduce_strings_reference)]:
+            t_new, result = timed(new, strings)
+            t_ref, expected = timed(reference, strings)
+            status = 'OK  ' if result == expected else 'FAIL'
+            print(f"{status} {name:15s} n={n:6d} ref {1e3*t_ref:10.1f} ms  new {1e3*t_new:8.1f} ms  "
+                  f"x{t_ref/max(t_new, 1e-9):7.1f}  ({len(result)} cadenas)")
+            if result != expected:
+                sys.exit(1)
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
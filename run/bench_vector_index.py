@@ -0,0 +1,104 @@
+'''
+Compara los backends del índice vectorial (exacto mapeado en memoria, exacto con primera etapa
+int8 y Chroma/HNSW) con vectores sintéticos de la dimensión de los embeddings de OpenAI: tiempo de
+construcción, latencia por consulta (p50 y p95, de a una como en la app), recall@k contra la
+búsqueda exacta, tamaño en disco y memoria que recorre cada consulta (la matriz float32, los
+códigos int8 más las filas re-ordenadas, o el grafo HNSW estimado). El tiempo de calcular el
+embedding de la consulta no se incluye: es igual para todos los backends.
+
+Uso desde la raíz del repositorio:
+    python -m run.bench_vector_index [sizes=2000,20000,200000] [dim=1536] [queries=100] [k=30]
+                                     [backends=exact,int8,chroma] [rerank=4]
+'''
+
+import sys, time, tempfile
+from functools import partial
+import numpy as np
+from src.indexer import hnsw_metadata
+from src.vectors import (ExactIndex, ExactIndexWriter, exact_search, folder_size, hnsw_memory_bytes, latency_summary,
+                         recall_at_k, synthetic_embeddings)
+
+try:
+    import chromadb
+except ImportError:     # the exact backend can be measured without Chroma
+    chromadb = None
+
+ADD_BATCH_SIZE = 5000   # below Chroma's max batch size
+
+def bench_exact(matrix: np.ndarray, queries: np.ndarray, k: int, folderpath: str, rerank: int=0) -> tuple:
+    start = time.perf_counter()
+    writer = ExactIndexWriter(folderpath, quantize=rerank > 0)
+    for offset in range(0, len(matrix), ADD_BATCH_SIZE):
+        batch = range(offset, min(offset + ADD_BATCH_SIZE, len(matrix)))
+        writer.add([(str(i), '', {'i': i}) for i in batch], matrix[offset:offset + ADD_BATCH_SIZE])
+    writer.close()
+    build = time.perf_counter() - start
+
+    index = ExactIndex(folderpath, rerank=rerank)
+    index.search_vector(queries[0], k)     # warm-up: pages the matrix in
+    found, seconds = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search_vector(query, k)
+        seconds.append(time.perf_counter() - start)
+        found.append([document.metadata['i'] for document, _ in hits])
+    return build, found, seconds, folder_size(folderpath)
+
+def bench_chroma(matrix: np.ndarray, queries: np.ndarray, k: int, folderpath: str) -> tuple:
+    client = chromadb.PersistentClient(path=folderpath)
+    collection = client.create_collection("bench", metadata=hnsw_metadata({"space": "cosine"}))
+    start = time.perf_counter()
+    for offset in range(0, len(matrix), ADD_BATCH_SIZE):
+        batch = matrix[offset:offset + ADD_BATCH_SIZE]
+        collection.add(ids=[str(i) for i in range(offset, offset + len(batch))], embeddings=batch.tolist(), documents=[''] * len(batch))
+    build = time.perf_counter() - start
+
+    include = ["documents", "metadatas", "distances"]     # what the app reads back
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=k, include=include)     # warm-up
+    found, seconds = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=include)
+        seconds.append(time.perf_counter() - start)
+        found.append([int(id) for id in result["ids"][0]])
+    size = folder_size(folderpath)
+    if hasattr(client, "clear_system_cache"):
+        client.clear_system_cache()
+    return build, found, seconds, size
+
+def search_memory_bytes(name: str, n: int, dim: int, k: int, rerank: int) -> int:
+    """Memoria que recorre una consulta: la matriz float32, los códigos int8 y las filas re-ordenadas, o el grafo HNSW."""
+    if name == 'exact':
+        return n * dim * 4
+    if name == 'int8':
+        return n * dim + dim * 4 + min(k * rerank, n) * dim * 4
+    return hnsw_memory_bytes(n, dim, 16)
+
+def main(**kwargs) -> None:
+    sizes = [int(size) for size in kwargs.get('sizes', '2000,20000,200000').split(',')]
+    dim = int(kwargs.get('dim', 1536))
+    n_queries = int(kwargs.get('queries', 100))
+    k = int(kwargs.get('k', 30))
+    rerank = int(kwargs.get('rerank', 4))
+    backends = {'exact': bench_exact, 'int8': partial(bench_exact, rerank=rerank), 'chroma': bench_chroma}
+    names = [name for name in kwargs.get('backends', 'exact,int8,chroma').split(',') if name != 'chroma' or chromadb is not None]
+
+    print(f"{'docs':>7s} {'backend':8s} {'build s':>8s} {'p50 ms':>7s} {'p95 ms':>7s} {'recall':>7s} {'disco MB':>9s} {'mem MB':>7s}")
+    for size in sizes:
+        vectors = synthetic_embeddings(size + n_queries, dim)
+        matrix, queries = vectors[:size], vectors[size:]
+        truth, _ = exact_search(matrix, queries, k, 'cosine')
+        for name in names:
+            with tempfile.TemporaryDirectory() as folderpath:
+                build, found, seconds, disk = backends[name](matrix, queries, k, folderpath + "/index")
+            latency = latency_summary(seconds)
+            print(f"{size:7d} {name:8s} {build:8.2f} {latency['p50']:7.2f} {latency['p95']:7.2f} "
+                  f"{recall_at_k(found, truth):7.3f} {disk / 2**20:9.1f} "
+                  f"{search_memory_bytes(name, size, dim, k, rerank) / 2**20:7.1f}", flush=True)
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
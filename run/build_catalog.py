@@ -0,0 +1,35 @@
+'''
+Construye la base SQLite del catálogo (productos, marcas, atributos e índice de texto completo)
+a partir de los CSV de cada marca. La app la abre en modo solo lectura; el stock lo publica
+`run/get_stock.py` en la misma base.
+
+Uso desde la raíz del repositorio:
+    python -m run.build_catalog [csv=./database/csv/] [db=./database/catalog.sqlite]
+'''
+
+import os, sys, time
+import pandas as pd
+from src.catalog import build_catalog, publish_stock
+from src.parameters import CSV_PATH, CATALOG_DB_PATH
+
+STOCK_PATH = "database/stock.csv"
+
+def main(**kwargs) -> None:
+    csv_folderpath = kwargs.get('csv', os.path.join(os.getcwd(), CSV_PATH))
+    db_path = kwargs.get('db', os.path.join(os.getcwd(), CATALOG_DB_PATH))
+    first_build = not os.path.exists(db_path)
+
+    start = time.perf_counter()
+    n_products = build_catalog(csv_folderpath, db_path)
+    # A new catalog starts with the current stock snapshot; rebuilds keep the published one
+    if first_build and os.path.exists(STOCK_PATH):
+        publish_stock(db_path, pd.read_csv(STOCK_PATH, float_precision='round_trip'))
+    print(f"Catálogo: {n_products} productos en {db_path} ({os.path.getsize(db_path) / 2**20:.1f} MB, "
+          f"{time.perf_counter() - start:.2f} s).")
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
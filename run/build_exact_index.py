@@ -0,0 +1,40 @@
+'''
+Exporta la colección de productos de Chroma a un índice exacto (matriz de embeddings mapeada en
+memoria, ver `src/vectors.py`), sin volver a calcular embeddings. Correrlo después de
+`run.create_chroma_db` y usar `VECTOR_BACKEND = "exact"` en `src/parameters.py`.
+
+Uso desde la raíz del repositorio:
+    python -m run.build_exact_index [chroma=./database/chroma/byProduct] [out=./database/exact/byProduct]
+                                    [quantize=true]
+'''
+
+import sys, time
+import chromadb
+from src.indexer import GET_PAGE_SIZE
+from src.parameters import CHROMA_DB_PATH, COLLECTION_NAME, EXACT_INDEX_PATH
+from src.vectors import ExactIndexWriter, folder_size
+
+def main(**kwargs) -> None:
+    chroma_path = kwargs.get('chroma', CHROMA_DB_PATH)
+    folderpath = kwargs.get('out', EXACT_INDEX_PATH)
+    quantize = kwargs.get('quantize', 'true').lower() == 'true'    # int8 codes for the first stage
+
+    start = time.perf_counter()
+    collection = chromadb.PersistentClient(path=chroma_path).get_collection(COLLECTION_NAME)
+    writer, offset = ExactIndexWriter(folderpath, quantize=quantize), 0
+    while True:
+        page = collection.get(include=["embeddings", "documents", "metadatas"], limit=GET_PAGE_SIZE, offset=offset)
+        writer.add(list(zip(page["ids"], page["documents"], page["metadatas"])), page["embeddings"])
+        if len(page["ids"]) < GET_PAGE_SIZE:
+            break
+        offset += GET_PAGE_SIZE
+    n = writer.close()
+    print(f"Índice exacto: {n} documentos en {folderpath} ({folder_size(folderpath) / 2**20:.1f} MB, "
+          f"{time.perf_counter() - start:.2f} s).")
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
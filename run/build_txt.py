@@ -1,56 +1,53 @@
-from src.database import Cepage, Cetaphil, Eucerin, Eximia
-from src.database import Isdin, Loreal, Revlon, Vichy, LRP
-
-# products from cepage brand
-table_filepath = './database/tables/cepage.xlsx'
-txt_folderpath = './database/txt/'
-cepage = Cepage(filepath=table_filepath)
-cepage.to_txt(folderpath=txt_folderpath)
-
-# products from cetaphil brand
-table_filepath = './database/tables/cetaphil.xlsx'
-txt_folderpath = './database/txt/'
-cetaphil = Cetaphil(filepath=table_filepath)
-cetaphil.to_txt(folderpath=txt_folderpath)
-
-# products from eucerin brand
-table_filepath = './database/tables/eucerin.xlsx'
-txt_folderpath = './database/txt/'
-eucerin = Eucerin(filepath=table_filepath)
-eucerin.to_txt(dataframe=eucerin.unify(), folderpath=txt_folderpath)
-
-# products from eximia brand
-table_filepath = './database/tables/eximia.xlsx'
-txt_folderpath = './database/txt/'
-eximia = Eximia(filepath=table_filepath)
-eximia.to_txt(folderpath=txt_folderpath)
-
-# products from isdin brand
-table_filepath = './database/tables/isdin.xlsx'
-txt_folderpath = './database/txt/'
-isdin = Isdin(filepath=table_filepath)
-isdin.to_txt(folderpath=txt_folderpath)
-
-# products from loreal brand
-table_filepath = './database/tables/loreal.xlsx'
-txt_folderpath = './database/txt/'
-loreal = Loreal(filepath=table_filepath, n_sheets=5)
-loreal.to_txt(folderpath=txt_folderpath)
-
-# products from revlon brand
-table_filepath = './database/tables/revlon.xlsx'
-txt_folderpath = './database/txt/'
-revlon = Revlon(filepath=table_filepath, n_sheets=5)
-revlon.to_txt(folderpath=txt_folderpath)
-
-# products from vichy brand
-table_filepath = './database/tables/vichy.xlsx'
-txt_folderpath = './database/txt/'
-vichy = Vichy(filepath=table_filepath)
-vichy.to_txt(folderpath=txt_folderpath)
-
-# products from la roche posay brand
-table_filepath = './database/tables/lrp.xlsx'
-txt_folderpath = './database/txt/'
-lrp = LRP(filepath=table_filepath)
-lrp.to_txt(folderpath=txt_folderpath)
+'''
+Construye los documentos de texto de todas las marcas del catálogo. Cada marca se procesa en
+un proceso aparte, así que la reconstrucción completa tarda lo que la marca más lenta.
+
+Uso desde la raíz del repositorio:
+    python -m run.build_txt [brands=cepage,loreal,...] [tables=./database/tables/]
+                            [txt=./database/txt/] [workers=N] [separate=false]
+'''
+
+import os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.brands import BRANDS
+from src.database import build_brand_txt
+
+def main(**kwargs) -> None:
+    brands = kwargs.get('brands', ','.join(BRANDS)).split(',')
+    table_folderpath = kwargs.get('tables', './database/tables/')
+    txt_folderpath = kwargs.get('txt', './database/txt/')
+    workers = int(kwargs.get('workers', min(len(brands), os.cpu_count() or 1)))
+    separate = kwargs.get('separate', 'false').lower() == 'true'
+
+    start = time.perf_counter()
+    results, failures = [], []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(build_brand_txt, key, table_folderpath, txt_folderpath, separate): key
+                   for key in brands}
+        for done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures.append(key)
+                print(f"[{done}/{len(brands)}] {key}: ERROR {type(e).__name__}: {e}", flush=True)
+                continue
+            results.append(result)
+            print(f"[{done}/{len(brands)}] {key}: {result['documents']} documentos en {result['total']:.2f} s", flush=True)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'marca':10s} {'docs':>6s} {'lectura':>8s} {'armado':>8s} {'escritura':>9s} {'total':>8s}")
+    for result in sorted(results, key=lambda r: r['total'], reverse=True):
+        print(f"{result['brand']:10s} {result['documents']:6d} {result['read']:8.2f} {result['build']:8.2f} "
+              f"{result['write']:9.2f} {result['total']:8.2f}")
+    print(f"Total: {elapsed:.2f} s de reloj, {sum(r['total'] for r in results):.2f} s sumando marcas.")
+    if failures:
+        print(f"Marcas con error: {', '.join(failures)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
@@ -1,9 +1,10 @@
 # import packages
-import openai, os, shutil
+import os, uuid, shutil
+import chromadb
 from dotenv import load_dotenv
-from langchain.vectorstores import Chroma
-from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.docstore.document import Document
+from langchain_openai import OpenAIEmbeddings
+from src.embedder import EmbeddingJob
+from src.pipeline import run_pipeline
 
 # Load environment variables
 _ = load_dotenv(".env")
@@ -11,31 +12,52 @@ _ = load_dotenv(".env")
 # Define some global variables
 OPENAI_API_KEY = os.environ["OPENAI_API_KEY"] # openAI api key
 PERSIST_DIRECTORY = "database/DB_Chroma" # embedding database directory
+CHECKPOINT_DIRECTORY = "database/embeddings/" # finished embedding batches, to resume interrupted runs
 
-filenames = ["cepage_all", "cetaphil_all", "eucerin_all", 
-             "eximia_all", "isdin_all", "loreal_all", 
+filenames = ["cepage_all", "cetaphil_all", "eucerin_all",
+             "eximia_all", "isdin_all", "loreal_all",
              "la roche-posay_all", "revlon_all", "vichy_all"]
-brands = ["Cepage", "Cetaphil", "Eucerin", "Eximia", "Isdin", 
+brands = ["Cepage", "Cetaphil", "Eucerin", "Eximia", "Isdin",
           "Loreal", "La Roche-Posay", "Revlon", "Vichy"]
 
-
-# Check if the directory exists and remove it
+def read_documents():
+    # Stream documents, one per line, without loading the whole corpus
+    for brand, filename in zip(brands, filenames):
+        with open(f"./database/txt/{filename}.txt", 'r', encoding='utf-8') as file:
+            for line in file:
+                yield str(uuid.uuid4()), line.rstrip("\n"), {"metadato": f'{brand}'}
+
+# Build the new database next to the old one, which is only replaced once every chunk is written
+building_directory = PERSIST_DIRECTORY + ".building"
+if os.path.exists(building_directory):
+    shutil.rmtree(building_directory)
+client = chromadb.PersistentClient(path=building_directory)
+collection = client.get_or_create_collection("langchain")
+
+def write(chunk: list, embeddings: list) -> None:
+    collection.add(ids=[id for id, _, _ in chunk], embeddings=embeddings,
+                   documents=[text for _, text, _ in chunk], metadatas=[metadata for _, _, metadata in chunk])
+
+# Read, normalize, embed (resumable, rate-limit aware) and write in chunks
+embedding = OpenAIEmbeddings(api_key=OPENAI_API_KEY, max_retries=0)
+stats = run_pipeline(read_documents(), EmbeddingJob(embedding.embed_documents, CHECKPOINT_DIRECTORY, embedding.model, embedding.dimensions).run, write)
+size = collection.count()
+
+# Swap the databases: move the old one aside, move the new one in, and only then delete the old one,
+# so there is always a complete database at PERSIST_DIRECTORY or next to it
+old_directory = PERSIST_DIRECTORY + ".old"
+if os.path.exists(old_directory):
+    shutil.rmtree(old_directory)    # left over by an interrupted swap
 if os.path.exists(PERSIST_DIRECTORY):
-    shutil.rmtree(PERSIST_DIRECTORY)
-
-# Build documents
-documents = []
-for brand, filename in zip(brands, filenames):
-    with open(f"./database/txt/{filename}.txt", 'r', encoding='utf-8') as file:
-        lines = file.read()
-        for line in lines.split("\n"):
-            # pre-format documents to then pass them to the vector database
-            documents.append(Document(metadata={"metadato": f'{brand}'}, page_content=line))
-
-# Build the vectordatabase
-embedding = OpenAIEmbeddings()
-smalldb = Chroma.from_documents(documents=documents, embedding=embedding, persist_directory=PERSIST_DIRECTORY)
+    os.replace(PERSIST_DIRECTORY, old_directory)
+try:
+    os.replace(building_directory, PERSIST_DIRECTORY)
+except OSError:
+    if os.path.exists(old_directory):
+        os.replace(old_directory, PERSIST_DIRECTORY)
+    raise
+shutil.rmtree(old_directory, ignore_errors=True)
 
 # plot some information
-size = len(smalldb.get()["ids"])
-print(f"Embeddings done. Chroma database ready with {size} documents.")
\ No newline at end of file
+print(stats.report())
+print(f"Embeddings done. Chroma database ready with {size} documents.")
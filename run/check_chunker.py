@@ -0,0 +1,58 @@
+'''
+Verifica `split_long` y `chunk_document` sobre los catálogos de `database/csv`: las piezas de cada
+campo largo, unidas con espacios, tienen que reproducir el campo con los espacios normalizados (sin
+palabras cortadas, repetidas ni perdidas), y ningún fragmento puede pasarse del presupuesto salvo
+que sea una sola palabra. Sale con código 1 si alguna verificación falla.
+
+Uso desde la raíz del repositorio:
+    python -m run.check_chunker [folder=database/csv] [max_tokens=256]
+'''
+
+import os, sys, glob
+import pandas as pd
+from src.chunker import HEADER_MAX_TOKENS, chunk_document, split_fields, split_long
+from src.context import trim
+from src.tokens import count_tokens
+
+def check_document(text: str, max_tokens: int) -> list:
+    """Errores encontrados al partir los campos de un documento (lista vacía si está bien)."""
+    errors = []
+    _, fields = split_fields(text)
+    budget = max(max_tokens - HEADER_MAX_TOKENS, 1)
+    for label, body in fields:
+        if count_tokens(body) <= budget:
+            continue
+        pieces = split_long(body, budget)
+        if ' '.join(pieces) != ' '.join(body.split()):
+            errors.append(f"{label}: las piezas no reproducen el campo")
+        oversized = [piece for piece in pieces if count_tokens(piece) > budget and len(piece.split()) > 1]
+        if oversized:
+            errors.append(f"{label}: {len(oversized)} piezas de más de {budget} tokens")
+        head = trim(body, budget)
+        if not ' '.join(body.split()).startswith(head):
+            errors.append(f"{label}: trim no es un prefijo del campo")
+    return errors
+
+def main(**kwargs) -> None:
+    folder = kwargs.get('folder', 'database/csv')
+    max_tokens = int(kwargs.get('max_tokens', 256))
+
+    documents, split, failed = 0, 0, 0
+    for filepath in sorted(glob.glob(os.path.join(folder, '*.csv'))):
+        for ean, text in pd.read_csv(filepath, dtype=str).fillna('')[['EAN', 'Producto']].itertuples(index=False):
+            documents += 1
+            split += len(chunk_document(ean, text, {'EAN': ean}, max_tokens)) > 1
+            errors = check_document(text, max_tokens)
+            if errors:
+                failed += 1
+                print(f"{os.path.basename(filepath)} {ean}: {'; '.join(errors)}")
+
+    print(f"{documents} documentos, {split} partidos en varios fragmentos, {failed} con errores.")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
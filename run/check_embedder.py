@@ -0,0 +1,162 @@
+'''
+Ejecuta `EmbeddingJob` (ver `src/embedder.py`) contra una función de embeddings local, sin red ni API
+key, que responde con límites de tasa (429 con `retry-after`), errores 5xx y errores de conexión.
+Verifica que los vectores vuelvan en el orden de los textos, que la concurrencia se reduzca ante un
+límite de tasa (`AdaptiveLimiter`), que los errores no transitorios no se reintenten y que al reanudar
+desde los lotes guardados no se calcule de nuevo ningún embedding. Sale con código 1 si algo falla.
+
+Uso desde la raíz del repositorio:
+    python -m run.check_embedder [texts=2000] [seed=0]
+'''
+
+import sys, random, hashlib, tempfile, threading, time
+import src.embedder as embedder
+from src.embedder import AdaptiveLimiter, EmbeddingJob
+
+class APIError(Exception):
+    """Error con la forma de los de openai: `status_code` y `response.headers`."""
+
+    def __init__(self, status_code: int, headers: dict=None) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type('Response', (), {'status_code': status_code, 'headers': headers or {}})()
+
+def vector(text: str) -> list:
+    """Embedding determinístico de un texto, para comparar el orden de los resultados."""
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    return [byte / 255 for byte in digest[:8]]
+
+class FakeEmbeddings(object):
+    """
+    Función de embeddings local. Las primeras llamadas fallan según `failures` (una excepción por
+    llamada, en orden); `fail_on` hace fallar siempre los lotes que contienen ese texto. Registra los
+    textos calculados y la concurrencia observada.
+    """
+
+    def __init__(self, failures: list=(), fail_on: str=None, latency: float=0.002, seed: int=0) -> None:
+        self.failures = list(failures)
+        self.fail_on = fail_on
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.embedded = []
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, texts: list) -> list:
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failure = self.failures.pop(0) if self.failures else None
+            latency = self.latency * self.rng.uniform(0.5, 2.0)    # batches finish out of order
+        try:
+            time.sleep(latency)
+            if failure is not None:
+                raise failure
+            if self.fail_on is not None and self.fail_on in texts:
+                raise APIError(400)
+            with self.lock:
+                self.embedded.extend(texts)
+            return [vector(text) for text in texts]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+class RecordingLimiter(AdaptiveLimiter):
+    """`AdaptiveLimiter` que guarda la historia de su límite."""
+
+    instances = []
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.history = [self.limit]
+        RecordingLimiter.instances.append(self)
+
+    def throttle(self) -> None:
+        super().throttle()
+        self.history.append(self.limit)
+
+    def success(self) -> None:
+        super().success()
+        if self.limit != self.history[-1]:
+            self.history.append(self.limit)
+
+def make_job(embed, folder: str=None, model: str="fake-model", sleeps: list=None) -> EmbeddingJob:
+    sleep = sleeps.append if sleeps is not None else (lambda seconds: None)
+    return EmbeddingJob(embed, folder, model, 8, max_items=50, concurrency=4, sleep=sleep)
+
+def main(**kwargs) -> None:
+    n = int(kwargs.get('texts', 2000))
+    seed = int(kwargs.get('seed', 0))
+    texts = [f"producto {i}: crema hidratante {'x' * (i % 17)}" for i in range(n)]
+    expected = [vector(text) for text in texts]
+    embedder.AdaptiveLimiter = RecordingLimiter     # run() builds its limiter from the module
+
+    # Transient errors: rate limits (with retry-after), 5xx and connection errors are retried
+    failures = [APIError(429, {'retry-after': '7'}), APIError(429), APIError(503), ConnectionError("reset"),
+                APIError(500), TimeoutError("timeout"), APIError(429)]
+    fake, sleeps = FakeEmbeddings(failures, seed=seed), []
+    job = make_job(fake, sleeps=sleeps)
+    assert job.run(texts) == expected, "los vectores no vuelven en el orden de los textos"
+    assert fake.calls == job.stats['batches'] + len(failures), (fake.calls, job.stats)
+    assert job.stats['retries'] == len(failures) and job.stats['rate_limits'] == 3, job.stats
+    assert 7.0 in sleeps, sleeps   # retry-after is honoured
+    print(f"Orden y reintentos con errores transitorios: OK ({job.stats})")
+
+    limiter = RecordingLimiter.instances[-1]
+    assert min(limiter.history) == 1 and limiter.history[-1] > 1, limiter.history   # backs off, then recovers
+    print(f"AdaptiveLimiter: límite {' -> '.join(map(str, limiter.history))}: OK")
+
+    # Sustained rate limiting with slow calls: the limit halves down to one request at a time
+    fake = FakeEmbeddings([APIError(429)] * 4, latency=0.02, seed=seed)
+    make_job(fake).run(texts[:400])
+    assert RecordingLimiter.instances[-1].history[:3] == [4, 2, 1], RecordingLimiter.instances[-1].history
+    assert fake.max_in_flight <= 4, fake.max_in_flight
+    print(f"Concurrencia máxima observada {fake.max_in_flight} (límite 4): OK")
+
+    # Non-transient errors are raised at once, without retrying
+    fake = FakeEmbeddings([APIError(401)], seed=seed)
+    try:
+        make_job(fake).run(texts[:40])
+        raise AssertionError("un 401 no se propagó")
+    except APIError as e:
+        assert e.status_code == 401 and fake.calls == 1, (e, fake.calls)
+    print("Errores no transitorios sin reintentos: OK")
+
+    with tempfile.TemporaryDirectory() as folder:
+        # Interrupted job: one batch always fails; the others are saved
+        fake = FakeEmbeddings(fail_on=texts[n // 2], seed=seed)
+        try:
+            make_job(fake, folder).run(texts)
+            raise AssertionError("el lote con error no se propagó")
+        except APIError:
+            pass
+        saved = set(fake.embedded)
+
+        # Resume: only the texts without a saved batch are embedded
+        fake = FakeEmbeddings(seed=seed)
+        job = make_job(fake, folder)
+        assert job.run(texts) == expected
+        assert not saved & set(fake.embedded) and set(fake.embedded) | saved == set(texts), job.stats
+        print(f"Reanudación tras un error: OK ({len(fake.embedded)} textos calculados de nuevo, {job.stats['resumed']} lotes reutilizados)")
+
+        # Finished job: nothing is embedded again
+        fake = FakeEmbeddings(seed=seed)
+        job = make_job(fake, folder)
+        assert job.run(texts) == expected and fake.calls == 0 and job.stats['batches'] == 0, job.stats
+        print(f"Reanudación completa sin pedidos: OK ({job.stats['resumed']} lotes reutilizados)")
+
+        # Another model never reuses the saved vectors
+        fake = FakeEmbeddings(seed=seed)
+        make_job(fake, folder, model="other-model").run(texts)
+        assert len(fake.embedded) == n, len(fake.embedded)
+        print("Lotes de otro modelo no se reutilizan: OK")
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
@@ -0,0 +1,211 @@
+'''
+Ejecuta `run/create_rag_db.py` contra un cliente local que imita los endpoints de archivos y de lotes
+de archivos de las bases vectorizadas de OpenAI, sin red ni API key. El cliente puede fallar al subir,
+al procesar un lote, al marcar archivos de un lote como fallidos y al borrar. Verifica que una
+ejecución interrumpida se retome desde el manifiesto sin volver a subir nada, que los borrados
+fallidos queden en `stale` y se reintenten, que un lote con archivos fallidos no deje huérfanos y que
+la limpieza de un lote fallido borre todo lo que pueda y propague el error original. Sale con código
+1 si algo falla.
+
+Uso desde la raíz del repositorio:
+    python -m run.check_rag_db
+'''
+
+import os, sys, json, tempfile, itertools
+from collections import Counter
+from types import SimpleNamespace
+import httpx
+import openai
+from run import create_rag_db
+
+def not_found(file_id: str) -> openai.NotFoundError:
+    request = httpx.Request("DELETE", f"https://api.openai.com/v1/files/{file_id}")
+    return openai.NotFoundError(f"No such file: {file_id}", response=httpx.Response(404, request=request), body=None)
+
+class FakeFiles(object):
+    def __init__(self, api) -> None:
+        self.api = api
+
+    def create(self, file, purpose: str) -> SimpleNamespace:
+        name = os.path.basename(file.name)
+        self.api.uploads[name] += 1
+        if name in self.api.fail_upload:
+            raise ConnectionError(f"upload of {name} reset")
+        file_id = f"file-{next(self.api.ids)}"
+        self.api.objects[file_id] = name
+        return SimpleNamespace(id=file_id)
+
+    def delete(self, file_id: str) -> None:
+        if self.api.fail_delete[file_id] > 0:
+            self.api.fail_delete[file_id] -= 1
+            raise ConnectionError(f"delete of {file_id} reset")
+        if file_id not in self.api.objects:
+            raise not_found(file_id)
+        del self.api.objects[file_id]
+
+class FakeStoreFiles(object):
+    def __init__(self, api) -> None:
+        self.api = api
+
+    def delete(self, vector_store_id: str, file_id: str) -> None:
+        if file_id not in self.api.stores[vector_store_id]:
+            raise not_found(file_id)
+        self.api.stores[vector_store_id].discard(file_id)
+
+class FakeFileBatches(object):
+    def __init__(self, api) -> None:
+        self.api = api
+        self.failed = {}    # batch id -> failed file ids
+
+    def create_and_poll(self, vector_store_id: str, file_ids: list) -> SimpleNamespace:
+        names = {self.api.objects[file_id] for file_id in file_ids}
+        if names & self.api.fail_batch:
+            raise TimeoutError("batch polling timed out")
+        batch_id = f"batch-{next(self.api.ids)}"
+        failed = {file_id for file_id in file_ids if self.api.objects[file_id] in self.api.reject}
+        self.failed[batch_id] = failed
+        self.api.stores[vector_store_id].update(set(file_ids) - failed)
+        completed = len(file_ids) - len(failed)
+        return SimpleNamespace(id=batch_id, status="completed",
+                               file_counts=SimpleNamespace(completed=completed, total=len(file_ids)))
+
+    def list_files(self, vector_store_id: str, batch_id: str, filter: str) -> list:
+        return [SimpleNamespace(id=file_id) for file_id in sorted(self.failed[batch_id])]
+
+class FakeOpenAI(object):
+    """
+    Cliente local con `files`, `beta.vector_stores.files` y `beta.vector_stores.file_batches`.
+    `fail_upload`: nombres de archivo cuya subida falla. `fail_batch`: nombres cuyo lote falla entero.
+    `reject`: nombres que el lote marca como fallidos. `fail_delete`: file id -> borrados que fallan.
+    """
+
+    def __init__(self) -> None:
+        self.ids = itertools.count(1)
+        self.objects = {}           # file id -> file name, as stored in OpenAI
+        self.stores = {}            # vector store id -> file ids
+        self.uploads = Counter()    # file name -> uploads
+        self.fail_upload, self.fail_batch, self.reject = set(), set(), set()
+        self.fail_delete = Counter()
+        self.files = FakeFiles(self)
+        self.beta = SimpleNamespace(vector_stores=SimpleNamespace(
+            create=self.create_store, files=FakeStoreFiles(self), file_batches=FakeFileBatches(self)))
+
+    def create_store(self, name: str) -> SimpleNamespace:
+        store_id = f"vs-{next(self.ids)}"
+        self.stores[store_id] = set()
+        return SimpleNamespace(id=store_id)
+
+def write(folder: str, name: str, text: str) -> None:
+    with open(os.path.join(folder, "txt", name), 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def run(api: FakeOpenAI, folder: str, batch_size: int=2) -> dict:
+    create_rag_db.main(client=api, folder=folder, batch_size=str(batch_size), concurrency='2')
+    with open(os.path.join(folder, "manifest.json"), encoding='utf-8') as f:
+        return json.load(f)
+
+def check_consistent(api: FakeOpenAI, manifest: dict) -> None:
+    """Todo lo que hay en la base y en OpenAI está en el manifiesto o en `stale`: no hay huérfanos."""
+    store = api.stores[manifest['vector_store_id']]
+    tracked = {entry['file_id'] for entry in manifest['files'].values()} | set(manifest['stale'])
+    assert store <= tracked and set(api.objects) <= tracked, (store, set(api.objects), tracked)
+
+def check_resume(folder: str) -> None:
+    api = FakeOpenAI()
+    for i in range(6):
+        write(folder, f"doc{i}.txt", f"documento {i}")
+    api.fail_batch = {"doc3.txt"}
+    manifest = run(api, folder)
+    assert len(manifest['files']) == 4 and not any('doc3' in key for key in manifest['files']), manifest['files']
+    check_consistent(api, manifest)     # the failed batch left no orphans
+
+    api.fail_batch = set()
+    manifest = run(api, folder)
+    assert len(manifest['files']) == 6, manifest['files']
+    assert {entry['file_id'] for entry in manifest['files'].values()} == api.stores[manifest['vector_store_id']]
+    assert [name for name, uploads in api.uploads.items() if uploads > 1 and name not in ("doc2.txt", "doc3.txt")] == []
+    check_consistent(api, manifest)
+
+    uploads = sum(api.uploads.values())
+    manifest = run(api, folder)
+    assert sum(api.uploads.values()) == uploads, "una ejecución sin cambios volvió a subir archivos"
+    print(f"Reanudación desde el manifiesto: OK ({uploads} subidas para 6 archivos, 2 repetidas por el lote fallido)")
+
+def check_stale(folder: str) -> None:
+    api = FakeOpenAI()
+    for i in range(3):
+        write(folder, f"doc{i}.txt", f"documento {i}")
+    manifest = run(api, folder)
+    old = manifest['files'][os.path.join("txt", "doc0.txt")]['file_id']
+    removed = manifest['files'][os.path.join("txt", "doc2.txt")]['file_id']
+
+    # A changed file whose previous version cannot be deleted, and a removed file that cannot be deleted
+    write(folder, "doc0.txt", "documento 0, versión 2")
+    os.remove(os.path.join(folder, "txt", "doc2.txt"))
+    api.fail_delete[old] = 1
+    api.fail_delete[removed] = 1
+    manifest = run(api, folder)
+    assert manifest['stale'] == [old], manifest['stale']
+    assert manifest['files'][os.path.join("txt", "doc0.txt")]['file_id'] != old
+    assert manifest['files'][os.path.join("txt", "doc2.txt")]['file_id'] == removed, "el archivo borrado perdió su entrada"
+    check_consistent(api, manifest)
+
+    manifest = run(api, folder)
+    assert manifest['stale'] == [] and old not in api.objects and removed not in api.objects, (manifest, api.objects)
+    assert os.path.join("txt", "doc2.txt") not in manifest['files']
+    check_consistent(api, manifest)
+
+    # A stale file already deleted in OpenAI (NotFound) counts as deleted
+    manifest['stale'] = ["file-gone"]
+    with open(os.path.join(folder, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    manifest = run(api, folder)
+    assert manifest['stale'] == [], manifest['stale']
+    print("Borrados fallidos en stale y reintentados: OK")
+
+def check_partial_batch(folder: str) -> None:
+    api = FakeOpenAI()
+    for i in range(4):
+        write(folder, f"doc{i}.txt", f"documento {i}")
+    api.reject = {"doc1.txt"}
+    counts = create_rag_db.sync_files(api, [os.path.join(folder, "txt", f"doc{i}.txt") for i in range(4)],
+                                      os.path.join(folder, "manifest.json"), batch_size=4)
+    assert counts['uploaded'] == 3 and counts['failed'] == 1, counts
+    manifest = run(api, folder, batch_size=4)   # doc1 is rejected again
+    check_consistent(api, manifest)
+    api.reject = set()
+    manifest = run(api, folder, batch_size=4)
+    assert len(manifest['files']) == 4 and api.uploads["doc1.txt"] == 3 and api.uploads["doc0.txt"] == 1, api.uploads
+    check_consistent(api, manifest)
+    print("Lote con archivos fallidos, sin huérfanos: OK")
+
+def check_cleanup(folder: str) -> None:
+    # The batch fails and one of its orphans cannot be deleted: the others are still deleted
+    # and the original error is the one raised
+    api = FakeOpenAI()
+    for i in range(3):
+        write(folder, f"doc{i}.txt", f"documento {i}")
+    store = api.create_store("test").id
+    api.fail_batch = {"doc0.txt"}
+    api.fail_delete["file-2"] = 1
+    paths = [os.path.join(folder, "txt", f"doc{i}.txt") for i in range(3)]
+    try:
+        create_rag_db.upload_batch(api, store, paths)
+        raise AssertionError("el error del lote no se propagó")
+    except TimeoutError:
+        pass
+    assert set(api.objects) == {"file-2"}, api.objects
+    print("Limpieza de un lote fallido: OK")
+
+def main(**kwargs) -> None:
+    for check in (check_resume, check_stale, check_partial_batch, check_cleanup):
+        with tempfile.TemporaryDirectory() as folder:
+            os.makedirs(os.path.join(folder, "txt"))
+            check(folder)
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
@@ -0,0 +1,172 @@
+'''
+Ejecuta `run/write_stock.py` y `SheetWriter` (ver `src/sheets.py`) contra una planilla en memoria que
+imita `spreadsheets().values()` de la API de Sheets (`get` y `batchUpdate`), sin red ni credenciales,
+y que puede responder 429 y 503. Verifica que la hoja quede igual a las filas nuevas, que solo se
+envíen las celdas que cambiaron, que ningún pedido supere MAX_CHUNK_CELLS, que los errores
+transitorios se reintenten y que `dry_run` no envíe nada. Sale con código 1 si algo falla.
+
+Uso desde la raíz del repositorio:
+    python -m run.check_sheets [rows=6000] [seed=0]
+'''
+
+import re, sys, random
+from run import write_stock
+from src.sheets import MAX_CHUNK_CELLS, SheetWriter, column_letter
+
+class HttpError(Exception):
+    """Error con la forma de `googleapiclient.errors.HttpError`: el estado va en `resp.status`."""
+
+    def __init__(self, status: int) -> None:
+        super().__init__(f"HTTP {status}")
+        self.resp = type('Response', (), {'status': status})()
+
+def column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+def parse_range(range_name: str) -> tuple:
+    """`hoja!C2:C40` o `hoja!A:F` -> hoja, fila y columna iniciales, fila y columna finales (desde 0; None: sin límite)."""
+    sheet, cells = range_name.split('!')
+    start, end = (cells.split(':') + [cells])[:2]
+    (c1, r1), (c2, r2) = [re.fullmatch(r'([A-Z]+)(\d*)', cell).groups() for cell in (start, end)]
+    return (sheet, int(r1) - 1 if r1 else 0, column_index(c1),
+            int(r2) - 1 if r2 else None, column_index(c2))
+
+class Request(object):
+    def __init__(self, service, action) -> None:
+        self.service = service
+        self.action = action
+
+    def execute(self):
+        if self.service.failures:
+            failure = self.service.failures.pop(0)
+            if failure is not None:
+                raise HttpError(failure)
+        return self.action()
+
+class FakeSheets(object):
+    """
+    Planilla en memoria con la interfaz de `build("sheets", "v4")` que usa `SheetWriter`. Cada
+    `execute` consume el siguiente estado de `failures` (None: responde bien) y registra los
+    `batchUpdate` recibidos.
+    """
+
+    def __init__(self, sheets: dict, failures: list=()) -> None:
+        self.sheets = {name: [list(row) for row in rows] for name, rows in sheets.items()}
+        self.failures = list(failures)
+        self.updates = []
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId: str, range: str) -> Request:
+        def action() -> dict:
+            sheet, row, column, last_row, last_column = parse_range(range)
+            rows = self.sheets[sheet][row:None if last_row is None else last_row + 1]
+            # The API omits trailing empty cells and rows
+            values = [[str(value) for value in r[column:last_column + 1]] for r in rows]
+            values = [r[:max([i + 1 for i, value in enumerate(r) if value != ''] or [0])] for r in values]
+            while values and not values[-1]:
+                values.pop()
+            return {"range": range, "values": values} if values else {"range": range}
+        return Request(self, action)
+
+    def batchUpdate(self, spreadsheetId: str, body: dict) -> Request:
+        def action() -> dict:
+            self.updates.append(body)
+            for data in body["data"]:
+                sheet, row, column, _, _ = parse_range(data["range"])
+                grid = self.sheets[sheet]
+                for i, values in enumerate(data["values"]):
+                    while len(grid) <= row + i:
+                        grid.append([])
+                    for j, value in enumerate(values):
+                        cells = grid[row + i]
+                        cells.extend([''] * (column + j + 1 - len(cells)))
+                        cells[column + j] = value
+            return {"totalUpdatedCells": sum(len(values) for data in body["data"] for values in data["values"])}
+        return Request(self, action)
+
+    def sent_cells(self) -> dict:
+        """Celdas enviadas en todos los pedidos: (hoja, fila, columna) -> valor."""
+        cells = {}
+        for body in self.updates:
+            for data in body["data"]:
+                sheet, row, column, _, _ = parse_range(data["range"])
+                for i, values in enumerate(data["values"]):
+                    for j, value in enumerate(values):
+                        cells[(sheet, row + i, column + j)] = value
+        return cells
+
+def stock_sheet(rows: int, rng: random.Random) -> list:
+    header = ["Código", "EAN", "Stock", "Precio", "Promo", "Descripción"]
+    body = [[str(1000 + i), str(7790000000000 + i), f"{rng.randint(0, 3000):,}".replace(',', '.'),   # "1.234" -> "1234"
+             "0.0" if rng.random() < 0.2 else f"{rng.randint(100, 90000)}.0",  # zero prices do not change
+             rng.choice(["", "20%", "2x1"]), f"Producto {i}"] for i in range(rows)]
+    return [header] + body
+
+def check_write(rows: int, rng: random.Random) -> None:
+    original = stock_sheet(rows, rng)
+    expected = write_stock.update_prices(original, 0.9)
+    changed = {(write_stock.SHEET, i, j) for i, row in enumerate(expected) for j, value in enumerate(row)
+               if value != original[i][j]}
+
+    # One 429 on the read and one 503 on a write are retried
+    fake = FakeSheets({write_stock.SHEET: original}, failures=[429, None, 503])
+    write_stock.main(service=fake, factor='0.9')
+    assert fake.sheets[write_stock.SHEET] == expected, "la hoja no quedó igual a las filas nuevas"
+    sent = fake.sent_cells()
+    assert set(sent) == changed, f"{len(set(sent) - changed)} celdas sin cambios enviadas, {len(changed - set(sent))} cambios sin enviar"
+    sizes = [sum(len(values) for data in body["data"] for values in data["values"]) for body in fake.updates]
+    assert len(sizes) > 1 and max(sizes) <= MAX_CHUNK_CELLS, sizes
+    assert not fake.failures, fake.failures
+    print(f"write_stock: {len(changed)} celdas cambiadas de {rows * 6}, pedidos de {sizes} celdas: OK")
+
+    # Running it again with factor 1 sends nothing: the sheet already has the new values
+    fake.updates = []
+    write_stock.main(service=fake, factor='1')
+    assert not fake.updates, fake.updates
+    print("Sin cambios, sin pedidos: OK")
+
+    # dry_run shows the diff and leaves the sheet untouched
+    original = stock_sheet(5, rng)
+    fake = FakeSheets({write_stock.SHEET: original})
+    write_stock.main(service=fake, factor='0.5', dry_run='true')
+    assert not fake.updates and fake.sheets[write_stock.SHEET] == original
+    print("dry_run no envía nada: OK")
+
+def check_writer(rng: random.Random) -> None:
+    # Small chunks, ragged rows (the API omits trailing empty cells) and changes in several columns
+    old = [[str(rng.randint(0, 9)) for _ in range(rng.randint(0, 8))] for _ in range(300)]
+    new = [[str(rng.randint(0, 9)) if rng.random() < 0.3 else (row[j] if j < len(row) else '') for j in range(8)]
+           for row in old]
+    fake, sleeps = FakeSheets({"hoja": old}, failures=[None, 429, 503, 429]), []
+    writer = SheetWriter(fake, "fake-id", max_cells=50, sleep=sleeps.append)
+    summary = writer.write("hoja", writer.read("hoja!A:H"), new)
+    sizes = [sum(len(values) for data in body["data"] for values in data["values"]) for body in fake.updates]
+    assert max(sizes) <= 50 and summary['requests'] == len(sizes), (sizes, summary)
+    assert len(sleeps) == 3, sleeps
+    padded = [row + [''] * (8 - len(row)) for row in fake.sheets["hoja"]]
+    assert padded == new, "la hoja no quedó igual a las filas nuevas"
+    assert all(value != (old[i][j] if j < len(old[i]) else '') for (_, i, j), value in fake.sent_cells().items())
+    print(f"SheetWriter: {summary['cells']} celdas en {summary['ranges']} rangos, {summary['requests']} pedidos "
+          f"de a lo sumo 50 celdas, {len(sleeps)} reintentos: OK")
+
+def main(**kwargs) -> None:
+    rows = int(kwargs.get('rows', 6000))
+    rng = random.Random(int(kwargs.get('seed', 0)))
+    assert [column_letter(column_index(letters)) for letters in ("A", "Z", "AA", "AZ", "ZZ")] == ["A", "Z", "AA", "AZ", "ZZ"]
+    check_writer(rng)
+    check_write(rows, rng)
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
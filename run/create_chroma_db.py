@@ -1,9 +1,28 @@
-import os, csv, shutil, logging
+'''
+Actualiza la base vectorial de productos de forma incremental: cada documento se identifica por
+su EAN (más un número de aparición si el EAN se repite) y solo se calculan embeddings de los
+documentos nuevos o modificados. Los documentos largos se parten en fragmentos por campo (ver
+`src/chunker.py`; `chunk_tokens=0` lo desactiva). Los documentos se procesan en flujo, de a grupos,
+y al final se reporta el tiempo y el pico de memoria de cada etapa.
+
+Los parámetros del índice HNSW salen de `HNSW_SETTINGS` y se pueden cambiar por argumento. Como
+Chroma los fija al crear la colección, si difieren de los de la colección existente hay que
+pedir `rebuild=true`, que la vuelve a crear (los embeddings ya calculados salen de los checkpoints).
+
+Uso desde la raíz del repositorio:
+    python -m run.create_chroma_db [dry_run=false] [concurrency=4] [chunk_tokens=256]
+                                   [space=l2] [M=16] [construction_ef=100] [search_ef=10] [rebuild=false]
+'''
+
+import os, sys, csv, logging, itertools
+import chromadb
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
 from langchain_openai import OpenAIEmbeddings
-from langchain.docstore.document import Document
-from src.parameters import CHROMA_DB_PATH, CSV_PATH, LOG_GENERAL_PATH
+from src.chunker import CHUNK_MAX_TOKENS, chunk_documents
+from src.embedder import EmbeddingJob
+from src.indexer import document_ids, hnsw_changes, hnsw_metadata, sync_collection
+from src.pipeline import PipelineStats
+from src.parameters import CHROMA_DB_PATH, COLLECTION_NAME, CSV_PATH, EMBEDDINGS_CHECKPOINT_PATH, HNSW_SETTINGS, LOG_GENERAL_PATH
 
 # Some logging general configuration
 logger = logging.getLogger(name=__name__)
@@ -16,35 +35,85 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 # Define some global variables
-file_names = ["cepage.csv", "cetaphil.csv", "eucerin.csv", 
-              "eximia.csv", "isdin.csv", "loreal.csv", 
+file_names = ["cepage.csv", "cetaphil.csv", "eucerin.csv",
+              "eximia.csv", "isdin.csv", "loreal.csv",
               "lrp.csv", "revlon.csv", "vichy.csv"]
 brands = ["Cepage", "Cetaphil", "Eucerin", "Eximia", "Isdin",
           "Loreal", "La Roche-Posay", "Revlon", "Vichy"]
 
-# Load environment variables
-_ = load_dotenv(".env")
-
-# Check if the directory exists and remove it
-if os.path.exists(CHROMA_DB_PATH):
-    shutil.rmtree(CHROMA_DB_PATH)
-
-# Build documents
-documents = []
-for brand, file_name in zip(brands, file_names):
-    try:
-        with open(CSV_PATH + file_name, 'r', encoding='utf-8') as file_csv:
-            read_csv = csv.reader(file_csv)
-            next(read_csv)  # skip header
-            for row in read_csv:
-                ean = row[0].strip() if row[0] else ''
-                documents.append(Document(metadata={'Marca': brand, 'EAN': ean}, page_content=row[1]))
-        logger.info(f"Documentos para la marca '{brand}' añadidos desde el archivo {file_name}.")
-    except Exception as e:
-        logger.error(f"Error procesando el archivo {file_name} para la marca {brand}: {e}")
-
-# Build the vector database
-embedding = OpenAIEmbeddings(api_key=os.environ["OPENAI_API_KEY"])
-smalldb = Chroma.from_documents(documents=documents, embedding=embedding, persist_directory=CHROMA_DB_PATH)
-size = len(smalldb.get()["ids"])
-logger.info(f"Embeddings completados. Base de datos Chroma lista con {size} documentos.")
\ No newline at end of file
+def read_rows():
+    """
+    Leer en flujo las filas de todas las marcas desde los CSV.
+
+    Yields:
+        tuple: Clave del documento (EAN, o un reemplazo si está vacío), texto y metadatos.
+    """
+    for brand, file_name in zip(brands, file_names):
+        try:
+            with open(CSV_PATH + file_name, 'r', encoding='utf-8') as file_csv:
+                read_csv = csv.reader(file_csv)
+                next(read_csv)  # skip header
+                for row in read_csv:
+                    ean = row[0].strip() if row[0] else ''
+                    yield ean or f"{brand}:sin-ean", row[1], {'Marca': brand, 'EAN': ean}
+            logger.info(f"Documentos para la marca '{brand}' leídos desde el archivo {file_name}.")
+        except Exception as e:
+            # Abort: skipping a brand would delete all its documents from the index
+            logger.error(f"Error procesando el archivo {file_name} para la marca {brand}: {e}")
+            raise
+
+def read_documents():
+    """
+    Leer en flujo los documentos de todas las marcas, con su identificador estable.
+
+    Yields:
+        tuple: Identificador, texto y metadatos de cada documento.
+    """
+    keys, rows = itertools.tee(read_rows())
+    for id, (_, text, metadata) in zip(document_ids(key for key, _, _ in keys), rows):
+        yield id, text, metadata
+
+def main(**kwargs) -> None:
+    dry_run = kwargs.get('dry_run', 'false').lower() == 'true'
+    concurrency = int(kwargs.get('concurrency', 4))
+    chunk_tokens = int(kwargs.get('chunk_tokens', CHUNK_MAX_TOKENS))
+    rebuild = kwargs.get('rebuild', 'false').lower() == 'true'
+    settings = {key: type(value)(kwargs.get(key, value)) for key, value in HNSW_SETTINGS.items()}
+
+    # Load environment variables
+    _ = load_dotenv(".env")
+
+    # Retries are left to the job, which backs off and lowers its concurrency on rate limits
+    embedding = OpenAIEmbeddings(api_key=os.environ["OPENAI_API_KEY"], max_retries=0)
+    job = EmbeddingJob(embedding.embed_documents, EMBEDDINGS_CHECKPOINT_PATH, embedding.model, embedding.dimensions,
+                       concurrency=concurrency)
+    client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+    collection = client.get_or_create_collection(COLLECTION_NAME, metadata=hnsw_metadata(settings))
+    changes = hnsw_changes(collection, settings)
+    if changes:
+        message = ", ".join(f"{key}: {old} -> {new}" for key, (old, new) in changes.items())
+        if not rebuild:
+            logger.error(f"La colección usa otros parámetros HNSW ({message}). Usar rebuild=true para recrearla.")
+            sys.exit(1)
+        if not dry_run:
+            logger.info(f"Recreando la colección con los nuevos parámetros HNSW ({message}).")
+            client.delete_collection(COLLECTION_NAME)
+            collection = client.create_collection(COLLECTION_NAME, metadata=hnsw_metadata(settings))
+    stats = PipelineStats()
+    read = (lambda: chunk_documents(read_documents(), chunk_tokens)) if chunk_tokens > 0 else read_documents
+    counts = sync_collection(collection, read, job.run, dry_run=dry_run, stats=stats)
+
+    message = (f"Agregados: {counts['add']}, actualizados: {counts['update']}, borrados: {counts['delete']}, "
+               f"sin cambios: {counts['unchanged']}. Base de datos Chroma con {collection.count()} documentos.")
+    logger.info(message)
+    print(message)
+    if not dry_run:
+        logger.info(f"Estadísticas del pipeline:\n{stats.report()}")
+        print(stats.report())
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
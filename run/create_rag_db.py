@@ -1,7 +1,9 @@
-import os, sys
+import os, sys, json
 import logging
 import openai
-from typing import List
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.database import file_digest
 from src.parameters import *
 
 def get_file_paths(directory: str, extension: str = ".pdf") -> List[str]:
@@ -31,43 +33,183 @@ def get_file_paths(directory: str, extension: str = ".pdf") -> List[str]:
         logging.error(f"Error al obtener archivos desde {directory}: {str(e)}")
         return []
 
-def process_files(
-    client: openai.OpenAI, 
-    vector_store, 
-    file_path_batches: List[List[str]], 
-    name: str = "VectorStore"
-) -> None:
+def load_manifest(filepath: str) -> dict:
     """
-    Sube lotes de archivos a la tienda de vectores de OpenAI.
-    
+    Leer el manifiesto de la base vectorizada: su identificador y, por cada archivo subido, su hash
+    de contenido y el identificador del archivo en OpenAI.
+
     Args:
-        client (openai.OpenAI): Cliente de OpenAI inicializado con la clave API.
-        vector_store (openai.VectorStore): Objeto de la tienda de vectores donde se subirán los archivos.
-        file_path_batches (List[List[str]]): Lista de lotes de archivos, donde cada lote es una lista de rutas de archivos.
-        name (str, opcional): El nombre de la tienda de vectores. El valor predeterminado es "VectorStore".
+        filepath (str): Ruta al manifiesto (JSON).
+
+    Returns:
+        dict: Manifiesto, `{'vector_store_id': str, 'files': {ruta relativa: {'sha256': str, 'file_id': str}},
+            'stale': [file_id]}`. `stale` son versiones anteriores que no se pudieron borrar de OpenAI.
     """
-    for file_paths in file_path_batches:
+    if not os.path.exists(filepath):
+        return {'vector_store_id': None, 'files': {}, 'stale': []}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest.setdefault('stale', [])
+    return manifest
+
+def save_manifest(manifest: dict, filepath: str) -> None:
+    """Guardar el manifiesto de forma atómica (archivo temporal y `os.replace`)."""
+    temporary = f"{filepath}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(temporary, filepath)
+
+def delete_file(client: openai.OpenAI, vector_store_id: str, file_id: str) -> bool:
+    """
+    Quitar un archivo de la base vectorizada y borrarlo de OpenAI. Un archivo que ya no existe cuenta
+    como borrado, así un borrado que falló a medias se puede reintentar.
+
+    Returns:
+        bool: True si el archivo quedó borrado.
+    """
+    try:
         try:
-            file_streams = [open(path, "rb") for path in file_paths]
-            # Subir y esperar el estado del lote de archivos.
-            file_batch = client.beta.vector_stores.file_batches.upload_and_poll(
-                vector_store_id=vector_store.id, files=file_streams
-            )
-            status = file_batch.status
-            num_files_completed = file_batch.file_counts.completed
-            num_files = file_batch.file_counts.total
-            logging.info(f"Estado de subida: {status}. {num_files_completed}/{num_files} archivos a la base vectorizada {name}.")
+            client.beta.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file_id)
+        except openai.NotFoundError:
+            pass
+        try:
+            client.files.delete(file_id)
+        except openai.NotFoundError:
+            pass
+        return True
+    except Exception as e:
+        logging.warning(f"No se pudo borrar el archivo {file_id}: {str(e)}")
+        return False
+
+def discard_files(client: openai.OpenAI, file_ids: List[str]) -> None:
+    """Borrar de OpenAI archivos que no llegaron a la base vectorizada. Un error al borrar uno no detiene el resto."""
+    for file_id in file_ids:
+        try:
+            client.files.delete(file_id)
         except Exception as e:
-            logging.error(f"Error al subir archivos a la base vectorizada: {str(e)}")
+            logging.warning(f"No se pudo borrar el archivo huérfano {file_id}: {str(e)}")
 
-def main() -> None:
+def upload_batch(client: openai.OpenAI, vector_store_id: str, file_paths: List[str]) -> Dict[str, str]:
     """
-    Función principal que coordina la obtención de rutas de archivos, la inicialización del cliente de OpenAI,
-    la creación de la base vectorizada y la subida de archivos.
+    Subir un lote de archivos y agregarlos a la base vectorizada. Cada archivo se abre solo mientras
+    se sube, y los archivos que no se pudieron procesar se borran de OpenAI.
 
     Args:
-        *args: Argumentos posicionales opcionales.
-        **kwargs: Argumentos clave-valor opcionales, como 'pdf_folder', 'txt_folder', 'nombre'.
+        client (openai.OpenAI): Cliente de OpenAI inicializado con la clave API.
+        vector_store_id (str): Identificador de la base vectorizada.
+        file_paths (List[str]): Rutas de los archivos del lote.
+
+    Returns:
+        Dict[str, str]: Identificador en OpenAI de cada archivo agregado con éxito, por ruta.
+    """
+    file_ids = {}
+    try:
+        for path in file_paths:
+            with open(path, "rb") as file_stream:
+                file_ids[path] = client.files.create(file=file_stream, purpose="assistants").id
+        file_batch = client.beta.vector_stores.file_batches.create_and_poll(
+            vector_store_id=vector_store_id, file_ids=list(file_ids.values())
+        )
+    except Exception:
+        # Do not leave orphan files in OpenAI: the whole batch is retried on the next run
+        discard_files(client, list(file_ids.values()))
+        raise
+    failed = set()
+    if file_batch.file_counts.completed != file_batch.file_counts.total:
+        failed = {file.id for file in client.beta.vector_stores.file_batches.list_files(
+            vector_store_id=vector_store_id, batch_id=file_batch.id, filter="failed")}
+        discard_files(client, sorted(failed))
+    logging.info(f"Estado de subida: {file_batch.status}. {file_batch.file_counts.completed}/"
+                 f"{file_batch.file_counts.total} archivos a la base vectorizada {vector_store_id}.")
+    return {path: file_id for path, file_id in file_ids.items() if file_id not in failed}
+
+def sync_files(
+    client: openai.OpenAI, 
+    file_paths: List[str], 
+    manifest_path: str, 
+    name: str = "VectorStore", 
+    batch_size: int = 5, 
+    concurrency: int = 4
+) -> Dict[str, int]:
+    """
+    Sincronizar archivos locales con la base vectorizada de OpenAI. Solo se suben los archivos
+    nuevos o modificados (según su hash sha256 en el manifiesto), en lotes concurrentes. El
+    manifiesto se guarda tras cada lote, así que una ejecución interrumpida o con lotes fallidos
+    se retoma en la siguiente sin volver a subir lo que ya se subió.
+
+    Args:
+        client (openai.OpenAI): Cliente de OpenAI inicializado con la clave API.
+        file_paths (List[str]): Rutas de los archivos a sincronizar.
+        manifest_path (str): Ruta al manifiesto.
+        name (str, opcional): Nombre de la base vectorizada, si hay que crearla. El valor predeterminado es "VectorStore".
+        batch_size (int, opcional): Archivos por lote. El valor predeterminado es 5.
+        concurrency (int, opcional): Lotes en curso al mismo tiempo. El valor predeterminado es 4.
+
+    Returns:
+        Dict[str, int]: Cantidad de archivos subidos, sin cambios, borrados y fallidos.
+    """
+    manifest = load_manifest(manifest_path)
+    if manifest['vector_store_id'] is None:
+        manifest['vector_store_id'] = client.beta.vector_stores.create(name=name).id
+        save_manifest(manifest, manifest_path)
+        logging.info(f"Base de datos vectorial '{name}' creada.")
+    vector_store_id = manifest['vector_store_id']
+
+    # Files are tracked by their path relative to the manifest, so the manifest does not depend on the cwd
+    root = os.path.dirname(os.path.abspath(manifest_path))
+    keys = {path: os.path.relpath(os.path.abspath(path), root) for path in file_paths}
+    digests = {keys[path]: file_digest(path) for path in file_paths}
+    pending = [path for path in file_paths 
+               if manifest['files'].get(keys[path], {}).get('sha256') != digests[keys[path]]]
+    removed = [key for key in manifest['files'] if key not in digests]
+    batches = [pending[i: i + batch_size] for i in range(0, len(pending), batch_size)]
+    logging.info(f"{len(pending)} archivos para subir en {len(batches)} lotes, {len(removed)} para borrar.")
+
+    counts = {'uploaded': 0, 'unchanged': len(file_paths) - len(pending), 'deleted': 0, 'failed': 0}
+
+    # Retry the deletions that failed in previous runs: file_search keeps serving those files until then
+    manifest['stale'] = [file_id for file_id in manifest['stale'] if not delete_file(client, vector_store_id, file_id)]
+    save_manifest(manifest, manifest_path)
+
+    def replace(key: str, file_id: str) -> None:
+        # Record the new version; the previous one (if any) stays in 'stale' until it is deleted
+        previous = manifest['files'].get(key)
+        manifest['files'][key] = {'sha256': digests[key], 'file_id': file_id}
+        if previous is not None and not delete_file(client, vector_store_id, previous['file_id']):
+            manifest['stale'].append(previous['file_id'])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(upload_batch, client, vector_store_id, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                uploaded = future.result()
+            except Exception as e:
+                uploaded = {}
+                logging.error(f"Error al subir archivos a la base vectorizada: {str(e)}")
+            for path, file_id in uploaded.items():
+                replace(keys[path], file_id)
+            counts['uploaded'] += len(uploaded)
+            counts['failed'] += len(batch) - len(uploaded)
+            save_manifest(manifest, manifest_path)
+
+    for key in removed:
+        # A removed file keeps its entry until it is deleted, so the next run retries it
+        if delete_file(client, vector_store_id, manifest['files'][key]['file_id']):
+            del manifest['files'][key]
+            counts['deleted'] += 1
+    save_manifest(manifest, manifest_path)
+    return counts
+
+def main(client: openai.OpenAI = None, **kwargs) -> None:
+    """
+    Función principal que coordina la obtención de rutas de archivos, la inicialización del cliente de OpenAI
+    y la sincronización de los archivos con la base vectorizada.
+
+    Args:
+        client (openai.OpenAI, opcional): Cliente a usar. Si es None, se crea uno con OPENAI_API_KEY.
+        **kwargs: Argumentos clave-valor opcionales, como 'pdf_folder', 'txt_folder', 'nombre',
+            'manifest', 'batch_size' y 'concurrency'.
 
     Ejemplos de uso desde la terminal:
     
@@ -100,6 +242,11 @@ def main() -> None:
         ```bash
         python script.py folder=/ruta/alternativa/
         ```
+
+    7. Subiendo lotes de 10 archivos, de a 2 lotes en simultáneo:
+        ```bash
+        python script.py batch_size=10 concurrency=2
+        ```
     """
     # Start logging
     logging.info("Iniciando el proceso de creación de la base de datos vectorial...")
@@ -109,37 +256,33 @@ def main() -> None:
     pdf_folder = kwargs.get('pdf_folder', os.path.join(folder, "pdf/"))
     txt_folder = kwargs.get('txt_folder', os.path.join(folder, "txt/"))
     name_vd = kwargs.get('nombre', 'Vademecum_rag')
+    manifest_path = kwargs.get('manifest', os.path.join(folder, "manifest.json"))
+    batch_size = int(kwargs.get('batch_size', 5))
+    concurrency = int(kwargs.get('concurrency', 4))
 
     # Get all pdf and csv files from respective folders.
     pdf_files = get_file_paths(pdf_folder, '.pdf')
     txt_files = get_file_paths(txt_folder, '.txt')
     file_paths = pdf_files + txt_files
 
-    # Split file paths into batches of n.
-    n = 5
-    file_path_batches = [file_paths[i: i + n] for i in range(0, len(file_paths), n)]
-
     # Initialize OpenAI client
-    try:
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        logging.info("Cliente de OpenAI inicializado.")
-    except Exception as e:
-        logging.error(f"Error al inicializar el cliente de OpenAI: {str(e)}")
-        return
+    if client is None:
+        try:
+            client = openai.OpenAI(api_key=OPENAI_API_KEY)
+            logging.info("Cliente de OpenAI inicializado.")
+        except Exception as e:
+            logging.error(f"Error al inicializar el cliente de OpenAI: {str(e)}")
+            return
 
-    # Create a new vector store
+    # Upload new or changed files to the vector store (created on the first run)
     try:
-        vector_store = client.beta.vector_stores.create(name=name_vd)
-        logging.info(f"Base de datos vectorial '{name_vd}' creada.")
+        counts = sync_files(client, file_paths, manifest_path, name_vd, batch_size, concurrency)
     except Exception as e:
-        logging.error(f"Error al crear la base de datos vectorial : {str(e)}")
+        logging.error(f"Error al sincronizar la base de datos vectorial: {str(e)}")
         return
 
-    # Upload files to vector store
-    process_files(client, vector_store, file_path_batches, name_vd)
-
     # Finish logging
-    logging.info("Proceso de creación de la base de datos vectorial finalizado.")
+    logging.info(f"Proceso de creación de la base de datos vectorial finalizado: {counts}.")
 
 if __name__ == "__main__":
     # Global logging configuration (main log file)
@@ -153,6 +296,6 @@ if __name__ == "__main__":
     
     kwargs = {}
     for arg in sys.argv[1:]:
-        key, value = arg.split('=')
+        key, value = arg.split('=', 1)
         kwargs[key] = value
     main(**kwargs)
\ No newline at end of file
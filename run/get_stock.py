@@ -3,6 +3,9 @@ import pandas as pd
 import streamlit as st
 from googleapiclient.errors import HttpError
 from google.oauth2.service_account import Credentials
+from src.catalog import publish_stock
+from src.parameters import CSV_PATH, PROMO_INDEX_PATH, CATALOG_DB_PATH
+from src.stock import publish_snapshot
 
 SPREADSHEET_ID = "1ulAoStGq7pI5pTSA1H1WKVGcf5vjVhf_CUPsJHBKuNM"
 LINK = "https://docs.google.com/spreadsheets/d/1ulAoStGq7pI5pTSA1H1WKVGcf5vjVhf_CUPsJHBKuNM/edit?gid=1840576660#gid=1840576660"
@@ -57,6 +60,9 @@ df = df[df.iloc[:, 2] > 0]
 # Rename columns
 df.columns = ["codigo", "ean", "stock", "precio", "promo", "descripcion"]
 
-# Save the DataFrame to a CSV file
+# Publish the snapshot: save the DataFrame to a CSV file and rebuild the promo index
 file_path = os.getcwd() + "/database/stock.csv"
-df.to_csv(file_path, index=False)
\ No newline at end of file
+publish_snapshot(df, file_path, os.path.join(os.getcwd(), PROMO_INDEX_PATH), os.path.join(os.getcwd(), CSV_PATH))
+catalog_path = os.path.join(os.getcwd(), CATALOG_DB_PATH)
+if os.path.exists(catalog_path):
+    publish_stock(catalog_path, df)
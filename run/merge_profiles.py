@@ -0,0 +1,57 @@
+import os, sys, glob
+from src.profiler import merge_collapsed
+
+def main(**kwargs) -> None:
+    """
+    Combina los perfiles de turnos (pilas colapsadas) en un único archivo listo para
+    generar un flame graph (por ejemplo con `flamegraph.pl` o speedscope).
+
+    Ejemplos de uso desde la terminal:
+
+    1. Combinar todos los perfiles de la carpeta por defecto:
+        ```bash
+        python -m run.merge_profiles
+        ```
+
+    2. Filtrar por sesión y mantener cada turno como raíz del flame graph:
+        ```bash
+        python -m run.merge_profiles session=<session_id> by_turn=1
+        ```
+
+    3. Cambiar la carpeta de entrada y el archivo de salida:
+        ```bash
+        python -m run.merge_profiles folder=logs/profiles output=logs/profiles/merged.txt
+        ```
+    """
+    folder = kwargs.get('folder', os.getcwd() + "/logs/profiles")
+    session = kwargs.get('session', '')
+    output = kwargs.get('output', os.path.join(folder, "merged.txt"))
+    by_turn = kwargs.get('by_turn', '0') in ('1', 'true', 'True')
+    top = int(kwargs.get('top', 15))
+
+    filepaths = sorted(glob.glob(os.path.join(folder, f"{session}*.collapsed")))
+    if not filepaths:
+        print(f"No se encontraron perfiles en {folder}.")
+        return
+
+    merged = merge_collapsed(filepaths, by_turn=by_turn)
+    with open(output, 'w') as f:
+        for stack, count in merged.most_common():
+            f.write(f"{stack} {count}\n")
+
+    # Summary: samples per leaf frame (self time)
+    total = sum(merged.values())
+    leaves = {}
+    for stack, count in merged.items():
+        leaf = stack.rsplit(';', 1)[-1]
+        leaves[leaf] = leaves.get(leaf, 0) + count
+    print(f"{len(filepaths)} perfiles, {total} muestras -> {output}")
+    for leaf, count in sorted(leaves.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{100*count/total:6.2f}%  {count:7d}  {leaf}")
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
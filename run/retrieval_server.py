@@ -0,0 +1,91 @@
+'''
+Servicio de recuperación compartido por todos los procesos de la app: carga una sola vez el índice
+vectorial, el cliente de embeddings (con su agrupador de consultas) y el catálogo, y los expone por
+HTTP en localhost. Cada método de `Retrieval` (ver `src/retrieval.py`) es un POST a `/<método>` con
+los argumentos en JSON; `GET /health` responde si el servicio está listo. El stock se lee siempre del
+CSV configurado en el servicio: los pedidos no pueden indicar otra ruta (`stock_path`).
+
+Para usarlo, configurar RETRIEVAL_URL (variable de entorno o secrets de la app), por ejemplo
+"http://127.0.0.1:8765".
+
+Uso desde la raíz del repositorio:
+    python -m run.retrieval_server [host=127.0.0.1] [port=8765] [swap_sqlite=false]
+'''
+
+import os, sys, json, logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.parameters import RETRIEVAL_PORT
+from src.retrieval import METHODS, build_retrieval
+
+logger_server = logging.getLogger(name="retrieval_server")
+
+def json_default(value):
+    # numpy scalars and arrays in search results
+    return value.tolist() if hasattr(value, "tolist") else str(value)
+
+def make_handler(retrieval) -> type:
+    """Clase de handler HTTP que atiende los métodos de `retrieval`."""
+
+    class RetrievalHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive: clients reuse their connections
+        disable_nagle_algorithm = True  # headers and body are written separately; don't wait for delayed ACKs
+
+        def reply(self, status: int, payload) -> None:
+            body = json.dumps(payload, ensure_ascii=False, default=json_default).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                self.reply(200, {"status": "ok"})
+            else:
+                self.reply(404, {"error": f"Ruta desconocida: {self.path}"})
+
+        def do_POST(self) -> None:
+            method = self.path.strip("/")
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if method not in METHODS:
+                self.reply(404, {"error": f"Método desconocido: {method}"})
+                return
+            try:
+                kwargs = json.loads(body) if body else {}
+                if not isinstance(kwargs, dict) or 'stock_path' in kwargs:
+                    # file paths never come from the wire; the service reads its own stock file
+                    raise ValueError("Argumentos inválidos")
+                self.reply(200, getattr(retrieval, method)(**kwargs))
+            except (TypeError, ValueError, KeyError) as e:
+                self.reply(400, {"error": f"{type(e).__name__}: {e}"})
+            except Exception as e:
+                logger_server.exception(f"Error en {method}.")
+                self.reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, format, *args) -> None:
+            logger_server.debug(format % args)
+
+    return RetrievalHandler
+
+def main(**kwargs) -> None:
+    host = kwargs.get('host', '127.0.0.1')
+    port = int(kwargs.get('port', RETRIEVAL_PORT))
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    retrieval = build_retrieval(os.getcwd(), swap_sqlite=kwargs.get('swap_sqlite', 'false') == 'true')
+    server = ThreadingHTTPServer((host, port), make_handler(retrieval))
+    server.daemon_threads = True
+    logger_server.info(f"Servicio de recuperación en http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
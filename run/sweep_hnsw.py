@@ -0,0 +1,116 @@
+'''
+Compara parámetros del índice HNSW de Chroma sobre nuestro corpus: para cada combinación construye
+una colección temporal y mide recall@k contra la búsqueda exacta, la latencia de consulta (p50 y
+p95, de a una consulta como en la app), el tiempo de construcción, el tamaño en disco y la memoria
+estimada del grafo. Las consultas son vectores del corpus que se dejan afuera del índice.
+
+Por defecto usa los embeddings de la colección de productos; `source=synthetic` genera vectores
+agrupados con la dimensión de los embeddings de OpenAI, sin necesidad de la base.
+
+Uso desde la raíz del repositorio:
+    python -m run.sweep_hnsw [source=chroma|synthetic] [n=2000] [dim=1536] [queries=200] [k=10]
+                             [space=l2] [M=8,16,32] [construction_ef=100,200] [search_ef=10,50,100]
+                             [target=0.95] [out=logs/hnsw_sweep.csv]
+'''
+
+import os, sys, csv, time, tempfile, itertools
+import numpy as np
+import chromadb
+from src.indexer import GET_PAGE_SIZE, hnsw_metadata
+from src.parameters import CHROMA_DB_PATH, COLLECTION_NAME
+from src.vectors import exact_search, folder_size, hnsw_memory_bytes, latency_summary, recall_at_k, synthetic_embeddings
+
+ADD_BATCH_SIZE = 5000   # below Chroma's max batch size
+
+def load_collection_embeddings(path: str, name: str) -> np.ndarray:
+    """Leer todos los embeddings de una colección de Chroma, paginando."""
+    collection = chromadb.PersistentClient(path=path).get_collection(name)
+    pages, offset = [], 0
+    while True:
+        page = collection.get(include=["embeddings"], limit=GET_PAGE_SIZE, offset=offset)
+        if len(page["ids"]):
+            pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+        if len(page["ids"]) < GET_PAGE_SIZE:
+            return np.vstack(pages)
+        offset += GET_PAGE_SIZE
+
+def measure(matrix: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, settings: dict) -> dict:
+    """Construir una colección temporal con `settings` y medir recall, latencia y tamaño."""
+    with tempfile.TemporaryDirectory() as folderpath:
+        client = chromadb.PersistentClient(path=folderpath)
+        collection = client.create_collection("sweep", metadata=hnsw_metadata(settings))
+        start = time.perf_counter()
+        for offset in range(0, len(matrix), ADD_BATCH_SIZE):
+            batch = matrix[offset:offset + ADD_BATCH_SIZE]
+            collection.add(ids=[str(i) for i in range(offset, offset + len(batch))], embeddings=batch.tolist())
+        build = time.perf_counter() - start
+
+        collection.query(query_embeddings=[queries[0].tolist()], n_results=k, include=[])    # warm-up
+        found, seconds = [], []
+        for query in queries:
+            start = time.perf_counter()
+            result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+            seconds.append(time.perf_counter() - start)
+            found.append([int(id) for id in result["ids"][0]])
+        disk = folder_size(folderpath)
+        if hasattr(client, "clear_system_cache"):
+            client.clear_system_cache()
+
+    return {**settings, 'recall': recall_at_k(found, truth), **latency_summary(seconds), 'build_s': build,
+            'disk_mb': disk / 2**20, 'memory_mb': hnsw_memory_bytes(len(matrix), matrix.shape[1], settings['M']) / 2**20}
+
+def main(**kwargs) -> None:
+    source = kwargs.get('source', 'chroma')
+    n_queries = int(kwargs.get('queries', 200))
+    k = int(kwargs.get('k', 10))
+    target = float(kwargs.get('target', 0.95))
+    grid = {'space': kwargs.get('space', 'l2').split(','),
+            'M': [int(value) for value in kwargs.get('M', '8,16,32').split(',')],
+            'construction_ef': [int(value) for value in kwargs.get('construction_ef', '100,200').split(',')],
+            'search_ef': [int(value) for value in kwargs.get('search_ef', '10,50,100').split(',')]}
+
+    if source == 'chroma':
+        vectors = load_collection_embeddings(CHROMA_DB_PATH, COLLECTION_NAME)
+    else:
+        vectors = synthetic_embeddings(int(kwargs.get('n', 2000)), int(kwargs.get('dim', 1536)))
+    # Held-out queries: they are not in the index, like real user questions
+    order = np.random.default_rng(1).permutation(len(vectors))
+    queries, matrix = vectors[order[:n_queries]], vectors[order[n_queries:]]
+    print(f"Corpus: {len(matrix)} vectores de dimensión {matrix.shape[1]}, {len(queries)} consultas, k={k}.")
+
+    results = []
+    for space in grid['space']:
+        truth, _ = exact_search(matrix, queries, k, space)
+        for M, construction_ef, search_ef in itertools.product(grid['M'], grid['construction_ef'], grid['search_ef']):
+            settings = {'space': space, 'M': M, 'construction_ef': construction_ef, 'search_ef': search_ef}
+            results.append(measure(matrix, queries, truth, k, settings))
+            print(f"[{len(results)}] {settings}: recall@{k} {results[-1]['recall']:.3f}, p95 {results[-1]['p95']:.2f} ms", flush=True)
+
+    print(f"\n{'space':7s} {'M':>3s} {'c_ef':>5s} {'s_ef':>5s} {'recall':>7s} {'p50 ms':>7s} {'p95 ms':>7s} "
+          f"{'build s':>8s} {'disco MB':>9s} {'mem MB':>7s}")
+    for r in results:
+        print(f"{r['space']:7s} {r['M']:3d} {r['construction_ef']:5d} {r['search_ef']:5d} {r['recall']:7.3f} "
+              f"{r['p50']:7.2f} {r['p95']:7.2f} {r['build_s']:8.2f} {r['disk_mb']:9.1f} {r['memory_mb']:7.1f}")
+
+    # Cheapest setting (lowest p95) that reaches the recall target
+    candidates = [r for r in results if r['recall'] >= target]
+    if candidates:
+        best = min(candidates, key=lambda r: (r['p95'], r['memory_mb']))
+        print(f"\nRecomendado (recall@{k} >= {target}, menor p95): space={best['space']} M={best['M']} "
+              f"construction_ef={best['construction_ef']} search_ef={best['search_ef']}")
+    else:
+        print(f"\nNinguna combinación alcanza recall@{k} >= {target}.")
+
+    if 'out' in kwargs:
+        os.makedirs(os.path.dirname(kwargs['out']) or '.', exist_ok=True)
+        with open(kwargs['out'], 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+if __name__ == "__main__":
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        key, value = arg.split('=', 1)
+        kwargs[key] = value
+    main(**kwargs)
@@ -0,0 +1,70 @@
+SEPARATOR = object()    # transition key that never matches a character of a query
+
+class SuffixAutomaton(object):
+    """
+    Autómata de sufijos generalizado y en línea sobre un conjunto creciente de cadenas de texto.
+    Responde si una cadena es subcadena de alguna de las cadenas agregadas en O(len(cadena)),
+    y agregar una cadena cuesta O(len(cadena)) amortizado.
+
+    Examples:
+        >>> automaton = SuffixAutomaton()
+        >>> automaton.add('crema hidratante')
+        >>> 'hidrata' in automaton, 'gel' in automaton
+        (True, False)
+    """
+
+    def __init__(self) -> None:
+        self.next = [{}]        # transitions per state
+        self.link = [-1]        # suffix links
+        self.length = [0]       # longest string length per state
+        self.last = 0
+        self.n_strings = 0
+
+    def _extend(self, char) -> None:
+        current = len(self.length)
+        self.next.append({})
+        self.length.append(self.length[self.last] + 1)
+        self.link.append(0)
+        p = self.last
+        while p != -1 and char not in self.next[p]:
+            self.next[p][char] = current
+            p = self.link[p]
+        if p != -1:
+            q = self.next[p][char]
+            if self.length[p] + 1 == self.length[q]:
+                self.link[current] = q
+            else:
+                clone = len(self.length)
+                self.next.append(dict(self.next[q]))
+                self.length.append(self.length[p] + 1)
+                self.link.append(self.link[q])
+                while p != -1 and self.next[p].get(char) == q:
+                    self.next[p][char] = clone
+                    p = self.link[p]
+                self.link[q] = clone
+                self.link[current] = clone
+        self.last = current
+
+    def add(self, string: str) -> None:
+        """
+        Agregar una cadena de texto al autómata.
+
+        Args:
+            string (str): Cadena de texto a agregar.
+        """
+        if self.n_strings:
+            self._extend(SEPARATOR)     # substrings never cross two added strings
+        for char in string:
+            self._extend(char)
+        self.n_strings += 1
+
+    def __contains__(self, string: str) -> bool:
+        # Same semantics as any(string in s for s in added): '' is only contained if something was added
+        if not self.n_strings:
+            return False
+        state = 0
+        for char in string:
+            state = self.next[state].get(char)
+            if state is None:
+                return False
+        return True
@@ -0,0 +1,262 @@
+'''
+Especificación declarativa de cada marca del catálogo. Cada entrada describe:
+
+- `brand`: nombre de la marca (reemplaza `{brand}` en las plantillas).
+- `table`: libro de Excel dentro de `database/tables/`.
+- `sheets`: una disposición por hoja: nombres de columnas, columnas a descartar y filas a saltear.
+- `derived`: campos intermedios, calculados en orden. Cada uno es una plantilla (`segments`)
+  o una operación por fila: `keywords` (make_keywords), `join` (simple_join) o `labelled`
+  (todas las columnas restantes como "Columna: valor. ", salvo las excluidas).
+- `documents`: campos del documento final (`Producto`, `Código`, `Descripción`) por disposición.
+- `finalize`: `reduce_dots` o `str` (normalización final de los campos).
+- `drop_empty`: descartar las filas sin producto ni código.
+
+Un segmento es `(plantilla, fuentes, cuándo)`: la plantilla lleva un `{}` por fuente, y
+`cuándo` es `any` (por defecto: alguna fuente no vacía), `all` (todas) o `always`.
+Los `post` son operaciones sobre el campo: `reduce_dots`, `newline_dots`, `squash` y `end_dot`.
+
+Agregar una marca consiste en agregar una entrada a `BRANDS`.
+'''
+
+BRANDS = {
+    'cepage': {
+        'brand': 'Cepage',
+        'table': 'cepage.xlsx',
+        'sheets': [{'columns': ["categoria", "nombre de linea", "tipo de linea", "necesidades", "sku",
+                                "ean", "producto", "descripcion", "indicacion", "uso", "inci", "activos",
+                                "beneficios", "generales", "presentacion", "ancho", "profundidad", "alto", "peso"]}],
+        'derived': {
+            'summary': {'segments': [("Descripción: {}. Indicaciones: {}. Uso: {}. Beneficios: {}.",
+                                      ['descripcion', 'indicacion', 'uso', 'beneficios'], 'always')],
+                        'post': ['reduce_dots']},
+            'kws': {'keywords': ['categoria', 'nombre de linea', 'tipo de linea', 'necesidades', 'generales']},
+            'dims': {'segments': [("Dimensiones {}mm x {}mm x {}mm.", ['ancho', 'profundidad', 'alto'])]},
+        },
+        'documents': {
+            'default': {
+                'Producto': {'segments': [("Producto {}. Marca {brand}.", 'producto', 'always')]},
+                'Código': {'segments': [("Código EAN {}. Código SKU {}.", ['ean', 'sku'], 'always')]},
+                'Descripción': {'segments': [("{}. ", 'summary'), ("Keywords: {}. ", 'kws', 'always'),
+                                             ("Presentación {}. ", 'presentacion'), ("{}. ", 'dims'),
+                                             ("Peso {}gr.", 'peso')],
+                                'post': ['reduce_dots']},
+            },
+        },
+        'finalize': 'reduce_dots',
+    },
+    'cetaphil': {
+        'brand': 'Cetaphil',
+        'table': 'cetaphil.xlsx',
+        'sheets': [{'columns': ["producto", "marca", "nombre", "presentacion", "ean",
+                                "categoria", "subcategoria", "zona", "descripcion", "keywords"],
+                    'drop': ["producto", "marca"]}],
+        'derived': {
+            'kws': {'keywords': ['categoria', 'subcategoria', 'zona', 'keywords']},
+        },
+        'documents': {
+            'default': {
+                'Producto': {'segments': [("Producto {}. Marca {brand}.", 'nombre', 'always')]},
+                'Código': {'segments': [("Código EAN {}.", 'ean', 'always')]},
+                'Descripción': {'segments': [("Descripción: {}. ", 'descripcion'), ("Keywords: {}. ", 'kws'),
+                                             ("Presentación {}. ", 'presentacion')],
+                                'post': ['reduce_dots']},
+            },
+        },
+        'finalize': 'reduce_dots',
+    },
+    'eucerin': {
+        'brand': 'Eucerin',
+        'table': 'eucerin.xlsx',
+        'sheets': [{'columns': ["fecha", "estado", "ean", "producto", "linea", "categoria",
+                                "segmento", "contenido", "zona", "nombre", "nombre corto",
+                                "descripcion", "descripcion corta", "beneficios 1", "beneficios 2",
+                                "beneficios 3", "beneficios 4", "beneficios 5", "piel", "propiedades",
+                                "ingredientes", "uso", "keywords"],
+                    'drop': ["fecha", "estado"]}],
+        'derived': {
+            'kws': {'keywords': ['linea', 'categoria', 'segmento', 'zona', 'piel', 'keywords']},
+            'benefits': {'join': [f"beneficios {i}" for i in range(1, 6)]},
+            'use': {'segments': [("{}", 'uso', 'always')], 'post': ['newline_dots', 'reduce_dots']},
+        },
+        'documents': {
+            'default': {
+                'Producto': {'segments': [("Producto {}. Marca {brand}.", 'producto', 'always')]},
+                'Código': {'segments': [("Código EAN {}.", 'ean', 'always')]},
+                'Descripción': {'segments': [("Descripción: {}. ", 'descripcion'), ("Contenido: {}. ", 'contenido'),
+                                             ("Propiedades: {}. ", 'propiedades'), ("Beneficios: {}. ", 'benefits'),
+                                             ("Modo de uso: {}. ", 'use'), ("Keywords: {}. ", 'kws')],
+                                'post': ['reduce_dots']},
+            },
+            'simple': {
+                'Producto': {'segments': [("Producto {}. Marca {brand}.", 'producto', 'always')]},
+                'Descripción': {'segments': [("Descripción: {}. ", 'descripcion'), ("Presentación {}. ", 'contenido'),
+                                             ("Propiedades: {}. ", 'propiedades'), ("Beneficios: {}. ", 'benefits'),
+                                             ("Modo de uso: {}. ", 'use')],
+                                'post': ['reduce_dots']},
+            },
+        },
+        'finalize': 'reduce_dots',
+    },
+    'eximia': {
+        'brand': 'Eximia',
+        'table': 'eximia.xlsx',
+        'sheets': [{'columns': ["ean", "nombre", "necesidad", "linea", "piel", "titulo",
+                                "bajada", "descripcion", "uso", "activos", "beneficios",
+                                "comentarios", "inci", "keywords", "presentacion", "contenido",
+                                "unidades", "ancho", "profundidad", "alto", "peso"],
+                    'skip_rows': 1}],
+        'derived': {
+            'kws': {'keywords': ['necesidad', 'linea', 'piel', 'keywords']},
+            'presentation': {'segments': [("{} {} {}", ['presentacion', 'contenido', 'unidades'], 'always')],
+                             'post': ['squash', 'end_dot']},
+            'content': {'join': ['titulo', 'bajada', 'descripcion', 'uso', 'activos', 'beneficios', 'comentarios', 'inci']},
+        },
+        'documents': {
+            'default': {
+                'Producto': {'segments': [("Producto {}. Marca {brand}.", 'nombre', 'always')], 'post': ['reduce_dots']},
+                'Código': {'segments': [("Código EAN {}.", 'ean', 'always')], 'post': ['reduce_dots']},
+                'Descripción': {'segments': [("Descripción: {}. ", 'content'), ("Keywords: {}. ", 'kws'),
+                                             ("Presentación: {}. ", 'presentation'),
+                                             ("Dimensiones {}mm x {}mm x {}mm. ", ['ancho', 'profundidad', 'alto'], 'all'),
+                                             ("Peso {}gr.", 'peso')],
+                                'post': ['reduce_dots']},
+            },
+        },
+        'finalize': 'str',
+    },
+    'isdin': {
+        'brand': 'Isdin',
+        'table': 'isdin.xlsx',
+        'sheets': [{'columns': ["id", "codigo", "sku", "ean", "nombre", "variante",
+                                "marca", "generales", "id_ml", "descripcion"],
+                    'drop': ["id_ml"],
+                    'skip_rows': 1}],
+        'documents': {
+            'default': {
+                'Producto': {'segments': [("Producto {}. ", 'nombre'), ("Marca {brand}.", [], 'always')],
+                             'post': ['reduce_dots']},
+                'Código': {'segments': [("Id {}. ", 'id'), ("Código {}. ", 'codigo'), ("Código SKU {}. ", 'sku'),
+                                        ("Código EAN {}.", 'ean')],
+                           'post': ['reduce_dots']},
+                'Descripción': {'segments': [("Descripción: {}. ", 'descripcion'), ("{}. ", 'generales'), ("{}.", 'variante')],
+                                'post': ['reduce_dots']},
+            },
+        },
+        'finalize': 'str',
+    },
+    'loreal': {
+        'brand': 'Loreal',
+        'table': 'loreal.xlsx',
+        'sheets': [{'columns': ["categoria", "marca", "franquicia", "subfranquicia", "ean", "titulo",
+                                "tipo", "descripcion", "beneficios", "aplicacion", "piel", "uso", "zona", "efecto",
+                                "hipoalergenico", "crosselling", "keywords", "tamaño", "unidades", "link", "0", "1"],
+                    'drop': ["crosselling", "link", "0", "1"]},
+                   {'columns': ["categoria", "marca", "franquicia", "subfranquicia", "ean", "titulo",
+                                "tipo", "descripcion", "beneficios", "aplicacion", "crosselling", "keywords",
+                                "hipoalergenico", "pelo", "uso", "tamaño", "unidades", "link", "0"],
+                    'drop': ["crosselling", "link", "0"]},
+                   {'columns': ["categoria", "marca", "franquicia", "subfranquicia", "ean", "titulo", "color",
+                                "numero", "nombre", "tipo de producto", "descripcion", "presentacion", "beneficios",
+                                "aplicacion", "crosselling", "keywords", "hipoalergenico", "tamaño", "unidades", "link"],
+                    'drop': ["color", "numero", "nombre", "crosselling", "link"]},
+                   {'columns': ["categoria", "ean", "marca", "franquicia", "subfranquicia", "titulo", "tipo de producto",
+                                "resumen", "descripcion", "adicionales", "presentacion", "beneficio 1", "beneficio 2",
+                                "beneficio 3", "aplicacion", "crosselling", "keywords", "hipoalergenico", "piel", "uso",
+                                "zona", "efecto", "codigo hexa", "tamaño", "unidades"],
+                    'drop': ["efecto", "codigo hexa"]},
+                   {'columns': ["categoria", "marca", "ean", "franquicia", "subfranquicia", "zona", "titulo",
+                                "color", "numero", "nombre", "tipo de producto", "descripcion", "beneficios",
+                                "aplicacion", "piel", "uso", "efecto", "hipoalergenico", "crosselling", "keywords",
+                                "tamaño", "unidades", "link"],
+                    'drop': ["color", "numero", "nombre", "crosselling", "link"]}],
+        'derived': {
+            'kws': {'keywords': ['keywords'], 'post': ['reduce_dots']},
+            'presentation': {'segments': [("Presentación {}{}.", ['tamaño', 'unidades'], 'all')], 'post': ['reduce_dots']},
+            'features': {'labelled': ["marca", "titulo", "ean", "tamaño", "unidades", "keywords"]},
+        },
+        'documents': {
+            'default': {
+                'Producto': {'segments': [("Marca {}. ", 'marca'), ("Título: {}.", 'titulo')], 'post': ['reduce_dots']},
+                'Código': {'segments': [("Código EAN {}.", 'ean')], 'post': ['reduce_dots']},
+                'Descripción': {'segments': [("{}", 'features', 'always'), ("{} ", 'presentation'), ("Keywords: {}", 'kws')],
+                                'post': ['reduce_dots']},
+            },
+        },
+        'finalize': 'str',
+        'drop_empty': True,
+    },
+    'revlon': {
+        'brand': 'Revlon',
+        'table': 'revlon.xlsx',
+        'sheets': [{'columns': ["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt",
+                                "caracteristicas", "codigo sap", "ean", "merch code", "tono", "stock"],
+                    'drop': ["stock"]},
+                   {'columns': ["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt",
+                                "caracteristicas", "codigo sap", "ean", "merch code", "tono", "stock"],
+                    'drop': ["stock"]},
+                   {'columns': ["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt",
+                                "caracteristicas", "codigo sap", "ean", "merch code", "stock"],
+                    'drop': ["stock"]},
+                   {'columns': ["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt",
+                                "caracteristicas", "codigo sap", "ean", "merch code", "tono", "stock"],
+                    'drop': ["stock"]},
+                   {'columns': ["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt",
+                                "caracteristicas", "codigo sap", "ean", "stock"],
+                    'drop': ["stock"]}],
+        'derived': {
+            'features': {'labelled': ["product", "producto", "codigo sap", "ean", "merch code"]},
+        },
+        'documents': {
+            'default': {
+                'Producto': {'segments': [("Marca {brand}. ", [], 'always'), ("Product {}. ", 'product'), ("Producto {}.", 'producto')],
+                             'post': ['reduce_dots']},
+                'Código': {'segments': [("Código SAP {}. ", 'codigo sap'), ("Código EAN {}. ", 'ean'), ("Merch code {}.", 'merch code')],
+                           'post': ['reduce_dots']},
+                'Descripción': {'segments': [("{}", 'features', 'always')], 'post': ['reduce_dots']},
+            },
+        },
+        'finalize': 'str',
+        'drop_empty': True,
+    },
+    'vichy': {
+        'brand': 'Vichy',
+        'table': 'vichy.xlsx',
+        'sheets': [{'columns': ["codigo", "sku", "ean", "producto", "uso", "marca", "ml_code", "descripcion"],
+                    'drop': ["ml_code"]}],
+        'derived': {
+            'features': {'labelled': ["producto", "marca", "codigo", "sku", "ean"]},
+        },
+        'documents': {
+            'default': {
+                'Producto': {'segments': [("Product {}. ", 'producto'), ("Marca {}.", 'marca')], 'post': ['reduce_dots']},
+                # The EAN label takes the SKU value, as the published catalog always did
+                'Código': {'segments': [("Código {}. ", 'codigo'), ("Código SKU {}. ", 'sku'), ("Código EAN {}. ", 'sku')],
+                           'post': ['reduce_dots']},
+                'Descripción': {'segments': [("{}", 'features', 'always')], 'post': ['reduce_dots']},
+            },
+        },
+        'finalize': 'str',
+        'drop_empty': True,
+    },
+    'lrp': {
+        'brand': 'La Roche-Posay',
+        'table': 'lrp.xlsx',
+        'sheets': [{'columns': ["ean", "producto", "descripcion", "tamaño", "unidades", "composicion",
+                                "beneficio 1", "beneficio 2", "beneficio 3", "uso", "keywords"]}],
+        'derived': {
+            'kws': {'keywords': ['keywords'], 'post': ['reduce_dots']},
+            'presentation': {'segments': [("Presentación {}{}.", ['tamaño', 'unidades'], 'all')], 'post': ['reduce_dots']},
+            'features': {'labelled': ["producto", "ean", "tamaño", "unidades", "keywords"]},
+        },
+        'documents': {
+            'default': {
+                'Producto': {'segments': [("Producto {}. ", 'producto'), ("Marca {brand}.", [], 'always')],
+                             'post': ['reduce_dots']},
+                'Código': {'segments': [("Código EAN {}.", 'ean')], 'post': ['reduce_dots']},
+                'Descripción': {'segments': [("{}", 'features', 'always'), ("{} ", 'presentation'), ("Keywords: {}", 'kws')],
+                                'post': ['reduce_dots']},
+            },
+        },
+        'finalize': 'str',
+    },
+}
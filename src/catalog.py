@@ -0,0 +1,276 @@
+import os, re, csv, time, sqlite3, logging, threading
+from src.brands import BRANDS
+from src.chunker import HEADER_MAX_TOKENS, split_fields, truncate
+from src.stock import normalize_ean
+
+logger_catalog = logging.getLogger(name=__name__)
+
+CATALOG_VERSION = 2     # bump whenever the schema changes
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE brands (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE products (
+    id INTEGER PRIMARY KEY,
+    ean TEXT NOT NULL,              -- normalized EAN (digits without leading zeros), '' if missing
+    brand_id INTEGER NOT NULL REFERENCES brands(id),
+    name TEXT NOT NULL,             -- product header: name and brand
+    document TEXT NOT NULL,         -- full catalog document
+    link TEXT NOT NULL
+);
+CREATE TABLE attributes (
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,            -- lowercase field label ('beneficios', 'modo de uso', ...)
+    value TEXT NOT NULL
+);
+CREATE TABLE stock (
+    codigo TEXT NOT NULL,           -- sede
+    ean TEXT NOT NULL,              -- normalized EAN
+    stock INTEGER NOT NULL,
+    precio REAL,
+    promo TEXT,
+    descripcion TEXT
+);
+CREATE TABLE facets (
+    facet TEXT NOT NULL,            -- 'brand', 'category' or 'stock' (every product in the stock snapshot)
+    value TEXT NOT NULL,            -- brand name, category, or '' for 'stock'
+    sede TEXT NOT NULL,             -- stock 'codigo', or '' for all sedes
+    products INTEGER NOT NULL,      -- catalog products ('stock': products in the snapshot)
+    in_stock INTEGER NOT NULL,      -- of them, with stock > 0
+    in_promo INTEGER NOT NULL,      -- of them, with stock > 0 and a promotion
+    PRIMARY KEY (facet, sede, value)
+);
+CREATE INDEX products_ean ON products(ean);
+CREATE INDEX products_brand ON products(brand_id);
+CREATE INDEX attributes_product ON attributes(product_id);
+CREATE INDEX attributes_label ON attributes(label);
+CREATE INDEX stock_ean ON stock(ean);
+CREATE VIRTUAL TABLE products_fts USING fts5(
+    name, document, content='products', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+re_terms = re.compile(r'\w+')
+
+# Facet counts: catalog products per brand and category, joined by EAN with the stock of each sede ('' = any sede)
+FACETS_SQL = """
+WITH sedes AS (SELECT '' AS sede UNION SELECT DISTINCT codigo FROM stock),
+available AS (
+    SELECT sedes.sede, s.ean, MAX(s.stock > 0) AS in_stock,
+           MAX(s.stock > 0 AND lower(coalesce(s.promo, '')) NOT IN ('', 'no promo')) AS in_promo
+    FROM sedes JOIN stock s ON sedes.sede IN ('', s.codigo) GROUP BY sedes.sede, s.ean
+),
+labelled AS (
+    SELECT 'brand' AS facet, b.name AS value, p.id, p.ean FROM products p JOIN brands b ON b.id = p.brand_id
+    UNION ALL
+    SELECT 'category', category(a.value), p.id, p.ean
+    FROM products p JOIN attributes a ON a.product_id = p.id WHERE a.label IN ('categoria', 'categoría')
+)
+INSERT INTO facets (facet, value, sede, products, in_stock, in_promo)
+SELECT l.facet, l.value, sedes.sede, COUNT(DISTINCT l.id),
+       COUNT(DISTINCT CASE WHEN a.in_stock THEN l.id END), COUNT(DISTINCT CASE WHEN a.in_promo THEN l.id END)
+FROM labelled l CROSS JOIN sedes LEFT JOIN available a ON a.sede = sedes.sede AND a.ean = l.ean AND l.ean != ''
+WHERE l.value != '' GROUP BY l.facet, l.value, sedes.sede
+UNION ALL
+SELECT 'stock', '', sede, COUNT(*), SUM(in_stock), SUM(in_promo) FROM available GROUP BY sede
+"""
+
+# Read-only connection cache, one per thread: (path, inode) and connection, reopened when a rebuild
+# replaces the file. A thread only ever closes its own connection, never one another thread may be using.
+_local = threading.local()
+
+def category(value: str) -> str:
+    """Categoría normalizada para agrupar: sin el punto final y con mayúscula inicial ("MAKE UP." -> "Make up")."""
+    return (value or '').strip(' .').capitalize()
+
+def refresh_facets(connection) -> None:
+    """
+    Recalcular la tabla de facetas (productos, con stock y en promoción por marca, categoría y sede).
+    Se llama al construir el catálogo y al publicar el stock, dentro de la transacción en curso.
+
+    Args:
+        connection (sqlite3.Connection): Conexión de escritura a la base del catálogo.
+    """
+    connection.create_function('category', 1, category, deterministic=True)
+    connection.execute("DELETE FROM facets")
+    connection.execute(FACETS_SQL)
+
+def build_catalog(catalog_folderpath: str, db_path: str) -> int:
+    """
+    Construir la base del catálogo a partir de los CSV de cada marca (`{marca}.csv` con columnas
+    EAN, Producto, Link). Se escribe en un archivo temporal que reemplaza al anterior de forma
+    atómica; el stock publicado en la base anterior se conserva.
+
+    Args:
+        catalog_folderpath (str): Carpeta de los CSV del catálogo.
+        db_path (str): Ruta de la base del catálogo.
+
+    Returns:
+        int: Cantidad de productos.
+    """
+    temporary = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    connection = sqlite3.connect(temporary)
+    try:
+        connection.executescript(SCHEMA)
+        n_products = 0
+        for brand_id, (key, spec) in enumerate(BRANDS.items(), start=1):
+            connection.execute("INSERT INTO brands (id, key, name) VALUES (?, ?, ?)", (brand_id, key, spec['brand']))
+            filepath = os.path.join(catalog_folderpath, os.path.splitext(spec['table'])[0] + '.csv')
+            if not os.path.exists(filepath):
+                logger_catalog.warning(f"No se encontró el catálogo {filepath}.")
+                continue
+            with open(filepath, 'r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    document = row['Producto'] or ''
+                    header, fields = split_fields(document)
+                    cursor = connection.execute(
+                        "INSERT INTO products (ean, brand_id, name, document, link) VALUES (?, ?, ?, ?, ?)",
+                        (normalize_ean(row['EAN'] or ''), brand_id, truncate(header, HEADER_MAX_TOKENS),
+                         document, row.get('Link') or ''))
+                    connection.executemany(
+                        "INSERT INTO attributes (product_id, position, label, value) VALUES (?, ?, ?, ?)",
+                        [(cursor.lastrowid, i, label.lower(), body[len(label):].lstrip(' :'))
+                         for i, (label, body) in enumerate(fields)])
+                    n_products += 1
+        connection.execute("INSERT INTO products_fts (rowid, name, document) SELECT id, name, document FROM products")
+
+        # Keep the last published stock snapshot
+        if os.path.exists(db_path):
+            connection.execute("ATTACH DATABASE ? AS previous", (db_path,))
+            if connection.execute("SELECT 1 FROM previous.sqlite_master WHERE name = 'stock'").fetchone():
+                connection.execute("INSERT INTO stock SELECT codigo, ean, stock, precio, promo, descripcion FROM previous.stock")
+            connection.commit()
+            connection.execute("DETACH DATABASE previous")
+
+        refresh_facets(connection)
+        connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                               [('version', str(CATALOG_VERSION)), ('built_at', str(time.time())),
+                                ('products', str(n_products))])
+        connection.commit()
+        connection.execute("VACUUM")
+    except Exception:
+        connection.close()
+        os.remove(temporary)
+        raise
+    connection.close()
+    os.replace(temporary, db_path)
+    logger_catalog.info(f"Catálogo construido en {db_path}: {n_products} productos.")
+    return n_products
+
+def publish_stock(db_path: str, stock) -> None:
+    """
+    Reemplazar el stock de la base del catálogo por una nueva foto y recalcular las facetas, en una
+    sola transacción.
+
+    Args:
+        db_path (str): Ruta de la base del catálogo.
+        stock (pd.DataFrame): Stock con columnas codigo, ean, stock, precio, promo y descripcion.
+    """
+    rows = [(str(record['codigo']), normalize_ean(record['ean']), int(round(float(record['stock']))),
+             float(record['precio']), record['promo'], record['descripcion'])
+            for record in stock.to_dict('records')]
+    connection = sqlite3.connect(db_path)
+    try:
+        with connection:
+            connection.execute("DELETE FROM stock")
+            connection.executemany("INSERT INTO stock (codigo, ean, stock, precio, promo, descripcion) "
+                                   "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            refresh_facets(connection)
+    finally:
+        connection.close()
+
+def open_catalog(db_path: str):
+    """
+    Conexión de solo lectura a la base del catálogo, una por hilo, reutilizada mientras el archivo no se reemplace.
+
+    Args:
+        db_path (str): Ruta de la base del catálogo.
+
+    Returns:
+        sqlite3.Connection: La conexión, o None si la base no existe.
+    """
+    try:
+        status = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    key = (db_path, status.st_ino)
+    if getattr(_local, 'key', None) != key:
+        if getattr(_local, 'connection', None) is not None:
+            _local.connection.close()
+        _local.connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        _local.key = key
+    return _local.connection
+
+def lookup_stock(connection, eans: list) -> list:
+    """
+    Stock, precio y promoción de una lista de EAN (consulta por índice).
+
+    Args:
+        connection (sqlite3.Connection): Conexión a la base del catálogo.
+        eans (list): EAN a buscar.
+
+    Returns:
+        list: Filas `(ean, stock, precio, promo)` en el orden de la foto de stock.
+    """
+    eans = sorted({normalize_ean(ean) for ean in eans if ean})
+    if not eans:
+        return []
+    placeholders = ', '.join('?' * len(eans))
+    return connection.execute(f"SELECT ean, stock, precio, promo FROM stock WHERE ean IN ({placeholders}) "
+                              f"ORDER BY rowid", eans).fetchall()
+
+def search_text(connection, query: str, k: int=10, brand: str=None) -> list:
+    """
+    Búsqueda léxica (FTS5, ranking bm25) sobre el nombre y el documento de los productos.
+
+    Args:
+        connection (sqlite3.Connection): Conexión a la base del catálogo.
+        query (str): Texto a buscar; cualquiera de sus palabras puede coincidir.
+        k (int, optional): Cantidad máxima de productos. Por defecto es 10.
+        brand (str, optional): Marca a filtrar (sin distinguir mayúsculas). Por defecto, todas.
+
+    Returns:
+        list: Filas `(ean, marca, nombre, documento)`, de mejor a peor.
+    """
+    terms = re_terms.findall(query.lower())
+    if not terms:
+        return []
+    match = ' OR '.join(f'"{term}"' for term in terms)
+    sql = ("SELECT p.ean, b.name, p.name, p.document FROM products_fts f "
+           "JOIN products p ON p.id = f.rowid JOIN brands b ON b.id = p.brand_id WHERE products_fts MATCH ?")
+    params = [match]
+    if brand:
+        sql += " AND lower(b.name) = ?"
+        params.append(brand.strip().lower())
+    sql += " ORDER BY bm25(products_fts) LIMIT ?"
+    return connection.execute(sql, params + [k]).fetchall()
+
+def facet_counts(connection, facet: str, sede: str='') -> list:
+    """
+    Conteos precalculados de una faceta.
+
+    Args:
+        connection (sqlite3.Connection): Conexión a la base del catálogo.
+        facet (str): 'brand', 'category' o 'stock'.
+        sede (str, optional): Código de sede. Por defecto, todas las sedes.
+
+    Returns:
+        list: Filas `(valor, productos, con stock, en promoción)`, ordenadas por valor.
+    """
+    return connection.execute("SELECT value, products, in_stock, in_promo FROM facets WHERE facet = ? AND sede = ? "
+                              "ORDER BY value", (facet, sede)).fetchall()
+
+def facet_count(connection, facet: str, value: str='', sede: str=''):
+    """
+    Conteos precalculados de un valor de una faceta (sin distinguir mayúsculas).
+
+    Returns:
+        tuple: `(valor, productos, con stock, en promoción)`, o None si el valor no existe.
+    """
+    return connection.execute("SELECT value, products, in_stock, in_promo FROM facets WHERE facet = ? AND sede = ? "
+                              "AND lower(value) = ?", (facet, sede, value.strip().lower())).fetchone()
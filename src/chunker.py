@@ -0,0 +1,159 @@
+import re
+from src.tokens import count_tokens
+
+CHUNK_MAX_TOKENS  = 256     # tokens per chunk, header included
+HEADER_MAX_TOKENS = 64      # tokens kept from the product header (name, brand) prefixed to every chunk
+
+# Field labels found in the catalogs (regex fragments, matched case-insensitively and followed by ':')
+FIELD_LABELS = [
+    r'descripci[oó]n mkt', r'descripci[oó]n', r'indicaciones', r'propiedades', r'contenido', r'presentaci[oó]n',
+    r'beneficios?(?: \d+)?', r'sus beneficios(?: son)?', r'caracter[ií]sticas', r'efecto',
+    r'modo de (?:uso|aplicaci[oó]n)', r'consejos? de (?:uso|aplicaci[oó]n)', r'aplicaci[oó]n', r'uso',
+    r'zona(?: de aplic?aci[oó]n)?', r'tipo de piel', r'piel', r'hipoalerg[eé]nico',
+    r'composici[oó]n', r'ingr?edientes', r'ingeredientes', r'(?:principales|componentes) (?:componentes|estrella)',
+    r'categor[ií]a', r'subcategor[ií]a', r'franquicia', r'subfranquicia', r'familia', r'tipo(?: de producto)?', r'tono',
+    r'keywords', r't[ií]tulo',
+]
+HEADER_LABELS = re.compile(r't[ií]tulo', re.IGNORECASE)     # fields that name the product: kept in the header
+re_labels = re.compile(r'(?<![\w])(' + '|'.join(FIELD_LABELS) + r')\s*:', re.IGNORECASE)
+re_sentences = re.compile(r'(?<=[.!?;])\s+')
+
+def split_fields(text: str) -> tuple:
+    """
+    Separar un documento en su cabecera (texto antes del primer campo, más los campos que nombran
+    al producto) y sus campos etiquetados ("Descripción: ...", "Beneficios: ...", ...).
+
+    Args:
+        text (str): Documento de un producto.
+
+    Returns:
+        tuple: Cabecera (str) y lista de campos `(etiqueta, texto del campo con su etiqueta)`.
+    """
+    matches = list(re_labels.finditer(text))
+    header = text[:matches[0].start()].strip() if matches else text.strip()
+    fields = []
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following is not None else len(text)
+        body = text[match.start():end].strip()
+        if HEADER_LABELS.fullmatch(match.group(1)):
+            header = f"{header} {body}".strip()
+        elif body:
+            fields.append((match.group(1), body))
+    return header, fields
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Recortar un texto por palabras hasta `max_tokens` tokens."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    words, kept, tokens = text.split(), [], 0
+    for word in words:
+        tokens += count_tokens(word + ' ')
+        if tokens > max_tokens:
+            break
+        kept.append(word)
+    return ' '.join(kept)
+
+def split_long(text: str, max_tokens: int) -> list:
+    """
+    Partir un campo largo en piezas de hasta `max_tokens` tokens, por oraciones y, si hace falta, por
+    palabras. Las piezas unidas con espacios reproducen el campo con los espacios normalizados.
+    """
+    pieces, current = [], ''
+    for sentence in re_sentences.split(text):
+        # Pieces are built from words joined by single spaces, so the cut after `head` is by words, not characters
+        words = sentence.split()
+        sentence = ' '.join(words)
+        while count_tokens(sentence) > max_tokens:
+            head = truncate(sentence, max_tokens) or words[0]   # a single word longer than the budget
+            pieces.extend([current, head] if current else [head])
+            words = words[len(head.split()):]
+            current, sentence = '', ' '.join(words)
+        candidate = f"{current} {sentence}".strip()
+        if current and count_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            candidate = sentence
+        current = candidate
+    if current:
+        pieces.append(current)
+    return [piece for piece in pieces if piece]
+
+def chunk_document(id: str, text: str, metadata: dict, max_tokens: int=CHUNK_MAX_TOKENS) -> list:
+    """
+    Partir el documento de un producto en fragmentos acotados en tokens, respetando sus campos:
+    los campos cortos consecutivos se agrupan y los largos se parten por oraciones. Cada fragmento
+    empieza con la cabecera del producto (nombre, marca y EAN) y guarda en sus metadatos el
+    documento del que sale (`parent`), así los resultados se pueden volver a agrupar por producto.
+    Los documentos que entran en `max_tokens` quedan como un único fragmento sin cambios.
+
+    Args:
+        id (str): Identificador del documento.
+        text (str): Documento del producto.
+        metadata (dict): Metadatos del documento (con 'EAN').
+        max_tokens (int, optional): Máximo de tokens por fragmento. Por defecto es CHUNK_MAX_TOKENS.
+
+    Returns:
+        list: Fragmentos `(id, texto, metadatos)`; el primero usa el id del documento y los siguientes `id#n`.
+    """
+    header, fields = split_fields(text)
+    if count_tokens(text) <= max_tokens or not fields:
+        return [(id, text, {**metadata, 'parent': id, 'chunk': 0, 'header': ''})]
+
+    header = truncate(header, HEADER_MAX_TOKENS)
+    if metadata.get('EAN'):
+        header = f"{header} EAN: {metadata['EAN']}."
+    budget = max(max_tokens - count_tokens(header) - 1, 1)
+
+    # Pack whole fields while they fit; split the ones that do not fit on their own
+    bodies, current = [], ''
+    for _, body in fields:
+        pieces = [body] if count_tokens(body) <= budget else split_long(body, budget)
+        for piece in pieces:
+            candidate = f"{current} {piece}".strip()
+            if current and count_tokens(candidate) > budget:
+                bodies.append(current)
+                candidate = piece
+            current = candidate
+    if current:
+        bodies.append(current)
+
+    return [(id if i == 0 else f"{id}#{i}", f"{header} {body}",
+             {**metadata, 'parent': id, 'chunk': i, 'header': header}) for i, body in enumerate(bodies)]
+
+def chunk_documents(records, max_tokens: int=CHUNK_MAX_TOKENS):
+    """
+    Partir en fragmentos un flujo de documentos `(id, texto, metadatos)`.
+
+    Yields:
+        tuple: Fragmentos `(id, texto, metadatos)`.
+    """
+    for id, text, metadata in records:
+        yield from chunk_document(id, text, metadata, max_tokens)
+
+def collapse_chunks(hits: list) -> list:
+    """
+    Agrupar por producto los fragmentos recuperados de la base vectorial. El orden de los productos
+    es el de su mejor fragmento, y el texto de cada producto es su cabecera seguida de sus fragmentos
+    recuperados, en el orden del documento original.
+
+    Args:
+        hits (list): Resultados `(documento, puntaje)` de `similarity_search_with_score`, de mejor a peor.
+
+    Returns:
+        list: Productos como diccionarios con 'EAN', 'parent' y 'text'.
+    """
+    products = {}
+    for document, _ in hits:
+        metadata = document.metadata
+        parent = metadata.get('parent', metadata.get('EAN'))
+        product = products.setdefault(parent, {'EAN': metadata.get('EAN', ''), 'parent': parent,
+                                               'header': metadata.get('header', ''), 'chunks': {}})
+        product['chunks'].setdefault(metadata.get('chunk', 0), document.page_content)
+
+    collapsed = []
+    for product in products.values():
+        header = product.pop('header')
+        bodies = [text[len(header):].strip() if header and text.startswith(header) else text
+                  for _, text in sorted(product.pop('chunks').items())]
+        product['text'] = ' '.join([header] + bodies if header else bodies)
+        collapsed.append(product)
+    return collapsed
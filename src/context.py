@@ -0,0 +1,92 @@
+import re
+from src.chunker import split_fields, split_long, truncate
+from src.tokens import count_tokens
+
+# Field priority when a product does not fit its share of the budget (regex over the field label).
+# Fields that match none of them come after, and keywords are never sent.
+FIELD_PRIORITY = [
+    re.compile(r'beneficio|efecto', re.IGNORECASE),
+    re.compile(r'descripci', re.IGNORECASE),
+    re.compile(r'modo de|uso|aplicaci', re.IGNORECASE),
+    re.compile(r'indicaciones|propiedades|caracter', re.IGNORECASE),
+    re.compile(r'piel|zona', re.IGNORECASE),
+    re.compile(r'presentaci|contenido', re.IGNORECASE),
+]
+EXCLUDED_FIELDS = re.compile(r'keywords', re.IGNORECASE)
+
+def rank_fields(fields: list) -> list:
+    """
+    Ordenar los campos de un producto por prioridad (estable: a igual prioridad, orden original).
+
+    Args:
+        fields (list): Campos `(etiqueta, texto)`, como los devuelve `split_fields`.
+
+    Returns:
+        list: Textos de los campos ordenados, sin los excluidos.
+    """
+    def priority(label: str) -> int:
+        for rank, pattern in enumerate(FIELD_PRIORITY):
+            if pattern.search(label):
+                return rank
+        return len(FIELD_PRIORITY)
+    fields = [(label, text) for label, text in fields if not EXCLUDED_FIELDS.search(label)]
+    return [text for _, text in sorted(fields, key=lambda field: priority(field[0]))]
+
+def trim(text: str, max_tokens: int) -> str:
+    """Recortar un texto a `max_tokens` tokens, cortando por oraciones si se puede y si no por palabras."""
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text) <= max_tokens:
+        return text
+    pieces = split_long(text, max_tokens)
+    return pieces[0] if pieces else truncate(text, max_tokens)
+
+def assemble_product(text: str, stock: str, max_tokens: int) -> str:
+    """
+    Armar el contexto de un producto dentro de `max_tokens` tokens: siempre el nombre (cabecera) y
+    el stock, precio y promoción; después, los campos por prioridad mientras entren, recortando el
+    último que no entre completo.
+
+    Args:
+        text (str): Documento del producto.
+        stock (str): Stock, precio y promoción del producto.
+        max_tokens (int): Tokens disponibles para el producto.
+
+    Returns:
+        str: Contexto del producto.
+    """
+    header, fields = split_fields(text)
+    parts = [header, stock]
+    remaining = max_tokens - count_tokens(' '.join(parts))
+    for field in rank_fields(fields):
+        if remaining <= 0:
+            break
+        field = trim(field, remaining - 1)
+        if field:
+            parts.append(field)
+            remaining -= count_tokens(field) + 1
+    return ' '.join(part for part in parts if part)
+
+def assemble_context(products: list, budget: int) -> tuple:
+    """
+    Armar el contexto de `search_in_database` dentro de un presupuesto de tokens. Cada producto
+    recibe una parte igual del presupuesto, así que el resultado es determinista y no depende del
+    largo de los demás productos. Los productos que ya entran en su parte se envían completos.
+
+    Args:
+        products (list): Productos `(documento, stock)` en el orden en que se envían.
+        budget (int): Presupuesto total de tokens.
+
+    Returns:
+        tuple: Contexto (una línea por producto), tokens del contexto y tokens que tendría sin recortar.
+    """
+    if not products:
+        return '', 0, 0
+    share = budget // len(products)
+    lines, full_tokens = [], 0
+    for text, stock in products:
+        line = f"{text} {stock}"
+        full_tokens += count_tokens(line)
+        lines.append(line if count_tokens(line) <= share else assemble_product(text, stock, share))
+    context = '\n'.join(lines)
+    return context, count_tokens(context), full_tokens
@@ -0,0 +1,90 @@
+import time
+from src.context import trim
+from src.tokens import count_tokens
+
+LAST_MESSAGES        = 10       # thread messages the model sees in full on each run
+SUMMARY_MAX_TOKENS   = 300      # summary of the older turns, sent as additional instructions
+SUMMARY_LINE_TOKENS  = 40       # per summarized message
+TOOL_OUTPUTS_CARRIED = 2        # tool outputs of previous turns carried into the next run
+TOOL_OUTPUT_TOKENS   = 200      # per carried tool output
+
+def summarize_messages(messages: list, max_tokens: int=SUMMARY_MAX_TOKENS, line_tokens: int=SUMMARY_LINE_TOKENS) -> str:
+    """
+    Resumen local (sin llamar al modelo) de los mensajes que quedan fuera del contexto: el comienzo
+    de cada mensaje, de los más recientes a los más viejos mientras entren en `max_tokens`.
+
+    Args:
+        messages (list): Mensajes `{'role', 'content'}` en orden cronológico.
+        max_tokens (int, optional): Máximo de tokens del resumen. Por defecto es SUMMARY_MAX_TOKENS.
+        line_tokens (int, optional): Máximo de tokens por mensaje. Por defecto es SUMMARY_LINE_TOKENS.
+
+    Returns:
+        str: Resumen, una línea por mensaje en orden cronológico; vacío si no hay mensajes.
+    """
+    lines, remaining = [], max_tokens
+    for message in reversed(messages):
+        role = "Usuario" if message["role"] == "user" else "Asistente"
+        line = f"{role}: {trim(' '.join(message['content'].split()), line_tokens)}"
+        tokens = count_tokens(line) + 1
+        if tokens > remaining:
+            break
+        lines.append(line)
+        remaining -= tokens
+    return '\n'.join(reversed(lines))
+
+def run_context(messages: list, tool_outputs: list, last_messages: int=LAST_MESSAGES,
+                summary_tokens: int=SUMMARY_MAX_TOKENS, tool_outputs_carried: int=TOOL_OUTPUTS_CARRIED,
+                tool_output_tokens: int=TOOL_OUTPUT_TOKENS) -> dict:
+    """
+    Política de contexto de una corrida del asistente: el modelo ve completos solo los últimos
+    `last_messages` mensajes del hilo (`truncation_strategy`), los anteriores van resumidos en
+    `additional_instructions`, junto con las últimas salidas de herramientas de turnos previos
+    (recortadas), que de otro modo no vuelven a estar en el contexto.
+
+    Args:
+        messages (list): Mensajes del hilo `{'role', 'content'}` en orden cronológico, incluido el actual.
+        tool_outputs (list): Salidas de herramientas de turnos previos `(nombre, salida)`, en orden.
+        last_messages (int, optional): Mensajes completos por corrida. Por defecto es LAST_MESSAGES.
+        summary_tokens (int, optional): Máximo de tokens del resumen. Por defecto es SUMMARY_MAX_TOKENS.
+        tool_outputs_carried (int, optional): Salidas de herramientas que se arrastran. Por defecto es TOOL_OUTPUTS_CARRIED.
+        tool_output_tokens (int, optional): Máximo de tokens por salida arrastrada. Por defecto es TOOL_OUTPUT_TOKENS.
+
+    Returns:
+        dict: Argumentos para `client.beta.threads.runs.stream`.
+    """
+    kwargs = {"truncation_strategy": {"type": "last_messages", "last_messages": last_messages}}
+    sections = []
+    summary = summarize_messages(messages[:-last_messages], summary_tokens) if len(messages) > last_messages else ''
+    if summary:
+        sections.append(f"Resumen de la conversación anterior:\n{summary}")
+    carried = tool_outputs[-tool_outputs_carried:] if tool_outputs_carried > 0 else []
+    if carried:
+        sections.append("Resultados recientes de herramientas:\n" + '\n'.join(
+            f"{name}: {trim(' '.join(output.split()), tool_output_tokens)}" for name, output in carried))
+    if sections:
+        kwargs["additional_instructions"] = '\n\n'.join(sections)
+    return kwargs
+
+class TurnUsage(object):
+    """Tokens (según `usage`), tiempo al primer token y latencia de un turno, sumando todas sus llamadas."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.first = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def first_token(self) -> None:
+        if self.first is None:
+            self.first = time.perf_counter() - self.start
+
+    def add(self, usage) -> None:
+        if usage is None:
+            return
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+
+    def report(self) -> str:
+        first = f"{self.first:.2f} s" if self.first is not None else "-"
+        return (f"{self.prompt_tokens} tokens de prompt, {self.completion_tokens} de respuesta, "
+                f"primer token {first}, {time.perf_counter() - self.start:.2f} s")
@@ -1,6 +1,9 @@
-import sys, os, re
+import sys, os, re, time, glob, json, hashlib, logging
 import pandas as pd
+from collections import Counter
 from sqlalchemy import create_engine
+from src.automaton import SuffixAutomaton
+from src.brands import BRANDS
 
 sys.path.append(os.path.abspath(os.path.join('..', 'src')))
 
@@ -9,6 +12,22 @@ bullets = ['\u2022', '\u00B7', '\u25CF', '\u23FA', '\u26AB',
            '\u2B24', '\u2219', '\u22C5', '\u1F311', '\u30FB']
 pattern = f"[{re.escape(''.join(bullets))}]"
 
+# Compiled cleaning rules. Bump NORMALIZATION_VERSION whenever a rule changes the output.
+NORMALIZATION_VERSION = 1
+re_lines = re.compile(r'\n|\s{2,}')
+re_units = re.compile(r'(?<=\d)\s+(?=[a-zA-Z])')   # same as r'(\d+)\s*([a-zA-Z]+)' -> r'\1\2'
+re_spaces = re.compile(r'\s+')
+re_bullets = re.compile(pattern)
+re_many_dots = re.compile(r'\.{2,}')
+re_spaced_dots = re.compile(r'\.\s*\.\s*\.\s*')
+
+# Cleaned sheets are cached as parquet files in this folder, next to the workbooks
+CACHE_FOLDER = '.cache'
+logger_cache = logging.getLogger(name=__name__)
+
+# Below this list size the pairwise `in` test (done in C) beats building a suffix automaton
+AUTOMATON_MIN_SIZE = 1000
+
 # Global functions
 def get_engine(file_path: str):
     """
@@ -38,21 +57,29 @@ def reduce_strings(strings: list) -> list:
         list: Lista de cadenas de texto reducidas a únicas, ignorando el caso pero devolviendo el caso original.
     """
     unique_strings = []
-    lower_to_original = {}
     
     # Sort by length, descending
     strings.sort(key=len, reverse=True)
     
-    for string in strings:
-        stripped_string = string.strip()
-        string_lower = stripped_string.lower()
-        
-        if not any(string_lower in unique.lower() for unique in unique_strings):
-            unique_strings.append(stripped_string)
-            lower_to_original[string_lower] = stripped_string
+    # A string is kept if it is not contained (ignoring case) in an already kept string
+    if len(strings) < AUTOMATON_MIN_SIZE:
+        unique_lower = []
+        for string in strings:
+            stripped_string = string.strip()
+            string_lower = stripped_string.lower()
+            if not any(string_lower in unique for unique in unique_lower):
+                unique_strings.append(stripped_string)
+                unique_lower.append(string_lower)
+    else:
+        automaton = SuffixAutomaton()
+        for string in strings:
+            stripped_string = string.strip()
+            string_lower = stripped_string.lower()
+            if string_lower not in automaton:
+                unique_strings.append(stripped_string)
+                automaton.add(string_lower)
             
-    # Return unique strings respecting original case
-    return [lower_to_original[unique.lower()] for unique in unique_strings]
+    return unique_strings
 
 def unify(strings: list) -> list:
     """
@@ -64,23 +91,32 @@ def unify(strings: list) -> list:
     Returns:
         list: Lista de cadenas de texto reducidas a únicas, ignorando el caso pero devolviendo el caso original.
     """
-    filter_strings = []
-    unique_strings = []
-    
-    for i in range(len(strings)):
-        is_sub = False
-        for j in range(len(strings)):
-            if (i!=j) and (strings[i] in strings[j]):
-                is_sub = True
-                break
-        if not is_sub:
-            filter_strings.append(strings[i])
-    
-    for s in filter_strings:
-        if s not in unique_strings:
-            unique_strings.append(s)
-    
-    return unique_strings
+    # A string is dropped if it is repeated or contained in another (hence longer) string
+    counts = Counter(strings)
+    candidates = [s for s in counts if counts[s] == 1]
+    contained = set()
+
+    if len(counts) < AUTOMATON_MIN_SIZE and not any('\0' in s for s in counts):
+        # Each candidate occurs once in its own segment, so a second hit lies in another string
+        haystack = '\0'.join(counts)
+        contained.update(s for s in candidates if haystack.count(s) > 1)
+    else:
+        # Visit distinct strings from longest to shortest, querying each length group
+        # against the automaton of all strictly longer strings
+        automaton = SuffixAutomaton()
+        distinct = sorted(counts, key=len, reverse=True)
+        i = 0
+        while i < len(distinct):
+            j = i
+            while j < len(distinct) and len(distinct[j]) == len(distinct[i]):
+                j += 1
+            group = distinct[i:j]
+            contained.update(s for s in group if counts[s] == 1 and s in automaton)
+            for s in group:
+                automaton.add(s)
+            i = j
+
+    return [s for s in strings if counts[s] == 1 and s not in contained]
 
 def remove(strings: list, to_remove: str, all: bool = False) -> list:
     """
@@ -114,8 +150,7 @@ def squash(strings: list) -> list:
     Returns:
         list: Lista de cadenas de texto con las unidades de medida comprimidas.
     """
-    pattern_units = [r'(\d+)\s*([a-zA-Z]+)', r'\1\2']
-    return re.sub(pattern_units[0], pattern_units[1], strings)
+    return re_units.sub('', strings)
 
 def check_string(string: str, numeric: bool=False) -> bool:
     """
@@ -134,6 +169,36 @@ def check_string(string: str, numeric: bool=False) -> bool:
     else:
         return bool(re.match(r'^\w+$', string))
     
+def normalize_text(value) -> str:
+    """
+    Normalizar una celda de texto en una sola pasada. Aplica, en orden, las reglas de
+    `clear_dataframe`: separar por saltos de línea o espacios múltiples, comprimir unidades,
+    eliminar 'nan' y vacíos, unir, colapsar espacios y eliminar viñetas y puntos.
+
+    Args:
+        value: Valor de la celda.
+
+    Returns:
+        str: Cadena de texto normalizada.
+    """
+    parts = [squash(s.strip()).replace('nan', '') for s in re_lines.split(str(value).strip())]
+    string = '. '.join([s for s in parts if s]) + '.'
+    string = re_spaces.sub(' ', string)     # replace multiple spaces with one space
+    string = re_bullets.sub('', string)     # delete symbols from pattern list
+    return string.replace('.', '')          # (dots are removed last, so '..' needs no own rule)
+
+def normalize_number(value) -> str:
+    """
+    Normalizar una celda numérica: entero como cadena de texto, o vacío si falta el dato.
+
+    Args:
+        value: Valor de la celda.
+
+    Returns:
+        str: Cadena de texto normalizada.
+    """
+    return '' if pd.isna(value) else str(int(float(value)))
+
 def clear_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Limpiar un DataFrame eliminando filas y columnas vacías y duplicadas.
@@ -149,20 +214,12 @@ def clear_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     df.drop_duplicates(inplace=True)            # delete duplicates
     for column in df.columns:
         if df[column].dtype in [int, float]:
-            df[column] = df[column].map(lambda x: str(int(float(x))) if not pd.isna(x) else str(x))
-            df[column] = df[column].map(lambda s: squash(s.replace('nan', '')))
+            df[column] = df[column].map(normalize_number)
         else:
-            df[column] = df[column].map(str)
-            df[column] = df[column].map(lambda x: x.strip())                                                            # strip whitespaces at the beginning and end
-            df[column] = df[column].map(lambda x: re.split(r'\n|\s{2,}', x))                                            # split by new line or many spaces
-            df[column] = df[column].map(lambda s: [squash(x.strip()) for x in s] if s != '' else s)                     # squash strings
-            df[column] = df[column].map(lambda s: [x.replace('nan', '') for x in s])
-            df[column] = df[column].map(lambda s: [x for x in s if x != ''])                                            # remove empty strings
-            df[column] = df[column].map(lambda s: '. '.join(s)+'.' if (s!='') or (not check_string(s, True)) else s)    # join strings with '.'
-            df[column] = df[column].map(lambda s: re.sub(r'\.{2,}', '.', s))                                            # remove multiple dots
-            df[column] = df[column].map(lambda s: re.sub(r'\s+', ' ', s))                                               # replace multiple spaces with one space
-            df[column] = df[column].map(lambda s: re.sub(pattern, '', s))                                               # delete symbols from pattern list
-            df[column] = df[column].map(lambda s: s.replace('.', ''))
+            # Repeated cells (categories, lines, brands) are normalized only once
+            cache = {}
+            values = [str(x) for x in df[column]]
+            df[column] = [cache[x] if x in cache else cache.setdefault(x, normalize_text(x)) for x in values]
     return df
 
 def make_keywords(strings: list) -> str:
@@ -200,8 +257,8 @@ def reduce_dots(string: str) -> str:
     Returns:
         str: Cadena de texto con los múltiples puntos reducidos.
     """
-    string = re.sub(r'\.{2,}', '.', string)
-    string = re.sub(r'\.\s*\.\s*\.\s*', '. ', string)
+    string = re_many_dots.sub('.', string)
+    string = re_spaced_dots.sub('. ', string)
     return string
 
 def simple_join(strings: list, reduce:bool=False) -> str:
@@ -232,600 +289,373 @@ def many_lines_join(string: str) -> str:
     string = re.sub(r'\.{2,}', '.', string)
     string = re.sub(r'\.\s*\.\s*\.\s*', '. ', string)
 
-class Cepage(object):
-    BRAND_LOWER = 'cepage'
-    BRAND_UPPER = 'CEPAGE'
-    BRAND_CAP = 'Cepage'
-    columns = ["categoria", "nombre de linea", "tipo de linea", "necesidades", "sku", 
-               "ean", "producto", "descripcion", "indicacion", "uso", "inci", "activos", 
-               "beneficios", "generales", "presentacion", "ancho", "profundidad", "alto", "peso"]
-    
-    def __init__(self, filepath:str) -> None:
-        self.filepath = filepath
-        self.df = pd.read_excel(filepath, engine=get_engine(filepath))
-        self.df.columns = Cepage.columns    # rename columns
-        self.df = clear_dataframe(self.df)  # clean dataframe
+def count_words(df: pd.DataFrame) -> int:
+    """Cantidad de palabras (separadas por espacios) en todas las celdas de texto de un DataFrame."""
+    return sum(int((df[column].str.count(' ') + 1).sum()) for column in df.columns)
 
-        # Get some parameters
-        self.n_samples = self.df.shape[0]
-        self.n_features = self.df.shape[1]
-        self.n_words = self.df.map(lambda x: len(x.split(' '))).sum().sum()
-        self.n_chars = self.df.map(lambda x: len(x)).sum().sum()
+def count_chars(df: pd.DataFrame) -> int:
+    """Cantidad de caracteres en todas las celdas de texto de un DataFrame."""
+    return sum(int(df[column].str.len().sum()) for column in df.columns)
 
-    def unify(self) -> pd.DataFrame:
-        """Unify main dataframe. Reduce columns to: product, code, features.
-        Column names: 'Producto', 'Código' and 'Descripción'.
+def file_digest(filepath: str, chunk_size: int=1 << 20) -> str:
+    """Hash sha256 (hexadecimal) del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-        Returns:
-            pd.DataFrame: A modified copy of the main dataframe, with the only three common columns.
-        """
-        df = self.df.copy()
-        
-        name = df['producto']
-        name = name.apply(lambda s: f"Producto {s}. Marca {Cepage.BRAND_CAP}.")
-
-        code = df[['ean', 'sku']]
-        code = code.apply(lambda row: row.to_list(), axis=1)
-        code = code.apply(lambda s: f"Código EAN {s[0]}. Código SKU {s[1]}.")
-
-        features = df[['descripcion', 'indicacion', 'uso', 'beneficios']]
-        features = features.apply(lambda row: row.to_list(), axis=1)
-        features = features.apply(lambda s: f"Descripción: {s[0]}. Indicaciones: {s[1]}. Uso: {s[2]}. Beneficios: {s[3]}.")
-        features = features.apply(lambda s: reduce_dots(s))
-
-        keywords = df[['categoria', 'nombre de linea', 'tipo de linea', 'necesidades', 'generales']]
-        keywords = keywords.apply(lambda row: row.to_list(), axis=1)
-        keywords = keywords.apply(lambda kws: make_keywords(kws))
-        keywords = keywords.apply(lambda kws: f"Keywords: {kws}")
-
-        dims = df[['ancho', 'profundidad', 'alto']]
-        dims = dims.apply(lambda row: row.to_list(), axis=1)
-        dims = dims.apply(lambda dim: f"Dimensiones {dim[0]}mm x {dim[1]}mm x {dim[2]}mm." if any(dim) else '')
-
-        features = pd.DataFrame(data={0:features, 1:keywords, 2:df['presentacion'], 3:dims, 4:df['peso']})
-        features = features.apply(lambda row: row.to_list(), axis=1)
-        features = features.to_list()
-        features_kustom = []
-        for feature in features:
-            s = ''
-            s += f"{feature[0]}. " if feature[0] else ''
-            s += f"{feature[1]}. " if feature[1] else ''
-            s += f"Presentación {feature[2]}. " if feature[2] else ''
-            s += f"{feature[3]}. " if feature[3] else ''
-            s += f"Peso {feature[4]}gr." if feature[4] else ''
-            features_kustom.append(s)
-        features = pd.Series(features_kustom)
-        features = features.apply(lambda s: reduce_dots(s))
-        
-        # Reset index before building dataframe
-        name.reset_index(drop=True, inplace=True)
-        code.reset_index(drop=True, inplace=True)
-        features.reset_index(drop=True, inplace=True)
-        # Build unify dataframe
-        dataframe = pd.DataFrame(data={'Producto':name, 'Código':code, 'Descripción':features})
-        dataframe = dataframe.map(lambda s: reduce_dots(s))
+def load_cached(filepath: str):
+    """
+    Leer un DataFrame de la caché.
 
-        return dataframe
+    Args:
+        filepath (str): Ruta al archivo parquet.
 
-    def to_txt(self, folderpath: str='../data/txt/bybrand/cepage/', separate: bool=False) -> None:
-        dataframe = self.unify()
-        lines = [f"{name} {code} {features}" for name, code, features in 
-                 zip(dataframe['Producto'], dataframe['Código'], dataframe['Descripción'])]
-        brand = Cepage.BRAND_LOWER
-        if separate:
-            n_lines = len(lines)
-            for i, line in enumerate(lines):
-                i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
-                filepath = folderpath + f'{brand}_{i}.txt'
-                with open(filepath, 'w') as f:
-                    f.write(line + '\n')
-
-        filepath = folderpath + f'{brand}_all.txt'
-        with open(filepath, 'w') as f:
-            for line in lines[:-1]:
-                f.write(line + '\n')
-            f.write(lines[-1])
-        f.close()
-    
-    def to_sql(self, dbname:str, tablename:str):
-        df = self.unify()
-        engine = create_engine(f'sqlite:{dbname}')
-        df.to_sql(f'{tablename}', con=engine, if_exists='replace', index=False)
+    Returns:
+        pd.DataFrame: El DataFrame, o None si no está en caché o no se pudo leer.
+    """
+    if not os.path.exists(filepath):
+        return None
+    try:
+        return pd.read_parquet(filepath)
+    except Exception as e:
+        logger_cache.warning(f"No se pudo leer la caché {filepath}: {e}")
+        return None
 
+def store_cached(df: pd.DataFrame, filepath: str) -> None:
+    """
+    Guardar un DataFrame en la caché de forma atómica (archivo temporal y `os.replace`), y
+    borrar las entradas anteriores de la misma hoja. Si falla, solo se registra el error.
 
-class Cetaphil(object):
-    BRAND_LOWER = 'cetaphil'
-    BRAND_UPPER = 'CETAPHIL'
-    BRAND_CAP = 'Cetaphil'
-    columns = ["producto", "marca", "nombre", "presentacion", "ean", 
-               "categoria", "subcategoria", "zona", "descripcion", "keywords"]
-    columns_to_removed = ["producto", "marca"]
-    
-    def __init__(self, filepath:str) -> None:
-        self.filepath = filepath
-        self.df = pd.read_excel(filepath, engine=get_engine(filepath))
-        self.df.columns = Cetaphil.columns                              # rename columns
-        self.df.drop(columns=Cetaphil.columns_to_removed, inplace=True) # remove some columns
-        self.df = clear_dataframe(self.df)                              # clean dataframe
+    Args:
+        df (pd.DataFrame): DataFrame a guardar.
+        filepath (str): Ruta al archivo parquet; el prefijo hasta el primer '-' identifica la hoja.
+    """
+    folderpath, filename = os.path.split(filepath)
+    temporary = f'{filepath}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(folderpath, exist_ok=True)
+        df.to_parquet(temporary)
+        os.replace(temporary, filepath)
+    except Exception as e:
+        logger_cache.warning(f"No se pudo guardar la caché {filepath}: {e}")
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return
+    sheet = filename.split('-', 1)[0]
+    for stale in glob.glob(os.path.join(folderpath, f'{sheet}-*.parquet')):
+        if stale != filepath:
+            os.remove(stale)
+
+class BrandSchema(object):
+    """
+    Constructor de documentos compilado a partir de la especificación declarativa de una marca
+    (ver `src/brands.py`). Lee y limpia las hojas del libro y arma los documentos concatenando
+    columnas enteras, sin recorrer el DataFrame fila por fila.
+    """
+    POST = {
+        'reduce_dots': lambda s: s.str.replace(re_many_dots, '.', regex=True).str.replace(re_spaced_dots, '. ', regex=True),
+        'newline_dots': lambda s: s.str.replace('\n', '. ', regex=False),
+        'squash': lambda s: s.str.replace(re_units, '', regex=True),
+        'end_dot': lambda s: s.where(s.str.endswith('.') | (s == ''), s + '.'),
+    }
+    ROW_OPS = {'keywords': make_keywords, 'join': simple_join}
+
+    def __init__(self, spec: dict) -> None:
+        self.spec = spec
+        self.brand = spec['brand']
+        self.table = spec.get('table')
+        self.key = os.path.splitext(self.table)[0] if self.table else self.brand.lower()
+        self.sheets = [{'columns': list(sheet['columns']), 
+                        'drop': list(sheet.get('drop', [])), 
+                        'skip_rows': sheet.get('skip_rows', 0)} for sheet in spec['sheets']]
+        self.finalize = spec.get('finalize', 'str')
+        self.drop_empty = spec.get('drop_empty', False)
+
+        # Compile fields, checking that every source is a column or a previous derived field
+        available = {c for sheet in self.sheets for c in sheet['columns'] if c not in sheet['drop']}
+        self.derived = {}
+        for name, field in spec.get('derived', {}).items():
+            self.derived[name] = self._compile(field, available, name)
+            available.add(name)
+        self.documents = {layout: {column: self._compile(field, available, f"{layout}/{column}") 
+                                   for column, field in fields.items()}
+                          for layout, fields in spec['documents'].items()}
+
+    @property
+    def columns(self):
+        """Nombres de columnas: una lista para marcas de una hoja, o un dict por hoja."""
+        if len(self.sheets) == 1:
+            return self.sheets[0]['columns']
+        return {i: sheet['columns'] for i, sheet in enumerate(self.sheets)}
+
+    @property
+    def columns_to_drop(self):
+        if len(self.sheets) == 1:
+            return self.sheets[0]['drop']
+        return {i: sheet['drop'] for i, sheet in enumerate(self.sheets)}
+
+    def _compile(self, field: dict, available: set, name: str) -> tuple:
+        post = field.get('post', [])
+        for op in post:
+            if op not in BrandSchema.POST:
+                raise ValueError(f"{self.brand}: operación '{op}' desconocida en el campo '{name}'.")
+        post = [BrandSchema.POST[op] for op in post]
+
+        if 'segments' in field:
+            segments = []
+            for segment in field['segments']:
+                template, sources, when = segment if len(segment) == 3 else (*segment, 'any')
+                sources = [sources] if isinstance(sources, str) else list(sources)
+                parts = template.replace('{brand}', self.brand).split('{}')
+                if len(parts) != len(sources) + 1:
+                    raise ValueError(f"{self.brand}: la plantilla '{template}' del campo '{name}' no coincide con sus fuentes.")
+                if when not in ('any', 'all', 'always'):
+                    raise ValueError(f"{self.brand}: condición '{when}' desconocida en el campo '{name}'.")
+                self._check(sources, available, name)
+                segments.append((parts, sources, when))
+            return ('segments', segments, post)
+        for op in BrandSchema.ROW_OPS:
+            if op in field:
+                self._check(field[op], available, name)
+                return (op, list(field[op]), post)
+        if 'labelled' in field:
+            return ('labelled', list(field['labelled']), post)
+        raise ValueError(f"{self.brand}: el campo '{name}' no define segmentos ni operación.")
+
+    def _check(self, sources: list, available: set, name: str) -> None:
+        for source in sources:
+            if source not in available:
+                raise ValueError(f"{self.brand}: '{source}' no es una columna ni un campo derivado ('{name}').")
+
+    def clean(self, df: pd.DataFrame, sheet: int=0) -> pd.DataFrame:
+        """
+        Renombrar, descartar columnas y limpiar una hoja según su disposición.
 
-        # Get some parameters
-        self.n_samples = self.df.shape[0]
-        self.n_features = self.df.shape[1]
-        self.n_words = self.df.map(lambda x: len(x.split(' '))).sum().sum()
-        self.n_chars = self.df.map(lambda x: len(x)).sum().sum()
-    
-    def unify(self) -> pd.DataFrame:
-        """Unify main dataframe. Reduce columns to: product, code, features.
-        Column names: 'Producto', 'Código' and 'Descripción'.
+        Args:
+            df (pd.DataFrame): Hoja tal como se leyó del libro.
+            sheet (int, optional): Índice de la hoja. Por defecto es 0.
 
         Returns:
-            pd.DataFrame: A modified copy of the main dataframe, with the only three common columns.
+            pd.DataFrame: Hoja limpia (todas las celdas son cadenas de texto).
         """
-        df = self.df.copy()
-
-        name = df['nombre']
-        name = name.apply(lambda s: f"Producto {s}. Marca {Cetaphil.BRAND_CAP}.")
-
-        code = df['ean']
-        code = code.apply(lambda s: f"Código EAN {s}.")
-
-        keywords = df[['categoria', 'subcategoria', 'zona', 'keywords']]
-        keywords = keywords.apply(lambda row: row.to_list(), axis=1)
-        keywords = keywords.apply(lambda kws: make_keywords(kws))
-
-        features = pd.DataFrame(data={0:df['descripcion'], 1:keywords, 2:df['presentacion']})
-        features = features.apply(lambda row: row.to_list(), axis=1)
-        features = features.to_list()
-        features_kustom = []
-        for feature in features:
-            s = ''
-            s += f"Descripción: {feature[0]}. " if feature[0] else ''
-            s += f"Keywords: {feature[1]}. " if feature[1] else ''
-            s += f"Presentación {feature[2]}. " if feature[2] else ''
-            features_kustom.append(s)
-        features = pd.Series(features_kustom)
-        features = features.apply(lambda s: reduce_dots(s))
-
-        # Reset index before building dataframe
-        name.reset_index(drop=True, inplace=True)
-        code.reset_index(drop=True, inplace=True)
-        features.reset_index(drop=True, inplace=True)
-        # Build unify dataframe
-        dataframe = pd.DataFrame(data={'Producto':name, 'Código':code, 'Descripción':features})
-        dataframe = dataframe.map(lambda s: reduce_dots(s))
-
-        return dataframe
-
-    def to_txt(self, folderpath: str='../data/txt/bybrand/cetaphil/', separate: bool=False) -> None:
-        dataframe = self.unify()
-        lines = [f"{name} {code} {features}" for name, code, features in 
-                 zip(dataframe['Producto'], dataframe['Código'], dataframe['Descripción'])]
-        brand = Cetaphil.BRAND_LOWER
-        
-        if separate:
-            n_lines = len(lines)
-            for i, line in enumerate(lines):
-                i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
-                filepath = folderpath + f'{brand}_{i}.txt'
-                with open(filepath, 'w') as f:
-                    f.write(line + '\n')
-
-        filepath = folderpath + f'{brand}_all.txt'
-        with open(filepath, 'w') as f:
-            for line in lines[:-1]:
-                f.write(line + '\n')
-            f.write(lines[-1])
-        f.close()
-    
-    def to_sql(self, dbname:str, tablename:str):
-        df = self._prepare_to_llm()
-        engine = create_engine(f'sqlite:{dbname}')
-        df.to_sql(f'{tablename}', con=engine, if_exists='replace', index=False)
-
+        layout = self.sheets[sheet]
+        if layout['skip_rows']:
+            df = df.iloc[layout['skip_rows']:]                  # delete the first rows (wrong headers)
+        df.columns = layout['columns']                          # rename columns
+        df = df.drop(columns=layout['drop'])                    # remove some columns
+        return clear_dataframe(df)                              # clean dataframe
+
+    def read(self, filepath: str, n_sheets: int=None, cache: bool=True) -> list:
+        """
+        Leer y limpiar las hojas de un libro. Las hojas limpias se guardan en caché (parquet) y
+        solo se vuelve a leer el libro si cambió su contenido, la disposición de la hoja o
+        `NORMALIZATION_VERSION`.
 
-class Eucerin(object):
-    BRAND_LOWER = 'eucerin'
-    BRAND_UPPER = 'EUCERIN'
-    BRAND_CAP = 'Eucerin'
-    columns = ["fecha", "estado", "ean", "producto", "linea", "categoria",
-               "segmento", "contenido", "zona", "nombre", "nombre corto",
-               "descripcion", "descripcion corta", "beneficios 1", "beneficios 2",
-               "beneficios 3", "beneficios 4", "beneficios 5", "piel", "propiedades",
-               "ingredientes", "uso", "keywords"]
-    columns_to_removed = ["fecha", "estado"]
-    
-    def __init__(self, filepath:str) -> None:
-        self.filepath = filepath
-        self.df = pd.read_excel(filepath, engine=get_engine(filepath))
-        self.df.columns = Eucerin.columns                               # rename columns
-        self.df.drop(columns=Eucerin.columns_to_removed, inplace=True)  # remove some columns
-        self.df = clear_dataframe(self.df)                              # clean dataframe
+        Args:
+            filepath (str): Ruta al libro de Excel.
+            n_sheets (int, optional): Cantidad de hojas a leer. Por defecto, todas las de la especificación.
+            cache (bool, optional): Si es False, no lee ni escribe la caché. Por defecto es True.
 
-        # Get some parameters
-        self.n_samples = self.df.shape[0]
-        self.n_features = self.df.shape[1]
-        self.n_words = self.df.map(lambda x: len(x.split(' '))).sum().sum()
-        self.n_chars = self.df.map(lambda x: len(x)).sum().sum()
+        Returns:
+            list: Lista de DataFrames limpios, uno por hoja.
+        """
+        n_sheets = n_sheets or len(self.sheets)
+        dataframes, cachepaths = {}, {}
+        if cache:
+            folderpath = os.path.join(os.path.dirname(filepath), CACHE_FOLDER, self.key)
+            workbook = file_digest(filepath)
+            for i in range(n_sheets):
+                cachepaths[i] = os.path.join(folderpath, f'{i}-{self.cache_key(workbook, i)}.parquet')
+                df = load_cached(cachepaths[i])
+                if df is not None:
+                    dataframes[i] = df
+
+        missing = [i for i in range(n_sheets) if i not in dataframes]
+        if missing:
+            # A single read_excel call opens and parses the workbook once for all the sheets
+            sheets = pd.read_excel(filepath, sheet_name=missing, engine=get_engine(filepath))
+            for i in missing:
+                dataframes[i] = self.clean(sheets[i], i)
+                if cache:
+                    store_cached(dataframes[i], cachepaths[i])
+        return [dataframes[i] for i in range(n_sheets)]
+
+    def cache_key(self, workbook: str, sheet: int) -> str:
+        """
+        Clave de caché de una hoja limpia: hash del libro, índice y disposición de la hoja, y
+        versión de las reglas de limpieza. Cambiar la disposición de una hoja solo invalida esa hoja.
 
-    def unify_simple(self) -> pd.DataFrame:
+        Args:
+            workbook (str): Hash sha256 del contenido del libro.
+            sheet (int): Índice de la hoja.
 
-        df = self.df.copy()
-
-        # Build name field
-        name = df['producto']
-        name = name.apply(lambda s: f"Producto {s}. Marca {Eucerin.BRAND_CAP}.")
-
-        # Build features field
-        benefits = df[[f"beneficios {i}" for i in range(1,6)]]
-        benefits = benefits.apply(lambda row: row.to_list(), axis=1)
-        benefits = benefits.apply(lambda s: simple_join(s))
-
-        use = df['uso'].apply(lambda x: x.replace('\n', '. '))
-        use = use.apply(lambda s: reduce_dots(s))
-
-        ft_dict = {0:df['descripcion'], 1:df['contenido'], 2:df['propiedades'], 3:benefits, 4:use}
-        features = pd.DataFrame(data=ft_dict)
-        features = features.apply(lambda row: row.to_list(), axis=1)
-        features = features.to_list()
-        features_kustom = []
-        for feature in features:
-            s = ''
-            s += f"Descripción: {feature[0]}. " if feature[0] else ''
-            s += f"Presentación {feature[1]}. " if feature[1] else ''
-            s += f"Propiedades: {feature[2]}. " if feature[2] else ''
-            s += f"Beneficios: {feature[3]}. " if feature[3] else ''
-            s += f"Modo de uso: {feature[4]}. " if feature[4] else ''
-            features_kustom.append(s)
-        features = pd.Series(features_kustom)
-        features = features.apply(lambda s: reduce_dots(s))
-
-        # Reset index before building dataframe
-        name.reset_index(drop=True, inplace=True)
-        features.reset_index(drop=True, inplace=True)
-        # Build unify dataframe
-        dataframe = pd.DataFrame(data={'Producto':name, 'Descripción':features})
-        dataframe = dataframe.map(lambda s: reduce_dots(s))
+        Returns:
+            str: Clave hexadecimal.
+        """
+        content = json.dumps([workbook, sheet, NORMALIZATION_VERSION, self.sheets[sheet]], sort_keys=True)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()[:32]
+
+    def _evaluate(self, field: tuple, df: pd.DataFrame, lookup) -> pd.Series:
+        kind, payload, post = field
+        blank = pd.Series('', index=df.index, dtype=object)
+        if kind == 'segments':
+            text = blank
+            for parts, sources, when in payload:
+                if not sources:
+                    text = text + parts[0]
+                    continue
+                columns = [lookup(source) for source in sources]
+                segment = parts[0]
+                for column, part in zip(columns, parts[1:]):
+                    segment = segment + column + part
+                if when != 'always':
+                    masks = [column != '' for column in columns]
+                    mask = masks[0]
+                    for other in masks[1:]:
+                        mask = (mask | other) if when == 'any' else (mask & other)
+                    segment = segment.where(mask, '')
+                text = text + segment
+        elif kind == 'labelled':
+            text = blank
+            for column in df.columns:
+                if column not in payload:
+                    text = text + (f"{column.capitalize()}: " + df[column] + ". ").where(df[column] != '', '')
+        else:
+            # Row operations over lists of cells; repeated rows are computed once
+            function, cache = BrandSchema.ROW_OPS[kind], {}
+            rows = zip(*[lookup(source) for source in payload])
+            values = [cache[row] if row in cache else cache.setdefault(row, function(list(row))) for row in rows]
+            text = pd.Series(values, index=df.index, dtype=object)
+        for op in post:
+            text = op(text)
+        return text
+
+    def build(self, dataframes: list, layout: str='default') -> pd.DataFrame:
+        """
+        Construir los documentos de la marca: columnas 'Producto', 'Código' y 'Descripción'.
 
-        return dataframe
-    
-    def unify(self) -> pd.DataFrame:
-        """Unify main dataframe. Reduce columns to: product, code, features.
-        Column names: 'Producto', 'Código' and 'Descripción'.
+        Args:
+            dataframes (list): Hojas limpias (ver `read`).
+            layout (str, optional): Disposición de documento de la especificación. Por defecto es 'default'.
 
         Returns:
-            pd.DataFrame: A modified copy of the main dataframe, with the only three common columns.
+            pd.DataFrame: Un documento por fila, con las hojas concatenadas.
         """
-        df = self.df.copy()
-
-        # Build name field
-        name = df['producto']
-        name = name.apply(lambda s: f"Producto {s}. Marca {Eucerin.BRAND_CAP}.")
-
-        # Build code field
-        code = df['ean']
-        code = code.apply(lambda s: f"Código EAN {s}.")
-        
-        # Build features field
-        keywords = df[['linea', 'categoria', 'segmento', 'zona', 'piel', 'keywords']]
-        keywords = keywords.apply(lambda row: row.to_list(), axis=1)
-        keywords = keywords.apply(lambda kws: make_keywords(kws))
-
-        benefits = df[[f"beneficios {i}" for i in range(1,6)]]
-        benefits = benefits.apply(lambda row: row.to_list(), axis=1)
-        benefits = benefits.apply(lambda s: simple_join(s))
-
-        use = df['uso'].apply(lambda x: x.replace('\n', '. '))
-        use = use.apply(lambda s: reduce_dots(s))
-
-        ft_dict = {0:df['descripcion'], 1:df['contenido'], 2:df['propiedades'], 3:benefits, 4:use, 5:keywords}
-        features = pd.DataFrame(data=ft_dict)
-        features = features.apply(lambda row: row.to_list(), axis=1)
-        features = features.to_list()
-        features_kustom = []
-        for feature in features:
-            s = ''
-            s += f"Descripción: {feature[0]}. " if feature[0] else ''
-            s += f"Contenido: {feature[1]}. " if feature[1] else ''
-            s += f"Propiedades: {feature[2]}. " if feature[2] else ''
-            s += f"Beneficios: {feature[3]}. " if feature[3] else ''
-            s += f"Modo de uso: {feature[4]}. " if feature[4] else ''
-            s += f"Keywords: {feature[5]}. " if feature[5] else ''
-            features_kustom.append(s)
-        features = pd.Series(features_kustom)
-        features = features.apply(lambda s: reduce_dots(s))
-
-        # Reset index before building dataframe
-        name.reset_index(drop=True, inplace=True)
-        code.reset_index(drop=True, inplace=True)
-        features.reset_index(drop=True, inplace=True)
-        # Build unify dataframe
-        dataframe = pd.DataFrame(data={'Producto':name, 'Código':code, 'Descripción':features})
-        dataframe = dataframe.map(lambda s: reduce_dots(s))
+        documents = []
+        for df in dataframes:
+            df = df.reset_index(drop=True)
+            values = {column: df[column] for column in df.columns}
+            blank = pd.Series('', index=df.index, dtype=object)
+
+            def lookup(name: str) -> pd.Series:
+                if name not in values:
+                    # Derived fields are computed on first use; columns missing in this sheet are empty
+                    values[name] = self._evaluate(self.derived[name], df, lookup) if name in self.derived else blank
+                return values[name]
+
+            document = pd.DataFrame({column: self._evaluate(field, df, lookup) 
+                                     for column, field in self.documents[layout].items()})
+            if self.finalize == 'reduce_dots':
+                document = document.apply(BrandSchema.POST['reduce_dots'])
+            else:
+                document = document.map(str).replace('nan', '')
+            documents.append(document)
 
+        dataframe = pd.concat(documents, ignore_index=True)
+        if self.drop_empty:
+            condition = (dataframe['Producto']=='') & (dataframe['Código']=='')
+            dataframe = dataframe[~condition]
         return dataframe
-    
-    def to_txt(self, dataframe, folderpath: str='../data/txt/bybrand/eucerin/', separate: bool=False) -> None:
-        lines = [' '.join(list(row[1].values)) for row in dataframe.iterrows()]
-        brand = Eucerin.BRAND_LOWER
-        
-        if separate:
-            n_lines = len(lines)
-            for i, line in enumerate(lines):
-                i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
-                filepath = folderpath + f'{brand}_{i}.txt'
-                with open(filepath, 'w') as f:
-                    f.write(line + '\n')
-
-        filepath = folderpath + f'{brand}_all.txt'
-        with open(filepath, 'w') as f:
-            for line in lines[:-1]:
-                f.write(line + '\n')
-            f.write(lines[-1])
-        f.close()
-
-    def to_sql(self, dbname:str, tablename:str):
-        df = self._prepare_to_llm()
-        engine = create_engine(f'sqlite:{dbname}')
-        df.to_sql(f'{tablename}', con=engine, if_exists='replace', index=False)
 
+    def to_lines(self, dataframe: pd.DataFrame) -> list:
+        """Una línea de texto por documento: producto, código y descripción."""
+        return (dataframe['Producto'] + ' ' + dataframe['Código'] + ' ' + dataframe['Descripción']).to_list()
 
-class Eximia(object):
-    BRAND_LOWER = 'eximia'
-    BRAND_UPPER = 'EXIMIA'
-    BRAND_CAP = 'Eximia'
-    columns = ["ean", "nombre", "necesidad", "linea", "piel", "titulo", 
-               "bajada", "descripcion", "uso", "activos", "beneficios", 
-               "comentarios", "inci", "keywords", "presentacion", "contenido", 
-               "unidades", "ancho", "profundidad", "alto", "peso"]
+def write_lines(lines: list, folderpath: str, brand: str, separate: bool=False) -> None:
+    """
+    Escribir los documentos de una marca en `{brand}_all.txt` y, opcionalmente, uno por archivo.
 
-    def __init__(self, filepath:str) -> None:
-        self.filepath = filepath
-        self.df = pd.read_excel(filepath, engine=get_engine(filepath))
+    Args:
+        lines (list): Documentos, uno por línea.
+        folderpath (str): Carpeta de salida.
+        brand (str): Nombre de la marca en minúsculas (prefijo de los archivos).
+        separate (bool, optional): Si es True, también escribe un archivo por documento. Por defecto es False.
+    """
+    if separate:
+        n_lines = len(lines)
+        for i, line in enumerate(lines):
+            i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
+            filepath = folderpath + f'{brand}_{i}.txt'
+            with open(filepath, 'w') as f:
+                f.write(line + '\n')
 
-        self.df = self.df.iloc[1:]          # delete the first row (wrong headers)
-        self.df.columns = Eximia.columns    # rename columns
-        self.df = clear_dataframe(self.df)  # clean dataframe
+    filepath = folderpath + f'{brand}_all.txt'
+    with open(filepath, 'w') as f:
+        for line in lines[:-1]:
+            f.write(line + '\n')
+        f.write(lines[-1])
 
-        # Get some parameters
-        self.n_samples = self.df.shape[0]
-        self.n_features = self.df.shape[1]
-        self.n_words = self.df.map(lambda x: len(x.split(' '))).sum().sum()
-        self.n_chars = self.df.map(lambda x: len(x)).sum().sum()
+def build_brand_txt(key: str, table_folderpath: str, txt_folderpath: str, separate: bool=False) -> dict:
+    """
+    Construir los documentos de una marca a partir de su libro y escribirlos en texto plano.
+    Es autocontenida (solo recibe la clave de la marca y rutas) para poder ejecutarse en otro proceso.
 
-    def unify(self) -> pd.DataFrame:
-        """Unify main dataframe. Reduce columns to: product, code, features.
-        Column names: 'Producto', 'Código' and 'Descripción'.
+    Args:
+        key (str): Clave de la marca en `BRANDS`.
+        table_folderpath (str): Carpeta con los libros de Excel.
+        txt_folderpath (str): Carpeta de salida.
+        separate (bool, optional): Si es True, también escribe un archivo por documento. Por defecto es False.
 
-        Returns:
-            pd.DataFrame: A modified copy of the main dataframe, with the only three common columns.
-        """
-        df = self.df.copy()
-
-        # Build name field
-        name = df['nombre']
-        name = name.apply(lambda s: f"Producto {s}. Marca {Eximia.BRAND_CAP}.")
-        name = name.apply(lambda s: reduce_dots(s))
-
-        # Build code field
-        code = df['ean']
-        code = code.apply(lambda s: f"Código EAN {s}.")
-        code = code.apply(lambda s: reduce_dots(s))
-
-        # Build features field
-        keywords = df[['necesidad', 'linea', 'piel', 'keywords']]
-        keywords = keywords.apply(lambda row: row.to_list(), axis=1)
-        keywords = keywords.apply(lambda kws: make_keywords(kws))
-
-        df['ancho'] = df['ancho'].apply(lambda x: x+'mm' if x!='' else x)
-        df['profundidad'] = df['profundidad'].apply(lambda x: x+'mm' if x!='' else x)
-        df['alto'] = df['alto'].apply(lambda x: x+'mm' if x!='' else x)
-        df['peso'] = df['peso'].apply(lambda x: x+'gr' if x!='' else x)
-
-        presentation = df[['presentacion', 'contenido', 'unidades']]
-        presentation = presentation.apply(lambda row: row.to_list(), axis=1)
-        presentation = presentation.apply(lambda row: squash(' '.join(row)))
-        presentation = presentation.apply(lambda row: row if (row.endswith('.') or row=='') else row+'.')
-
-        dims = df[['ancho', 'profundidad', 'alto']]
-        dims = dims.apply(lambda row: row.to_list(), axis=1)
-        dims = dims.apply(lambda row: ' x '.join(row) if all([r!='' for r in row]) else '')
-
-        features = df[['titulo', 'bajada', 'descripcion', 'uso', 'activos', 'beneficios', 'comentarios', 'inci']]
-        features = features.apply(lambda row: row.to_list(), axis=1)
-        features = features.apply(lambda row: simple_join(row))
-
-        features_kustom = []
-        for ft, kws, ppt, dim, weight in zip(features, keywords, presentation, dims, df['peso']):
-            s = ''
-            s += f"Descripción: {ft}. " if ft else ''
-            s += f"Keywords: {kws}. " if kws else ''
-            s += f"Presentación: {ppt}. " if ppt else ''
-            s += f"Dimensiones {dim}. " if dim else ''
-            s += f"Peso {weight}." if weight else ''
-            features_kustom.append(s)
-        features = pd.Series(features_kustom)
-        features = features.apply(lambda s: reduce_dots(s))
-
-        # Reset index before building dataframe
-        name.reset_index(drop=True, inplace=True)
-        code.reset_index(drop=True, inplace=True)
-        features.reset_index(drop=True, inplace=True)
-        # Build unify dataframe
-        dataframe = pd.DataFrame(data={'Producto':name, 'Código':code, 'Descripción':features})
-        dataframe = dataframe.map(str)
-        dataframe = dataframe.apply(lambda s: s.replace('nan', ''))
+    Returns:
+        dict: Marca, cantidad de documentos y tiempos en segundos de lectura, construcción y escritura.
+    """
+    schema = BrandSchema(BRANDS[key])
+    filepath = os.path.join(table_folderpath, BRANDS[key]['table'])
 
-        return dataframe
+    start = time.perf_counter()
+    dataframes = schema.read(filepath)
+    read = time.perf_counter()
+    lines = schema.to_lines(schema.build(dataframes))
+    build = time.perf_counter()
+    write_lines(lines, txt_folderpath, schema.brand.lower(), separate)
+    end = time.perf_counter()
 
-    def to_txt(self, folderpath: str='../data/txt/bybrand/eximia/', separate: bool=False) -> None:
-        dataframe = self.unify()
-        lines = [f"{name} {code} {features}" for name, code, features in 
-                 zip(dataframe['Producto'], dataframe['Código'], dataframe['Descripción'])]
-        brand = Eximia.BRAND_LOWER
-        
-        if separate:
-            n_lines = len(lines)
-            for i, line in enumerate(lines):
-                i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
-                filepath = folderpath + f'{brand}_{i}.txt'
-                with open(filepath, 'w') as f:
-                    f.write(line + '\n')
-
-        filepath = folderpath + f'{brand}_all.txt'
-        with open(filepath, 'w') as f:
-            for line in lines[:-1]:
-                f.write(line + '\n')
-            f.write(lines[-1])
-        f.close()
-    
-    def to_sql(self, dbname:str, tablename:str):
-        df = self._prepare_to_llm()
-        engine = create_engine(f'sqlite:{dbname}')
-        df.to_sql(f'{tablename}', con=engine, if_exists='replace', index=False)
+    return {'brand': key, 'documents': len(lines), 'read': read - start, 
+            'build': build - read, 'write': end - build, 'total': end - start}
 
-class Isdin(object):
-    BRAND_LOWER = 'isdin'
-    BRAND_UPPER = 'ISDIN'
-    BRAND_CAP = 'Isdin'
-    columns = ["id", "codigo", "sku", "ean", "nombre", "variante", 
-               "marca", "generales", "id_ml", "descripcion"]
-    columns_to_drop = ["id_ml"]
+class Brand(object):
+    """
+    Marca de una sola hoja. Envoltorio de compatibilidad sobre `BrandSchema`: cada subclase
+    solo indica su clave (`KEY`) en `BRANDS`, y toda la lógica sale de la especificación.
+    """
+    KEY = None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if cls.KEY is None:
+            return
+        cls.SCHEMA = BrandSchema(BRANDS[cls.KEY])
+        cls.BRAND_CAP = cls.SCHEMA.brand
+        cls.BRAND_LOWER = cls.SCHEMA.brand.lower()
+        cls.BRAND_UPPER = cls.SCHEMA.brand.upper()
+        cls.columns = cls.SCHEMA.columns
+        cls.columns_to_drop = cls.SCHEMA.columns_to_drop
 
     def __init__(self, filepath:str) -> None:
         self.filepath = filepath
-        self.df = pd.read_excel(filepath, engine=get_engine(filepath))  # read data
-        self.df = self.df.iloc[1:]                                      # delete the first row (wrong headers)
-        self.df.columns = Isdin.columns                                 # rename columns
-        self.df = self.df.drop(columns=Isdin.columns_to_drop)
-        self.df = clear_dataframe(self.df)                              # clean dataframe
+        self.df = self.SCHEMA.read(filepath)[0]
 
         # Get some parameters
         self.n_samples = self.df.shape[0]
         self.n_features = self.df.shape[1]
-        self.n_words = self.df.map(lambda x: len(x.split(' '))).sum().sum()
-        self.n_chars = self.df.map(lambda x: len(x)).sum().sum()
-
-    def unify(self) -> pd.DataFrame:
-        """Unify main dataframe. Reduce columns to: product, code, features.
-        Column names: 'Producto', 'Código' and 'Descripción'.
-
-        Returns:
-            pd.DataFrame: A modified copy of the main dataframe, with the only three common columns.
-        """
-        df = self.df.copy()
-
-        # Build name field
-        name = df['nombre']
-        name = name.apply(lambda s: f"Producto {s}. Marca {Isdin.BRAND_CAP}." if s else f"Marca {Isdin.BRAND_CAP}.")
-        name = name.apply(lambda s: reduce_dots(s))
-
-        # Build code field
-        code = df[['id', 'codigo', 'sku', 'ean']]
-        code = code.apply(lambda row: row.to_list(), axis=1)
-        code_kustom = []
-        for row in code:
-            s = ''
-            s += f"Id {row[0]}. " if row[0] else ''
-            s += f"Código {row[1]}. " if row[1] else ''
-            s += f"Código SKU {row[2]}. " if row[2] else ''
-            s += f"Código EAN {row[3]}." if row[3] else ''
-            code_kustom.append(s)
-        code = pd.Series(code_kustom)
-        code = code.apply(lambda s: reduce_dots(s))
-
-        features = df[['descripcion', 'generales', 'variante']]
-        features = features.apply(lambda row: row.to_list(), axis=1)
-        features_kustom = []
-        for row in features:
-            s = ''
-            s += f"Descripción: {row[0]}. " if row[0] else ''
-            s += f"{row[1]}. " if row[1] else ''
-            s += f"{row[2]}." if row[2] else ''
-            features_kustom.append(s)
-        features = pd.Series(features_kustom)
-        features = features.apply(lambda s: reduce_dots(s))
-
-        # Reset index before building dataframe
-        name.reset_index(drop=True, inplace=True)
-        code.reset_index(drop=True, inplace=True)
-        features.reset_index(drop=True, inplace=True)
-        # Build unify dataframe
-        dataframe = pd.DataFrame(data={'Producto':name, 'Código':code, 'Descripción':features})
-        dataframe = dataframe.map(str)
-        dataframe = dataframe.apply(lambda s: s.replace('nan', ''))
-
-        return dataframe
-    
-    def to_txt(self, folderpath: str='../data/txt/bybrand/isdin/', separate: bool=False) -> None:
-        dataframe = self.unify()
-        lines = [f"{name} {code} {features}" for name, code, features in 
-                 zip(dataframe['Producto'], dataframe['Código'], dataframe['Descripción'])]
-        brand = Isdin.BRAND_LOWER
-        
-        if separate:
-            n_lines = len(lines)
-            for i, line in enumerate(lines):
-                i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
-                filepath = folderpath + f'{brand}_{i}.txt'
-                with open(filepath, 'w') as f:
-                    f.write(line + '\n')
-
-        filepath = folderpath + f'{brand}_all.txt'
-        with open(filepath, 'w') as f:
-            for line in lines[:-1]:
-                f.write(line + '\n')
-            f.write(lines[-1])
-        f.close()
-
-    def to_sql(self, dbname:str, tablename:str):
-        df = self._prepare_to_llm()
-        engine = create_engine(f'sqlite:{dbname}')
-        df.to_sql(f'{tablename}', con=engine, if_exists='replace', index=False)
+        self.n_words = count_words(self.df)
+        self.n_chars = count_chars(self.df)
 
-
-class Loreal(object):
-    BRAND_LOWER = 'loreal'
-    BRAND_UPPER = 'LOREAL'
-    BRAND_CAP = 'Loreal'
-    columns = {0:["categoria", "marca", "franquicia", "subfranquicia", "ean", "titulo", 
-              "tipo", "descripcion", "beneficios", "aplicacion", "piel", "uso", "zona", "efecto", 
-              "hipoalergenico", "crosselling", "keywords", "tamaño", "unidades", "link", "0", "1"], 
-           1:["categoria", "marca", "franquicia", "subfranquicia", "ean", "titulo", 
-              "tipo", "descripcion", "beneficios", "aplicacion", "crosselling", "keywords", 
-              "hipoalergenico", "pelo", "uso", "tamaño", "unidades", "link", "0"], 
-           2:["categoria", "marca", "franquicia", "subfranquicia", "ean", "titulo", "color", 
-              "numero", "nombre", "tipo de producto", "descripcion", "presentacion", "beneficios", 
-              "aplicacion", "crosselling", "keywords", "hipoalergenico", "tamaño", "unidades", "link"],
-           3:["categoria", "ean", "marca", "franquicia", "subfranquicia", "titulo", "tipo de producto", 
-              "resumen", "descripcion", "adicionales", "presentacion", "beneficio 1", "beneficio 2", 
-              "beneficio 3", "aplicacion", "crosselling", "keywords", "hipoalergenico", "piel", "uso", 
-              "zona", "efecto", "codigo hexa", "tamaño", "unidades"],
-           4:["categoria", "marca", "ean", "franquicia", "subfranquicia", "zona", "titulo", 
-              "color", "numero", "nombre", "tipo de producto", "descripcion", "beneficios", 
-              "aplicacion", "piel", "uso", "efecto", "hipoalergenico", "crosselling", "keywords", 
-              "tamaño", "unidades", "link"]}
-    columns_to_drop = {0:["crosselling", "link", "0", "1"], 
-                    1:["crosselling", "link", "0"],
-                    2:["color", "numero", "nombre", "crosselling", "link"],
-                    3:["efecto", "codigo hexa"],
-                    4:["color", "numero", "nombre", "crosselling", "link"]}
-
-    def __init__(self, filepath:str, n_sheets) -> None:
-        self.filepath = filepath
-        self.n_sheets = n_sheets
-        self.df_list = []
-        for i in range(n_sheets):
-            df = pd.read_excel(filepath, sheet_name=i, engine=get_engine(filepath))
-            df.columns = Loreal.columns[i]
-            df.drop(columns=Loreal.columns_to_drop[i], inplace=True)
-            df = clear_dataframe(df)
-            self.df_list.append(df)
-
-        # Get some parameters
-        self.n_samples = [df.shape[0] for df in self.df_list]
-        self.n_features = [df.shape[1] for df in self.df_list]
-        self.n_words = [df.map(lambda x: len(x.split(' '))).sum().sum() for df in self.df_list]
-        self.n_chars = [df.map(lambda x: len(x)).sum().sum() for df in self.df_list]
+    @property
+    def dataframes(self) -> list:
+        return [self.df]
 
     def unify(self) -> pd.DataFrame:
         """Unify main dataframe. Reduce columns to: product, code, features.
@@ -834,458 +664,66 @@ class Loreal(object):
         Returns:
             pd.DataFrame: A modified copy of the main dataframe, with the only three common columns.
         """
-        dataframes = []
-
-        for i, df_i in enumerate(self.df_list):
-            df = df_i.copy()
-
-            # Build name field
-            name = df[['marca', 'titulo']]
-            name = name.apply(lambda row: row.to_list(), axis=1)
-            name_kustom = []
-            for row in name:
-                s = ''
-                s += f"Marca {row[0]}. " if row[0] else ''
-                s += f"Título: {row[1]}." if row[1] else ''
-                name_kustom.append(s)
-            name = pd.Series(name_kustom)
-            name = name.apply(lambda s: reduce_dots(s))
-
-            # Build code field
-            code = df['ean']
-            code = code.apply(lambda s: f"Código EAN {s}." if s else '')
-            code = code.apply(lambda s: reduce_dots(s))
-
-            # Build features field
-            keywords = df['keywords']
-            keywords = keywords.apply(lambda kws: make_keywords([kws]))
-            keywords = keywords.apply(lambda s: reduce_dots(s))
-            keywords = keywords.apply(lambda s: f"Keywords: {s}" if s else '')
-
-            presentation = df[["tamaño", "unidades"]]
-            presentation = presentation.apply(lambda row: row.to_list(), axis=1)
-            presentation_kustom = []
-            for row in presentation:
-                if row[0] and row[1]:
-                    s = f"Presentación {row[0]}{row[1]}."
-                else:
-                    s = ''
-                presentation_kustom.append(s)
-            presentation = pd.Series(presentation_kustom)
-            presentation = presentation.apply(lambda s: reduce_dots(s))
-
-            no_features_columns = ["marca", "titulo", "ean", "tamaño", "unidades", "keywords", "tamaño", "unidades"]
-            features_columns = [col for col in Loreal.columns[i] 
-                                if col not in no_features_columns and 
-                                col not in Loreal.columns_to_drop[i]]
-            features = df[features_columns]
-            features = features.apply(lambda row: row.to_list(), axis=1)
-            features_kustom = []
-            for fts, ppt, kws in zip(features, presentation, keywords):
-                s = ''
-                for i, column_name in enumerate(features_columns):
-                    s += f"{column_name.capitalize()}: {fts[i]}. " if fts[i] else ''
-                s += f"{ppt} " if ppt else ''
-                s += f"{kws}" if kws else ''
-                features_kustom.append(s)
-            features = pd.Series(features_kustom)
-            features = features.apply(lambda s: reduce_dots(s))
-
-            # Reset index before building dataframe
-            name.reset_index(drop=True, inplace=True)
-            code.reset_index(drop=True, inplace=True)
-            features.reset_index(drop=True, inplace=True)
-            # Build unify dataframe
-            dataframe = pd.DataFrame(data={'Producto':name, 'Código':code, 'Descripción':features})
-            dataframe = dataframe.map(str)
-            dataframe = dataframe.apply(lambda s: s.replace('nan', ''))
-            dataframes.append(dataframe)
-        
-        # Concatenate dataframes
-        main_df = pd.concat(dataframes, ignore_index=True)
-        condition = (main_df['Producto']=='') & (main_df['Código']=='')
-        main_df = main_df[~condition]
-
-        return main_df
-
-    def to_txt(self, folderpath: str='../data/txt/bybrand/loreal/', separate: bool=False) -> None:
-        dataframe = self.unify()
-        lines = [f"{name} {code} {features}" for name, code, features in 
-                 zip(dataframe['Producto'], dataframe['Código'], dataframe['Descripción'])]
-        brand = Loreal.BRAND_LOWER
-        
-        if separate:
-            n_lines = len(lines)
-            for i, line in enumerate(lines):
-                i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
-                filepath = folderpath + f'{brand}_{i}.txt'
-                with open(filepath, 'w') as f:
-                    f.write(line + '\n')
-
-        filepath = folderpath + f'{brand}_all.txt'
-        with open(filepath, 'w') as f:
-            for line in lines[:-1]:
-                f.write(line + '\n')
-            f.write(lines[-1])
-        f.close()
+        return self.SCHEMA.build(self.dataframes)
+
+    def to_txt(self, folderpath: str=None, separate: bool=False) -> None:
+        folderpath = folderpath or f'../data/txt/bybrand/{self.KEY}/'
+        write_lines(self.SCHEMA.to_lines(self.unify()), folderpath, self.BRAND_LOWER, separate)
 
     def to_sql(self, dbname:str, tablename:str):
-        df = self._prepare_to_llm()
-        engine = create_engine(f'sqlite:{dbname}')
+        df = self.unify()
+        engine = create_engine(f'sqlite:///{dbname}')
         df.to_sql(f'{tablename}', con=engine, if_exists='replace', index=False)
 
-
-class Revlon(object):
-    BRAND_LOWER = 'revlon'
-    BRAND_UPPER = 'REVLON'
-    BRAND_CAP = 'Revlon'
-    columns = {0:["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt", 
-                  "caracteristicas", "codigo sap", "ean", "merch code", "tono", "stock"], 
-               1:["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt", 
-                  "caracteristicas", "codigo sap", "ean", "merch code", "tono", "stock"], 
-               2:["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt", 
-                  "caracteristicas", "codigo sap", "ean", "merch code", "stock"],
-               3:["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt", 
-                  "caracteristicas", "codigo sap", "ean", "merch code", "tono", "stock"],
-              4:["tipo", "categoria", "subcategoria", "familia", "product", "producto", "descripcion mkt", 
-                 "caracteristicas", "codigo sap", "ean", "stock"]}
-    columns_to_drop = ["stock"]
+class MultiSheetBrand(Brand):
+    """Marca cuyo libro tiene una hoja por línea de productos, con disposiciones distintas."""
 
     def __init__(self, filepath:str, n_sheets) -> None:
         self.filepath = filepath
         self.n_sheets = n_sheets
-        self.df_list = []
-        for i in range(n_sheets):
-            df = pd.read_excel(filepath, sheet_name=i, engine=get_engine(filepath))
-            df.columns = Revlon.columns[i]
-            df.drop(columns=Revlon.columns_to_drop, inplace=True)
-            df = clear_dataframe(df)
-            self.df_list.append(df)
+        self.df_list = self.SCHEMA.read(filepath, n_sheets)
 
         # Get some parameters
         self.n_samples = [df.shape[0] for df in self.df_list]
         self.n_features = [df.shape[1] for df in self.df_list]
-        self.n_words = [df.map(lambda x: len(x.split(' '))).sum().sum() for df in self.df_list]
-        self.n_chars = [df.map(lambda x: len(x)).sum().sum() for df in self.df_list]
+        self.n_words = [count_words(df) for df in self.df_list]
+        self.n_chars = [count_chars(df) for df in self.df_list]
 
-    def unify(self) -> pd.DataFrame:
-        """Unify main dataframe. Reduce columns to: product, code, features.
-        Column names: 'Producto', 'Código' and 'Descripción'.
-
-        Returns:
-            pd.DataFrame: A modified copy of the main dataframe, with the only three common columns.
-        """
-        dataframes = []
+    @property
+    def dataframes(self) -> list:
+        return self.df_list
 
-        for i, df_i in enumerate(self.df_list):
-            df = df_i.copy()
-            
-            # Build name field
-            name = df[["product", "producto"]]
-            name = name.apply(lambda row: row.to_list(), axis=1)
-            name_kustom = []
-            for row in name:
-                s = ''
-                s += f"Marca {Revlon.BRAND_CAP}. "
-                s += f"Product {row[0]}. " if row[0] else ''
-                s += f"Producto {row[1]}." if row[1] else ''
-                name_kustom.append(s)
-            name = pd.Series(name_kustom)
-            name = name.apply(lambda s: reduce_dots(s))
-
-            # Build code field
-            code_columns = ["codigo sap", "ean"]
-            code_columns += ["merch code"] if "merch code" in Revlon.columns[i] else []
-            code = df[code_columns]
-            code = code.apply(lambda row: row.to_list(), axis=1)
-            code_kustom = []
-            for row in code:
-                s = ''
-                s += f"Código SAP {row[0]}. " if row[0] else ''
-                s += f"Código EAN {row[1]}. " if row[1] else ''
-                if "merch code" in Revlon.columns[i]:
-                    s += f"Merch code {row[2]}." if row[2] else ''
-                code_kustom.append(s)
-            code = pd.Series(code_kustom)
-            code = code.apply(lambda s: reduce_dots(s))
-
-            # Build features field
-            no_features_columns = ["product", "producto", "codigo sap", "ean"]
-            no_features_columns += ["merch code"] if "merch code" in Revlon.columns[i] else []
-            features_columns = [col for col in Revlon.columns[i] 
-                                if col not in no_features_columns and 
-                                col not in Revlon.columns_to_drop]
-            features = df[features_columns]
-            features = features.apply(lambda row: row.to_list(), axis=1)
-            features_kustom = []
-            for fts in features:
-                s = ''
-                for i, column_name in enumerate(features_columns):
-                    s += f"{column_name.capitalize()}: {fts[i]}. " if fts[i] else ''
-                features_kustom.append(s)
-            features = pd.Series(features_kustom)
-            features = features.apply(lambda s: reduce_dots(s))
-
-            # Reset index before building dataframe
-            name.reset_index(drop=True, inplace=True)
-            code.reset_index(drop=True, inplace=True)
-            features.reset_index(drop=True, inplace=True)
-            # Build unify dataframe
-            dataframe = pd.DataFrame(data={'Producto':name, 'Código':code, 'Descripción':features})
-            dataframe = dataframe.map(str)
-            dataframe = dataframe.apply(lambda s: s.replace('nan', ''))
-            dataframes.append(dataframe)
-
-        # Concatenate dataframes
-        main_df = pd.concat(dataframes, ignore_index=True)
-        condition = (main_df['Producto']=='') & (main_df['Código']=='')
-        main_df = main_df[~condition]
-
-        return main_df
-    
-    def to_txt(self, folderpath: str='../data/txt/bybrand/revlon/', separate: bool=False) -> None:
-        dataframe = self.unify()
-        lines = [f"{name} {code} {features}" for name, code, features in 
-                 zip(dataframe['Producto'], dataframe['Código'], dataframe['Descripción'])]
-        brand = Revlon.BRAND_LOWER
-        
-        if separate:
-            n_lines = len(lines)
-            for i, line in enumerate(lines):
-                i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
-                filepath = folderpath + f'{brand}_{i}.txt'
-                with open(filepath, 'w') as f:
-                    f.write(line + '\n')
-
-        filepath = folderpath + f'{brand}_all.txt'
-        with open(filepath, 'w') as f:
-            for line in lines[:-1]:
-                f.write(line + '\n')
-            f.write(lines[-1])
-        f.close()
-
-    def to_sql(self, dbname:str, tablename:str):
-        df = self._prepare_to_llm()
-        engine = create_engine(f'sqlite:{dbname}')
-        df.to_sql(f'{tablename}', con=engine, if_exists='replace', index=False)
 
+class Cepage(Brand):
+    KEY = 'cepage'
 
-class Vichy(object):
-    BRAND_LOWER = 'vichy'
-    BRAND_UPPER = 'VICHY'
-    BRAND_CAP = 'Vichy'
-    columns = ["codigo", "sku", "ean", "producto", "uso", "marca", "ml_code", "descripcion"]
-    columns_to_drop = ["ml_code"]
+class Cetaphil(Brand):
+    KEY = 'cetaphil'
 
-    def __init__(self, filepath:str) -> None:
-        self.filepath = filepath
-        self.df = pd.read_excel(filepath, engine=get_engine(filepath))
-        self.df.columns = Vichy.columns
-        self.df.drop(columns=Vichy.columns_to_drop, inplace=True)
-        self.df = clear_dataframe(self.df)
-
-        # Get some parameters
-        self.n_samples = self.df.shape[0]
-        self.n_features = self.df.shape[1]
-        self.n_words = self.df.map(lambda x: len(x.split(' '))).sum().sum()
-        self.n_chars = self.df.map(lambda x: len(x)).sum().sum()
-
-    def unify(self) -> pd.DataFrame:
-        """Unify main dataframe. Reduce columns to: product, code, features.
-        Column names: 'Producto', 'Código' and 'Descripción'.
-
-        Returns:
-            pd.DataFrame: A modified copy of the main dataframe, with the only three common columns.
-        """
-        df = self.df.copy()
-        
-        # Build name field
-        name = df[["producto", "marca"]]
-        name = name.apply(lambda row: row.to_list(), axis=1)
-        name_kustom = []
-        for row in name:
-            s = ''
-            s += f"Product {row[0]}. " if row[0] else ''
-            s += f"Marca {row[1]}." if row[1] else ''
-            name_kustom.append(s)
-        name = pd.Series(name_kustom)
-        name = name.apply(lambda s: reduce_dots(s))
-
-        # Build code field
-        code = df[["codigo", "sku", "ean"]]
-        code = code.apply(lambda row: row.to_list(), axis=1)
-        code_kustom = []
-        for row in code:
-            s = ''
-            s += f"Código {row[0]}. " if row[0] else ''
-            s += f"Código SKU {row[1]}. " if row[1] else ''
-            s += f"Código EAN {row[1]}. " if row[1] else ''
-            code_kustom.append(s)
-        code = pd.Series(code_kustom)
-        code = code.apply(lambda s: reduce_dots(s))
-
-        # Build features field
-        no_features_columns = ["producto", "marca", "codigo", "sku", "ean"]
-        features_columns = [col for col in Vichy.columns 
-                            if col not in no_features_columns and 
-                            col not in Vichy.columns_to_drop]
-        features = df[features_columns]
-        features = features.apply(lambda row: row.to_list(), axis=1)
-        features_kustom = []
-        for fts in features:
-            s = ''
-            for i, column_name in enumerate(features_columns):
-                s += f"{column_name.capitalize()}: {fts[i]}. " if fts[i] else ''
-            features_kustom.append(s)
-        features = pd.Series(features_kustom)
-        features = features.apply(lambda s: reduce_dots(s))
-
-        # Reset index before building dataframe
-        name.reset_index(drop=True, inplace=True)
-        code.reset_index(drop=True, inplace=True)
-        features.reset_index(drop=True, inplace=True)
-        # Build unify dataframe
-        dataframe = pd.DataFrame(data={'Producto':name, 'Código':code, 'Descripción':features})
-        dataframe = dataframe.map(str)
-        dataframe = dataframe.apply(lambda s: s.replace('nan', ''))
-
-        # Concatenate dataframes
-        condition = (dataframe['Producto']=='') & (dataframe['Código']=='')
-        dataframe = dataframe[~condition]
+class Eucerin(Brand):
+    KEY = 'eucerin'
 
-        return dataframe
-    
-    def to_txt(self, folderpath: str='../data/txt/bybrand/vichy/', separate: bool=False) -> None:
-        dataframe = self.unify()
-        lines = [f"{name} {code} {features}" for name, code, features in 
-                 zip(dataframe['Producto'], dataframe['Código'], dataframe['Descripción'])]
-        brand = Vichy.BRAND_LOWER
-        
-        if separate:
-            n_lines = len(lines)
-            for i, line in enumerate(lines):
-                i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
-                filepath = folderpath + f'{brand}_{i}.txt'
-                with open(filepath, 'w') as f:
-                    f.write(line + '\n')
-
-        filepath = folderpath + f'{brand}_all.txt'
-        with open(filepath, 'w') as f:
-            for line in lines[:-1]:
-                f.write(line + '\n')
-            f.write(lines[-1])
-        f.close()
-
-    def to_sql(self, dbname:str, tablename:str):
-        df = self._prepare_to_llm()
-        engine = create_engine(f'sqlite:{dbname}')
-        df.to_sql(f'{tablename}', con=engine, if_exists='replace', index=False)
+    def unify_simple(self) -> pd.DataFrame:
+        return self.SCHEMA.build(self.dataframes, layout='simple')
 
+    def to_txt(self, dataframe, folderpath: str='../data/txt/bybrand/eucerin/', separate: bool=False) -> None:
+        lines = [' '.join(list(row[1].values)) for row in dataframe.iterrows()]
+        write_lines(lines, folderpath, self.BRAND_LOWER, separate)
 
-class LRP(object):
-    BRAND_CAP = "La Roche-Posay"
-    BRAND_LOWER = "la roche-posay"
-    BRAND_UPPER = "LA ROCHE-POSAY"
-    columns = ["ean", "producto", "descripcion", "tamaño", "unidades", "composicion", 
-               "beneficio 1", "beneficio 2", "beneficio 3", "uso", "keywords"]
-    
-    def __init__(self, filepath:str) -> None:
-        self.filepath = filepath
-        self.df = pd.read_excel(filepath, engine=get_engine(filepath))
-        self.df.columns = LRP.columns
-        self.df = clear_dataframe(self.df)
+class Eximia(Brand):
+    KEY = 'eximia'
 
-        # Get some parameters
-        self.n_samples = self.df.shape[0]
-        self.n_features = self.df.shape[1]
-        self.n_words = self.df.map(lambda x: len(x.split(' '))).sum().sum()
-        self.n_chars = self.df.map(lambda x: len(x)).sum().sum()
+class Isdin(Brand):
+    KEY = 'isdin'
 
-    def unify(self) -> pd.DataFrame:
-        """Unify main dataframe. Reduce columns to: product, code, features.
-        Column names: 'Producto', 'Código' and 'Descripción'.
+class Loreal(MultiSheetBrand):
+    KEY = 'loreal'
 
-        Returns:
-            pd.DataFrame: A modified copy of the main dataframe, with the only three common columns.
-        """
-        df = self.df.copy()
-
-        # Build name field
-        name = df['producto']
-        name = name.apply(lambda s: f"Producto {s}. Marca {LRP.BRAND_CAP}." if s else f"Marca {LRP.BRAND_CAP}.")
-        name = name.apply(lambda s: reduce_dots(s))
-
-        # Build code field
-        code = df['ean']
-        code = code.apply(lambda s: f"Código EAN {s}." if s else '')
-        code = code.apply(lambda s: reduce_dots(s))
-
-        # Build features field
-        keywords = df['keywords']
-        keywords = keywords.apply(lambda kws: make_keywords([kws]))
-        keywords = keywords.apply(lambda s: reduce_dots(s))
-        keywords = keywords.apply(lambda s: f"Keywords: {s}" if s else '')
-
-        presentation = df[["tamaño", "unidades"]]
-        presentation = presentation.apply(lambda row: row.to_list(), axis=1)
-        presentation_kustom = []
-        for row in presentation:
-            if row[0] and row[1]:
-                s = f"Presentación {row[0]}{row[1]}."
-            else:
-                s = ''
-            presentation_kustom.append(s)
-        presentation = pd.Series(presentation_kustom)
-        presentation = presentation.apply(lambda s: reduce_dots(s))
-
-        no_features_columns = ["producto", "ean", "tamaño", "unidades", "keywords"]
-        features_columns = [col for col in df.columns if col not in no_features_columns]
-        features = df[features_columns]
-        features = features.apply(lambda row: row.to_list(), axis=1)
-        features_kustom = []
-        for fts, ppt, kws in zip(features, presentation, keywords):
-            s = ''
-            for i, column_name in enumerate(features_columns):
-                s += f"{column_name.capitalize()}: {fts[i]}. " if fts[i] else ''
-            s += f"{ppt} " if ppt else ''
-            s += f"{kws}" if kws else ''
-            features_kustom.append(s)
-        features = pd.Series(features_kustom)
-        features = features.apply(lambda s: reduce_dots(s))
-        
-        # Reset index before building dataframe
-        name.reset_index(drop=True, inplace=True)
-        code.reset_index(drop=True, inplace=True)
-        features.reset_index(drop=True, inplace=True)
-        # Build unify dataframe
-        dataframe = pd.DataFrame(data={'Producto':name, 'Código':code, 'Descripción':features})
-        dataframe = dataframe.map(str)
-        dataframe = dataframe.apply(lambda s: s.replace('nan', ''))
+class Revlon(MultiSheetBrand):
+    KEY = 'revlon'
 
-        return dataframe
-    
-    def to_txt(self, folderpath: str='../data/txt/bybrand/lrp/', separate: bool=False) -> None:
-        dataframe = self.unify()
-        lines = [f"{name} {code} {features}" for name, code, features in 
-                 zip(dataframe['Producto'], dataframe['Código'], dataframe['Descripción'])]
-        brand = LRP.BRAND_LOWER
-        
-        if separate:
-            n_lines = len(lines)
-            for i, line in enumerate(lines):
-                i = '0'*(len(str(n_lines)) - len(str(i+1))) + str(i+1)
-                filepath = folderpath + f'{brand}_{i}.txt'
-                with open(filepath, 'w') as f:
-                    f.write(line + '\n')
-
-        filepath = folderpath + f'{brand}_all.txt'
-        with open(filepath, 'w') as f:
-            for line in lines[:-1]:
-                f.write(line + '\n')
-            f.write(lines[-1])
-        f.close()
+class Vichy(Brand):
+    KEY = 'vichy'
 
-    def to_sql(self, dbname:str, tablename:str):
-        df = self._prepare_to_llm()
-        engine = create_engine(f'sqlite:{dbname}')
-        df.to_sql(f'{tablename}', con=engine, if_exists='replace', index=False)
\ No newline at end of file
+class LRP(Brand):
+    KEY = 'lrp'
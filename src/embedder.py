@@ -0,0 +1,346 @@
+import os, time, random, hashlib, logging, threading
+import numpy as np
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from src.tokens import count_tokens
+
+logger_embedder = logging.getLogger(name=__name__)
+
+MAX_BATCH_TOKENS = 100000   # tokens per embedding request (the API accepts up to 300k)
+MAX_BATCH_ITEMS  = 512      # texts per embedding request (the API accepts up to 2048)
+MAX_CONCURRENCY  = 4        # embedding requests in flight
+MAX_RETRIES      = 8        # attempts per batch before giving up
+BASE_DELAY       = 1.0      # seconds, first retry delay (doubles on each retry)
+MAX_DELAY        = 60.0     # seconds, retry delay cap
+BATCH_WINDOW_MS  = 5.0      # ms a query waits for others before its batch is sent
+BATCH_MAX_SIZE   = 16       # queries per batched request (sent right away when full)
+QUERY_TIMEOUT    = 10.0     # seconds a query waits for its embedding
+STATS_EVERY      = 100      # batches between query batcher metrics in the log
+
+# Process-wide query batcher, shared by every session (see shared_query_batcher)
+_query_batcher = {'batcher': None, 'lock': threading.Lock()}
+
+def token_batches(texts: list, max_tokens: int=MAX_BATCH_TOKENS, max_items: int=MAX_BATCH_ITEMS) -> list:
+    """
+    Partir una lista de textos en lotes consecutivos acotados en tokens y en cantidad de textos.
+    Un texto que supera `max_tokens` por sí solo forma su propio lote.
+
+    Args:
+        texts (list): Textos a partir.
+        max_tokens (int, optional): Máximo de tokens por lote. Por defecto es MAX_BATCH_TOKENS.
+        max_items (int, optional): Máximo de textos por lote. Por defecto es MAX_BATCH_ITEMS.
+
+    Returns:
+        list: Lista de lotes, cada uno como un rango (inicio, fin) de índices.
+    """
+    batches, start, tokens = [], 0, 0
+    for i, text in enumerate(texts):
+        n_tokens = count_tokens(text)
+        if i > start and (tokens + n_tokens > max_tokens or i - start >= max_items):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += n_tokens
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+def is_rate_limit(error: Exception) -> bool:
+    """Si el error es un límite de tasa (RateLimitError de openai o un HTTP 429)."""
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    return type(error).__name__ == 'RateLimitError' or status == 429
+
+def is_transient(error: Exception) -> bool:
+    """Si vale la pena reintentar: límite de tasa, error 5xx del servidor o error de conexión o de tiempo de espera."""
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    return (is_rate_limit(error) or (isinstance(status, int) and status >= 500) or isinstance(error, (ConnectionError, TimeoutError))
+            or type(error).__name__ in ('APIConnectionError', 'APITimeoutError', 'InternalServerError'))
+
+def retry_after(error: Exception):
+    """Segundos de espera sugeridos por el servidor (cabecera `retry-after`), o None."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+class AdaptiveLimiter(object):
+    """
+    Semáforo cuyo límite se adapta: se reduce a la mitad ante un límite de tasa y crece de a uno
+    tras una racha de lotes exitosos, sin superar el máximo.
+    """
+
+    def __init__(self, limit: int, success_streak: int=4) -> None:
+        self.max_limit = limit
+        self.limit = limit
+        self.in_flight = 0
+        self.successes = 0
+        self.success_streak = success_streak
+        self.condition = threading.Condition()
+
+    def __enter__(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def success(self) -> None:
+        with self.condition:
+            self.successes += 1
+            if self.successes >= self.success_streak and self.limit < self.max_limit:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify_all()
+
+    def throttle(self) -> None:
+        with self.condition:
+            self.limit = max(1, self.limit // 2)
+            self.successes = 0
+
+class EmbeddingJob(object):
+    """
+    Trabajo de embeddings por lotes, reanudable. Los textos se parten en lotes acotados en tokens,
+    los lotes se envían con concurrencia acotada y adaptativa, y cada lote terminado se guarda en
+    `checkpoint_folderpath` con el hash de su contenido y del modelo como nombre: si el trabajo se
+    interrumpe, la siguiente ejecución solo calcula los lotes que faltan. Solo se reintentan los
+    errores transitorios (ver `is_transient`).
+
+    Examples:
+        >>> embedding = OpenAIEmbeddings(max_retries=0)
+        >>> job = EmbeddingJob(embedding.embed_documents, 'database/embeddings/', embedding.model, embedding.dimensions)
+        >>> vectors = job.run(texts)
+    """
+
+    def __init__(self, embed, checkpoint_folderpath: str=None, model: str=None, dimensions: int=None,
+                 max_tokens: int=MAX_BATCH_TOKENS, max_items: int=MAX_BATCH_ITEMS, concurrency: int=MAX_CONCURRENCY,
+                 max_retries: int=MAX_RETRIES, base_delay: float=BASE_DELAY, max_delay: float=MAX_DELAY,
+                 sleep=time.sleep) -> None:
+        """
+        Args:
+            embed (callable): Función que recibe una lista de textos y devuelve sus embeddings.
+            checkpoint_folderpath (str, optional): Carpeta de los lotes terminados. Si es None, no se guardan.
+            model (str, optional): Modelo de embeddings; forma parte del nombre de los lotes guardados.
+            dimensions (int, optional): Dimensiones pedidas al modelo; también forman parte del nombre.
+            max_tokens (int, optional): Máximo de tokens por lote. Por defecto es MAX_BATCH_TOKENS.
+            max_items (int, optional): Máximo de textos por lote. Por defecto es MAX_BATCH_ITEMS.
+            concurrency (int, optional): Máximo de lotes en curso. Por defecto es MAX_CONCURRENCY.
+            max_retries (int, optional): Intentos por lote. Por defecto es MAX_RETRIES.
+            base_delay (float, optional): Espera antes del primer reintento, en segundos. Por defecto es BASE_DELAY.
+            max_delay (float, optional): Espera máxima entre reintentos, en segundos. Por defecto es MAX_DELAY.
+            sleep (callable, optional): Función de espera. Por defecto es time.sleep.
+        """
+        self.embed = embed
+        self.checkpoint_folderpath = checkpoint_folderpath
+        self.model = model
+        self.dimensions = dimensions
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.stats = {'batches': 0, 'resumed': 0, 'retries': 0, 'rate_limits': 0}
+        self.lock = threading.Lock()
+
+    def _checkpoint(self, texts: list) -> str:
+        # Vectors from another model (or dimensions) must never be reused
+        digest = hashlib.sha256(f"{self.model}:{self.dimensions}\0".encode('utf-8'))
+        for text in texts:
+            digest.update(text.encode('utf-8'))
+            digest.update(b'\0')
+        return os.path.join(self.checkpoint_folderpath, f'{digest.hexdigest()}.npy')
+
+    def _count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    def _run_batch(self, texts: list, limiter: AdaptiveLimiter) -> np.ndarray:
+        filepath = self._checkpoint(texts) if self.checkpoint_folderpath else None
+        if filepath and os.path.exists(filepath):
+            self._count('resumed')
+            return np.load(filepath)
+
+        for attempt in range(self.max_retries):
+            try:
+                with limiter:
+                    vectors = np.asarray(self.embed(texts), dtype=np.float64)
+                if vectors.shape[0] != len(texts):
+                    raise ValueError(f"Se esperaban {len(texts)} embeddings y se recibieron {vectors.shape[0]}.")
+                limiter.success()
+                break
+            except Exception as e:
+                if not is_transient(e) or attempt == self.max_retries - 1:
+                    raise
+                self._count('retries')
+                delay = min(self.max_delay, self.base_delay * 2**attempt) * random.uniform(0.5, 1.0)
+                if is_rate_limit(e):
+                    self._count('rate_limits')
+                    limiter.throttle()
+                    delay = max(delay, retry_after(e) or 0.0)
+                logger_embedder.warning(f"Lote de {len(texts)} textos falló ({type(e).__name__}: {e}), "
+                                        f"reintento {attempt + 1} en {delay:.1f} s.")
+                self.sleep(delay)
+
+        if filepath:
+            os.makedirs(self.checkpoint_folderpath, exist_ok=True)
+            temporary = f'{filepath}.{threading.get_ident()}.tmp.npy'
+            np.save(temporary, vectors)
+            os.replace(temporary, filepath)
+        self._count('batches')
+        return vectors
+
+    def run(self, texts: list) -> list:
+        """
+        Calcular los embeddings de una lista de textos.
+
+        Args:
+            texts (list): Textos.
+
+        Returns:
+            list: Embedding de cada texto (lista de floats), en el mismo orden.
+        """
+        batches = token_batches(texts, self.max_tokens, self.max_items)
+        limiter = AdaptiveLimiter(self.concurrency)
+        logger_embedder.info(f"Embeddings de {len(texts)} textos en {len(batches)} lotes.")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(lambda batch: self._run_batch(texts[batch[0]:batch[1]], limiter), batches))
+        logger_embedder.info(f"Embeddings terminados: {self.stats}")
+        return [vector.tolist() for vectors in results for vector in vectors]
+
+    __call__ = run
+
+class QueryBatcher(object):
+    """
+    Embeddings de consultas agrupados entre sesiones: cada consulta espera como máximo
+    `window_ms` a que lleguen otras (o hasta juntar `max_batch`) y se envían todas en un solo
+    pedido. Cada llamador recibe su propio `Future`. Los lotes se envían en otros hilos, así que
+    mientras un lote espera la respuesta se sigue armando el siguiente.
+
+    Tiene la interfaz de `Embeddings` de langchain (`embed_query`, `embed_documents`), así que
+    se puede pasar como función de embeddings al vectorstore.
+
+    Examples:
+        >>> batcher = QueryBatcher(OpenAIEmbeddings().embed_documents, window_ms=5, max_batch=16)
+        >>> vector = batcher.embed_query("protector solar para piel grasa")
+    """
+
+    def __init__(self, embed, window_ms: float=BATCH_WINDOW_MS, max_batch: int=BATCH_MAX_SIZE,
+                 concurrency: int=MAX_CONCURRENCY, stats_every: int=STATS_EVERY, timeout: float=QUERY_TIMEOUT) -> None:
+        """
+        Args:
+            embed (callable): Función que recibe una lista de textos y devuelve sus embeddings.
+            window_ms (float, optional): Espera máxima de una consulta antes de enviar su lote, en ms. Por defecto es BATCH_WINDOW_MS.
+            max_batch (int, optional): Máximo de consultas por lote. Por defecto es BATCH_MAX_SIZE.
+            concurrency (int, optional): Máximo de lotes en curso. Por defecto es MAX_CONCURRENCY.
+            stats_every (int, optional): Lotes entre registros de métricas en el log. Por defecto es STATS_EVERY.
+            timeout (float, optional): Segundos que `embed_query` espera su embedding. Por defecto es QUERY_TIMEOUT.
+        """
+        self.embed = embed
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.stats_every = stats_every
+        self.pending = []       # (text, future, submitted at)
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="query-embedder")
+        self.sizes = Counter()
+        self.delays = deque(maxlen=1000)    # queueing delay (ms) of the latest requests
+        self.requests = 0
+        threading.Thread(target=self._dispatch, name="query-batcher", daemon=True).start()
+
+    def submit(self, text: str) -> Future:
+        """Encolar una consulta. El `Future` devuelve su embedding (o la excepción del pedido)."""
+        future = Future()
+        with self.condition:
+            self.pending.append((text, future, time.perf_counter()))
+            self.condition.notify()
+        return future
+
+    def embed_query(self, text: str) -> list:
+        """
+        Embedding de una consulta, agrupada con las de otras sesiones.
+
+        Raises:
+            TimeoutError: Si el embedding no llega en `timeout` segundos.
+        """
+        future = self.submit(text)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()     # dropped from its batch if it was not sent yet
+            raise
+
+    def embed_documents(self, texts: list) -> list:
+        # Bulk embedding is already batched by the caller (see EmbeddingJob)
+        return self.embed(texts)
+
+    def _dispatch(self) -> None:
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending)
+                deadline = self.pending[0][2] + self.window
+                while len(self.pending) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                batch, self.pending = self.pending[:self.max_batch], self.pending[self.max_batch:]
+            self._record(batch)
+            self.executor.submit(self._run, batch)
+
+    def _run(self, batch: list) -> None:
+        # Queries whose caller timed out are dropped; the others can no longer be cancelled
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = list(dict.fromkeys(text for text, _, _ in batch))     # identical queries are embedded once
+        try:
+            vectors, error = dict(zip(texts, self.embed(texts))), None
+        except Exception as e:
+            vectors, error = {}, e
+        # Every caller gets a result or an exception, even if the response is short
+        for text, future, _ in batch:
+            if text in vectors:
+                future.set_result(vectors[text])
+            else:
+                future.set_exception(error or ValueError(f"Se esperaban {len(texts)} embeddings y se recibieron {len(vectors)}."))
+
+    def _record(self, batch: list) -> None:
+        now = time.perf_counter()
+        self.sizes[len(batch)] += 1
+        self.requests += len(batch)
+        self.delays.extend((now - submitted) * 1000 for _, _, submitted in batch)
+        if sum(self.sizes.values()) % self.stats_every == 0:
+            logger_embedder.info(f"Consultas agrupadas: {self.summary()}")
+
+    def summary(self) -> dict:
+        """
+        Métricas del agrupador.
+
+        Returns:
+            dict: Consultas, lotes, tamaño medio y máximo de lote, y espera en cola (media y p95, en ms) de las últimas consultas.
+        """
+        batches = sum(self.sizes.values())
+        delays = np.asarray(self.delays) if self.delays else np.zeros(1)
+        return {'requests': self.requests, 'batches': batches,
+                'mean_batch': round(self.requests / batches, 2) if batches else 0.0,
+                'max_batch': max(self.sizes) if self.sizes else 0,
+                'delay_ms_mean': round(float(delays.mean()), 2), 'delay_ms_p95': round(float(np.percentile(delays, 95)), 2)}
+
+def shared_query_batcher(embed, **kwargs) -> QueryBatcher:
+    """
+    Agrupador de consultas único del proceso. La primera llamada lo crea con `embed` y `kwargs`;
+    las siguientes (otras sesiones, o cada re-ejecución del script de Streamlit) devuelven el mismo.
+
+    Returns:
+        QueryBatcher: El agrupador compartido.
+    """
+    with _query_batcher['lock']:
+        if _query_batcher['batcher'] is None:
+            _query_batcher['batcher'] = QueryBatcher(embed, **kwargs)
+        return _query_batcher['batcher']
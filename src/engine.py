@@ -0,0 +1,134 @@
+import json, time, logging
+
+logger_engine = logging.getLogger(name=__name__)
+
+MAX_TOOL_ROUNDS = 4     # model calls per turn that may request tools; the next one must answer in text
+
+_specs = {}             # assistant id -> (model, instructions, tool schemas), fetched once per process
+
+def call_tool(tools: dict, name: str, arguments: str) -> str:
+    """
+    Ejecutar una herramienta pedida por el modelo. Lo usan los dos motores (Assistants y Chat Completions).
+
+    Args:
+        tools (dict): Nombre de la herramienta -> función que recibe el diccionario de argumentos.
+        name (str): Nombre de la herramienta.
+        arguments (str): Argumentos en JSON, como los envía el modelo.
+
+    Returns:
+        str: Salida de la herramienta, o un mensaje de error para el modelo (herramienta desconocida,
+            argumentos inválidos o error al ejecutarla).
+    """
+    if name not in tools:
+        logger_engine.warning(f"Herramienta desconocida: {name}.")
+        return f"La herramienta {name} no existe."
+    try:
+        args = json.loads(arguments) if arguments else {}
+    except json.JSONDecodeError:
+        logger_engine.warning(f"Argumentos inválidos para {name}: {arguments!r}.")
+        return f"Los argumentos de {name} no son un JSON válido."
+    try:
+        return tools[name](args)
+    except Exception as e:
+        # A tool that fails (e.g. the retrieval service is down) must not leave the run waiting for its output
+        logger_engine.exception(f"Error en la herramienta {name}.")
+        return f"La herramienta {name} falló ({type(e).__name__}); no hay datos disponibles por el momento."
+
+def assistant_spec(client, assistant_id: str) -> tuple:
+    """
+    Modelo, instrucciones y esquemas de funciones del asistente, en el formato de Chat Completions,
+    para que los dos motores usen el mismo prompt y las mismas herramientas. Se consulta una vez por proceso.
+
+    Args:
+        client: Cliente de OpenAI.
+        assistant_id (str): ID del asistente.
+
+    Returns:
+        tuple: Modelo, instrucciones y lista de esquemas de herramientas.
+    """
+    if assistant_id not in _specs:
+        assistant = client.beta.assistants.retrieve(assistant_id)
+        schemas = [{"type": "function", "function": tool.function.model_dump(exclude_none=True)}
+                   for tool in assistant.tools if tool.type == "function"]
+        _specs[assistant_id] = (assistant.model, assistant.instructions or "", schemas)
+    return _specs[assistant_id]
+
+class CompletionsEngine(object):
+    """
+    Motor local sobre la API de Chat Completions: la conversación se guarda en la app y las herramientas
+    se ejecutan en el proceso, sin hilos ni corridas del lado del servidor. Cada turno es un bucle de
+    llamadas en streaming hasta que el modelo responde con texto.
+    """
+
+    def __init__(self, client, model: str, instructions: str, schemas: list, run_tool,
+                 max_rounds: int=MAX_TOOL_ROUNDS) -> None:
+        """
+        Args:
+            client: Cliente de OpenAI (o uno compatible con `chat.completions.create`).
+            model (str): Modelo a usar.
+            instructions (str): Instrucciones de sistema.
+            schemas (list): Esquemas de las herramientas en el formato de Chat Completions.
+            run_tool (callable): Función que recibe el nombre de la herramienta y sus argumentos en JSON
+                y devuelve la salida (ver `call_tool`).
+            max_rounds (int, optional): Rondas con herramientas por turno. Por defecto es MAX_TOOL_ROUNDS.
+        """
+        self.client = client
+        self.model = model
+        self.instructions = instructions
+        self.schemas = schemas
+        self.run_tool = run_tool
+        self.max_rounds = max_rounds
+
+    def stream(self, messages: list, usage=None, additional_instructions: str=None):
+        """
+        Responder a la conversación, ejecutando las herramientas que pida el modelo.
+
+        Args:
+            messages (list): Mensajes `{'role', 'content'}` de la conversación, incluido el del usuario.
+            usage (TurnUsage, optional): Acumulador de tokens y latencias del turno.
+            additional_instructions (str, optional): Texto agregado a las instrucciones (ver `run_context`).
+
+        Yields:
+            str: Fragmentos de la respuesta a medida que llegan.
+        """
+        system = self.instructions + (f"\n\n{additional_instructions}" if additional_instructions else "")
+        messages = [{"role": "system", "content": system}] + [
+            {"role": message["role"], "content": message["content"]} for message in messages]
+
+        for step in range(self.max_rounds + 1):
+            kwargs = {"tools": self.schemas} if self.schemas else {}
+            if self.schemas and step == self.max_rounds:
+                kwargs["tool_choice"] = "none"
+            response = self.client.chat.completions.create(model=self.model, messages=messages, stream=True,
+                                                           stream_options={"include_usage": True}, **kwargs)
+            content, calls = [], {}
+            for chunk in response:
+                if chunk.usage is not None and usage is not None:
+                    usage.add(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    if usage is not None:
+                        usage.first_token()
+                    content.append(delta.content)
+                    yield delta.content
+                # Tool calls arrive in fragments, keyed by their index
+                for fragment in delta.tool_calls or []:
+                    call = calls.setdefault(fragment.index, {"id": "", "name": "", "arguments": ""})
+                    call["id"] = fragment.id or call["id"]
+                    if fragment.function is not None:
+                        call["name"] += fragment.function.name or ""
+                        call["arguments"] += fragment.function.arguments or ""
+
+            if not calls:
+                return
+            calls = [calls[index] for index in sorted(calls)]
+            messages.append({"role": "assistant", "content": ''.join(content) or None, "tool_calls": [
+                {"id": call["id"], "type": "function",
+                 "function": {"name": call["name"], "arguments": call["arguments"]}} for call in calls]})
+            for call in calls:
+                start = time.perf_counter()
+                output = self.run_tool(call["name"], call["arguments"])
+                logger_engine.info(f"{call['name']}: {(time.perf_counter() - start) * 1000:.0f} ms.")
+                messages.append({"role": "tool", "tool_call_id": call["id"], "content": output})
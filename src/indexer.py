@@ -0,0 +1,155 @@
+import json, hashlib, logging
+from collections import Counter
+from src.pipeline import CHUNK_SIZE, PipelineStats, normalize_record, run_pipeline
+
+logger_indexer = logging.getLogger(name=__name__)
+
+HASH_KEY = "hash"       # metadata key holding the content hash of each document
+GET_PAGE_SIZE = 5000    # ids fetched per page when reading the collection
+
+# Chroma's HNSW defaults. Space, M and construction_ef are fixed when the collection is created;
+# changing them requires rebuilding it. See run/sweep_hnsw.py to compare settings
+HNSW_DEFAULTS = {"space": "l2", "M": 16, "construction_ef": 100, "search_ef": 10}
+
+def content_hash(text: str, metadata: dict) -> str:
+    """
+    Hash sha256 del contenido de un documento: texto y metadatos (sin el propio hash).
+
+    Args:
+        text (str): Contenido del documento.
+        metadata (dict): Metadatos del documento.
+
+    Returns:
+        str: Hash hexadecimal.
+    """
+    metadata = {key: value for key, value in metadata.items() if key != HASH_KEY}
+    content = json.dumps([text, metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def document_ids(keys):
+    """
+    Identificadores estables de documentos a partir de su EAN. La primera aparición de una clave
+    usa la clave tal cual y las siguientes le agregan el número de aparición (`ean:1`, `ean:2`, ...),
+    ya que los catálogos tienen EAN repetidos o vacíos.
+
+    Args:
+        keys (iterable): Clave de cada documento (EAN, o un reemplazo si está vacío), en orden.
+
+    Yields:
+        str: Identificador de cada documento, en el mismo orden.
+    """
+    seen = Counter()
+    for key in keys:
+        yield key if not seen[key] else f"{key}:{seen[key]}"
+        seen[key] += 1
+
+def hnsw_metadata(settings: dict) -> dict:
+    """
+    Metadatos de colección de Chroma con los parámetros del índice HNSW (`hnsw:space`, `hnsw:M`, ...).
+
+    Args:
+        settings (dict): Parámetros HNSW (claves de HNSW_DEFAULTS); los que falten toman el valor por defecto.
+
+    Returns:
+        dict: Metadatos para `get_or_create_collection`.
+    """
+    return {f"hnsw:{key}": value for key, value in {**HNSW_DEFAULTS, **settings}.items()}
+
+def hnsw_changes(collection, settings: dict) -> dict:
+    """
+    Parámetros HNSW pedidos que difieren de los de una colección existente.
+
+    Args:
+        collection (chromadb.Collection): Colección a revisar.
+        settings (dict): Parámetros HNSW pedidos.
+
+    Returns:
+        dict: `(actual, pedido)` por parámetro distinto; vacío si la colección ya los usa.
+    """
+    current = {**HNSW_DEFAULTS, **{key[len("hnsw:"):]: value for key, value in (collection.metadata or {}).items()
+                                   if key.startswith("hnsw:")}}
+    return {key: (current.get(key), value) for key, value in {**HNSW_DEFAULTS, **settings}.items()
+            if current.get(key) != value}
+
+def stored_hashes(collection) -> dict:
+    """
+    Leer el hash de contenido de cada documento de una colección de Chroma, paginando.
+
+    Args:
+        collection (chromadb.Collection): Colección a leer.
+
+    Returns:
+        dict: Hash por identificador (None si el documento no tiene hash, p. ej. índices viejos).
+    """
+    hashes, offset = {}, 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=GET_PAGE_SIZE, offset=offset)
+        for id, metadata in zip(page["ids"], page["metadatas"]):
+            hashes[id] = (metadata or {}).get(HASH_KEY)
+        if len(page["ids"]) < GET_PAGE_SIZE:
+            return hashes
+        offset += GET_PAGE_SIZE
+
+def plan_sync(stored: dict, current: dict) -> dict:
+    """
+    Comparar los hashes guardados con los de los documentos actuales.
+
+    Args:
+        stored (dict): Hash guardado por identificador.
+        current (dict): Hash actual por identificador.
+
+    Returns:
+        dict: Identificadores a agregar ('add'), actualizar ('update'), borrar ('delete') y sin cambios ('unchanged').
+    """
+    plan = {'add': [], 'update': [], 'delete': [], 'unchanged': []}
+    for id, hash in current.items():
+        if id not in stored:
+            plan['add'].append(id)
+        elif stored[id] != hash:
+            plan['update'].append(id)
+        else:
+            plan['unchanged'].append(id)
+    plan['delete'] = [id for id in stored if id not in current]
+    return plan
+
+def sync_collection(collection, read, embed, chunk_size: int=CHUNK_SIZE, dry_run: bool=False, stats: PipelineStats=None) -> dict:
+    """
+    Actualizar una colección de Chroma de forma incremental: solo se calculan embeddings de los
+    documentos nuevos o modificados, y se borran los que ya no existen. La colección sigue
+    disponible durante toda la actualización.
+
+    Los documentos se recorren dos veces sin guardarlos en memoria: la primera solo calcula los
+    hashes para armar el plan, y la segunda pasa los documentos pendientes por `run_pipeline`.
+
+    Args:
+        collection (chromadb.Collection): Colección a actualizar.
+        read (callable): Función sin argumentos que devuelve un iterable nuevo de documentos `(id, texto, metadatos)`.
+        embed (callable): Función que recibe una lista de textos y devuelve sus embeddings.
+        chunk_size (int, optional): Documentos por grupo del pipeline y por llamada a `upsert`. Por defecto es CHUNK_SIZE.
+        dry_run (bool, optional): Si es True, solo calcula el plan sin modificar la colección. Por defecto es False.
+        stats (PipelineStats, optional): Estadísticas del pipeline a actualizar.
+
+    Returns:
+        dict: Cantidad de documentos agregados, actualizados, borrados y sin cambios.
+    """
+    normalized = (record for record in map(normalize_record, read()) if record is not None)
+    current = {id: content_hash(text, metadata) for id, text, metadata in normalized}
+    plan = plan_sync(stored_hashes(collection), current)
+    counts = {action: len(ids) for action, ids in plan.items()}
+    logger_indexer.info(f"Plan de indexación: {counts}")
+    if dry_run:
+        return counts
+
+    pending = set(plan['add']) | set(plan['update'])
+
+    def write(chunk: list, embeddings: list) -> None:
+        collection.upsert(ids=[id for id, _, _ in chunk], embeddings=embeddings, documents=[text for _, text, _ in chunk],
+                          metadatas=[{**metadata, HASH_KEY: current[id]} for id, _, metadata in chunk])
+
+    if pending:
+        records = (record for record in read() if record[0] in pending)
+        run_pipeline(records, embed, write, chunk_size=chunk_size, stats=stats)
+
+    for start in range(0, len(plan['delete']), chunk_size):
+        collection.delete(ids=plan['delete'][start:start + chunk_size])
+    return counts
@@ -1,4 +1,4 @@
-import re
+import os, re
 import streamlit as st
 
 # Log file paths
@@ -14,6 +14,11 @@ USER_AVATAR = "figures/avatar_user.png"     # user avatar figure
 BOT_AVATAR  = "figures/avatar_bot.png"      # assistant avatar figure
 IMAGE_LOGO  = "figures/header_logo.png"     # logo image
 
+# Profiler parameters (set PROFILE_RATE in the environment or in the app secrets)
+PROFILE_RATE        = float(os.environ.get("PROFILE_RATE", st.secrets.get("PROFILE_RATE", 0.0)))  # fraction of chat turns to profile, 0 disables it
+PROFILE_INTERVAL    = 0.005                         # seconds between stack samples
+PROFILE_PATH        = "/logs/profiles"              # collapsed stacks folder
+
 # Stock parameters
 STOCK_UPDATE_INTERVAL = 3600  # Ejemplo: 3600 segundos (1 hora)
 
@@ -27,13 +32,38 @@ PASSWORD    = "hrci tkoc sdky jepc"             # email password
 MODEL           = "gpt-4o"                      # "gpt-4o", "gpt-3.5-turbo" set the model to use
 OPENAI_API_KEY  = st.secrets["OPENAI_API_KEY"]
 ASSISTANT_ID    = st.secrets["ASSISTANT_ID"]
+ENGINE_MODE     = os.environ.get("ENGINE_MODE", st.secrets.get("ENGINE_MODE", "assistants"))  # "assistants" (threads and runs) or "completions" (local tool loop)
 
 # Database parameters
 CSV_PATH            = "database/csv/"               # csv database path
 PERSIST_DIRECTORY   = "database/DB_Chroma"          # embedding database directory
 CHROMA_DB_PATH      = "database/chroma/byProduct"   # Chroma database path
+COLLECTION_NAME     = "langchain"                   # Chroma collection (langchain's default name)
+HNSW_SETTINGS       = {"space": "l2", "M": 16, "construction_ef": 100, "search_ef": 10}  # Chroma defaults (see run/sweep_hnsw.py)
+VECTOR_BACKEND      = "chroma"                      # "chroma" (HNSW) or "exact" (memory-mapped matrix, see run/bench_vector_index.py)
+EXACT_INDEX_PATH    = "database/exact/byProduct"    # exact index exported from the Chroma collection (run/build_exact_index.py)
+EXACT_INDEX_RERANK  = 4                             # int8 first-stage candidates per result re-ranked in float32 (0: float32 scan)
+EMBEDDINGS_CHECKPOINT_PATH = "database/embeddings/"  # finished embedding batches, to resume interrupted jobs
 K_VALUE_SEARCH      = 30                            # K value for the search
 K_VALUE_THOLD       = 5                             # K value for the threshold
+CONTEXT_TOKEN_BUDGET = 1200                         # max tokens of the search_in_database context
+EMBED_BATCH_WINDOW_MS = 5                           # ms a query embedding waits to be batched with other sessions' queries
+EMBED_BATCH_MAX_SIZE  = 16                          # max queries per batched embedding request
+PREFETCH_LEXICAL_THRESHOLD = 0.8                    # share of the search query's words in the prompt to reuse the prefetch
+PREFETCH_COSINE_THRESHOLD  = 0.9                    # query/prompt embedding similarity to reuse the prefetch
+CONTEXT_LAST_MESSAGES  = 10                         # thread messages sent in full on each run (older ones are summarized)
+CONTEXT_SUMMARY_TOKENS = 300                        # max tokens of the summary of older messages
+CONTEXT_TOOL_OUTPUTS   = 2                          # tool outputs of previous turns carried into the next run
+STOCK_CSV_PATH      = "database/stock.csv"          # latest stock snapshot (run/get_stock.py)
+PROMO_INDEX_PATH    = "database/promos.json"        # in-stock products on promotion, rebuilt on every stock snapshot
+CATALOG_DB_PATH     = "database/catalog.sqlite"     # products, attributes, full-text index and stock (read-only in the app)
+SESSION_BACKEND     = "sqlite"                      # "sqlite" (shared by every app process) or "memory" (this process only)
+SESSION_DB_PATH     = "database/sessions.sqlite"    # session state store (WAL mode)
+SESSION_TTL         = 24 * 3600                     # seconds without activity before a session expires
+SESSION_OWNER_COOKIE = os.environ.get("SESSION_OWNER_COOKIE", st.secrets.get("SESSION_OWNER_COOKIE", "_streamlit_xsrf"))  # browser cookie a restored session must match
+RETRIEVAL_URL       = os.environ.get("RETRIEVAL_URL", st.secrets.get("RETRIEVAL_URL", ""))  # retrieval service (run/retrieval_server.py), "" loads it in the app
+RETRIEVAL_PORT      = 8765                          # default port of the retrieval service
+RETRIEVAL_TIMEOUT   = 10.0                          # seconds per request to the retrieval service
 
 
 # Chatbot parameters
@@ -44,6 +74,7 @@ HEADER_CAPTION = re.sub(pattern=' +', repl=' ',
 INITIAL_MESSAGE = "Hola, ¿en qué puedo ayudarte hoy?"
 ASKING_PROMPT = "Hacé tu pregunta"
 LOADING_MESSAGE = "Estoy buscando la información que necesitás..."
+BUSY_MESSAGE = "Esta conversación está respondiendo en otra pestaña. Esperá a que termine y volvé a preguntar."
 INSTRUCTIONS = re.sub(pattern=' +', 
                       repl=' ', 
                       string="""Por favor responder la pregunta del usuario siguiendo la conversación \
@@ -0,0 +1,152 @@
+import os, sys, time, logging
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:     # not available on Windows: peak RSS is reported as 0
+    resource = None
+
+logger_pipeline = logging.getLogger(name=__name__)
+
+CHUNK_SIZE = 2048   # documents per chunk (enough for 4 concurrent embedding batches); at most two are held in memory
+STAGES = ("read", "normalize", "embed", "write")
+
+def current_rss_mb() -> float:
+    """Memoria residente actual del proceso (MB), según /proc/self/statm (0 donde no existe)."""
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0.0
+    return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente del proceso (MB) desde que empezó."""
+    if resource is None:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10     # bytes on macOS, KB on Linux
+
+def normalize_record(record: tuple):
+    """
+    Normalización por defecto de un documento `(id, texto, metadatos)`: quita los espacios en los
+    extremos del texto y descarta los documentos vacíos (la API de embeddings los rechaza).
+
+    Returns:
+        tuple: El documento normalizado, o None si hay que descartarlo.
+    """
+    id, text, metadata = record
+    text = text.strip()
+    return (id, text, metadata) if text else None
+
+class PipelineStats(object):
+    """
+    Documentos, tiempo y memoria residente por etapa del pipeline. La memoria de cada etapa es el máximo
+    de la RSS actual medida al terminar cada llamada de la etapa; el pico del proceso va en el total.
+    """
+
+    def __init__(self) -> None:
+        self.stages = {stage: {'items': 0, 'seconds': 0.0, 'rss_mb': 0.0} for stage in STAGES}
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, stage: str, items: int, seconds: float) -> None:
+        stats = self.stages[stage]
+        stats['items'] += items
+        stats['seconds'] += seconds
+        stats['rss_mb'] = max(stats['rss_mb'], current_rss_mb())
+
+    def report(self) -> str:
+        lines = [f"{'etapa':10s} {'docs':>8s} {'segundos':>9s} {'docs/s':>9s} {'RSS máx (MB)':>14s}"]
+        for stage, stats in self.stages.items():
+            rate = stats['items'] / stats['seconds'] if stats['seconds'] else 0.0
+            lines.append(f"{stage:10s} {stats['items']:8d} {stats['seconds']:9.2f} {rate:9.0f} {stats['rss_mb']:14.1f}")
+        lines.append(f"Total: {self.elapsed:.2f} s de reloj, pico RSS del proceso {peak_rss_mb():.1f} MB.")
+        return '\n'.join(lines)
+
+def chunks(records, size: int, normalize, stats: PipelineStats):
+    """
+    Leer y normalizar documentos de un iterable, y agruparlos en listas de a `size`.
+
+    Args:
+        records (iterable): Documentos `(id, texto, metadatos)`.
+        size (int): Documentos por grupo.
+        normalize (callable): Función que normaliza un documento, o devuelve None para descartarlo.
+        stats (PipelineStats): Estadísticas a actualizar.
+
+    Yields:
+        list: Grupo de documentos normalizados.
+    """
+    records, chunk = iter(records), []
+    counts, seconds = {'read': 0, 'normalize': 0}, {'read': 0.0, 'normalize': 0.0}
+
+    def flush() -> None:
+        # Stats once per chunk, not per document: measuring RSS reads /proc
+        for stage in counts:
+            stats.add(stage, counts[stage], seconds[stage])
+            counts[stage], seconds[stage] = 0, 0.0
+
+    while True:
+        start = time.perf_counter()
+        record = next(records, None)
+        read = time.perf_counter()
+        if record is None:
+            break
+        record = normalize(record)
+        seconds['read'] += read - start
+        seconds['normalize'] += time.perf_counter() - read
+        counts['read'] += 1
+        counts['normalize'] += 1
+        if record is not None:
+            chunk.append(record)
+        if len(chunk) == size:
+            flush()
+            yield chunk
+            chunk = []
+    flush()
+    if chunk:
+        yield chunk
+
+def run_pipeline(records, embed, write, normalize=normalize_record, chunk_size: int=CHUNK_SIZE, stats: PipelineStats=None) -> PipelineStats:
+    """
+    Procesar documentos en flujo: leer, normalizar, calcular embeddings y escribir de a grupos,
+    sin materializar el corpus. Los embeddings del grupo N+1 se calculan (en otro hilo) mientras se
+    escribe el grupo N, así que la memoria está acotada por dos grupos.
+
+    Args:
+        records (iterable): Documentos `(id, texto, metadatos)`, idealmente un generador.
+        embed (callable): Función que recibe una lista de textos y devuelve sus embeddings.
+        write (callable): Función que recibe un grupo de documentos y sus embeddings, y los guarda.
+        normalize (callable, optional): Normalización por documento. Por defecto es normalize_record.
+        chunk_size (int, optional): Documentos por grupo. Por defecto es CHUNK_SIZE.
+        stats (PipelineStats, optional): Estadísticas a actualizar. Por defecto se crean nuevas.
+
+    Returns:
+        PipelineStats: Documentos, tiempo y memoria por etapa.
+    """
+    stats = stats or PipelineStats()
+
+    def embed_chunk(chunk: list) -> list:
+        start = time.perf_counter()
+        embeddings = embed([text for _, text, _ in chunk])
+        stats.add('embed', len(chunk), time.perf_counter() - start)
+        return embeddings
+
+    def write_chunk(chunk: list, embeddings: list) -> None:
+        start = time.perf_counter()
+        write(chunk, embeddings)
+        stats.add('write', len(chunk), time.perf_counter() - start)
+        logger_pipeline.info(f"Documentos escritos: {stats.stages['write']['items']}")
+
+    previous = None
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for chunk in chunks(records, chunk_size, normalize, stats):
+            future = executor.submit(embed_chunk, chunk)
+            if previous is not None:
+                write_chunk(previous[0], previous[1].result())
+            previous = (chunk, future)
+        if previous is not None:
+            write_chunk(previous[0], previous[1].result())
+
+    stats.elapsed = time.perf_counter() - stats.start
+    return stats
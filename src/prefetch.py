@@ -0,0 +1,124 @@
+import re, time, logging, threading, unicodedata
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+logger_prefetch = logging.getLogger(name=__name__)
+
+LEXICAL_THRESHOLD = 0.8     # share of the tool query's words found in the prompt to reuse without embedding it
+COSINE_THRESHOLD  = 0.9     # embedding similarity to reuse (ada-002 similarities rarely fall below 0.7)
+WAIT_TIMEOUT      = 10.0    # seconds to wait for an unfinished prefetch before giving up on it
+MIN_WORD_LENGTH   = 3       # shorter words (articles, prepositions) are ignored by the lexical check
+re_words = re.compile(r'\w+')
+
+# Prefetches run here, outside the Streamlit script thread; they must not touch st.session_state
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+
+def words(text: str) -> set:
+    """Palabras de un texto en minúsculas y sin tildes, sin las más cortas."""
+    text = unicodedata.normalize('NFKD', text.lower()).encode('ascii', 'ignore').decode('ascii')
+    return {word for word in re_words.findall(text) if len(word) >= MIN_WORD_LENGTH}
+
+def lexical_overlap(prompt: str, query: str) -> float:
+    """Fracción de las palabras de `query` que aparecen en `prompt` (los argumentos suelen ser un resumen del mensaje)."""
+    query_words = words(query)
+    return len(query_words & words(prompt)) / len(query_words) if query_words else 0.0
+
+def cosine(a, b) -> float:
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    norm = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(a @ b / norm) if norm else 0.0
+
+class PrefetchStats(object):
+    """Aciertos y tiempo ahorrado por la recuperación especulativa, acumulados en el proceso."""
+
+    def __init__(self) -> None:
+        self.counts = {'lexical': 0, 'semantic': 0, 'miss': 0, 'none': 0}
+        self.saved = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, kind: str, saved: float) -> None:
+        with self.lock:
+            self.counts[kind] += 1
+            self.saved += saved
+
+    def summary(self) -> str:
+        with self.lock:
+            hits = self.counts['lexical'] + self.counts['semantic']
+            total = hits + self.counts['miss']
+            rate = hits / total if total else 0.0
+            return (f"tasa de acierto {rate:.0%} ({hits}/{total}: {self.counts['lexical']} léxicos, "
+                    f"{self.counts['semantic']} semánticos), {self.saved:.1f} s ahorrados en total")
+
+stats = PrefetchStats()
+
+class Prefetch(object):
+    """
+    Recuperación especulativa de un mensaje del usuario: en segundo plano, calcula el embedding del
+    mensaje y corre la recuperación (búsqueda vectorial y stock) con ese vector, antes de que el
+    asistente pida la herramienta.
+    """
+
+    def __init__(self, prompt: str, embed, retrieve) -> None:
+        """
+        Args:
+            prompt (str): Mensaje del usuario.
+            embed (callable): Función que recibe un texto y devuelve su embedding.
+            retrieve (callable): Función que recibe un embedding y devuelve el resultado de la recuperación.
+        """
+        self.prompt = prompt
+        self.timings = {}
+        self.future = _executor.submit(self._run, embed, retrieve)
+
+    def _run(self, embed, retrieve) -> tuple:
+        start = time.perf_counter()
+        vector = embed(self.prompt)
+        embedded = time.perf_counter()
+        result = retrieve(vector)
+        self.timings = {'embed': embedded - start, 'retrieve': time.perf_counter() - embedded}
+        return vector, result
+
+def reuse(prefetch: Prefetch, query: str, embed, lexical_threshold: float=LEXICAL_THRESHOLD,
+          cosine_threshold: float=COSINE_THRESHOLD, timeout: float=WAIT_TIMEOUT) -> tuple:
+    """
+    Decidir si la recuperación de una herramienta puede usar la del mensaje. Primero se comparan
+    las palabras (sin calcular ningún embedding); si no alcanza, se calcula el embedding de la
+    consulta y se compara con el del mensaje. Si no se reusa, el embedding calculado se devuelve
+    para no pedirlo dos veces.
+
+    Args:
+        prefetch (Prefetch): Recuperación especulativa del turno, o None.
+        query (str): Consulta de la herramienta.
+        embed (callable): Función que recibe un texto y devuelve su embedding.
+        lexical_threshold (float, optional): Umbral de `lexical_overlap`. Por defecto es LEXICAL_THRESHOLD.
+        cosine_threshold (float, optional): Umbral de similitud coseno. Por defecto es COSINE_THRESHOLD.
+        timeout (float, optional): Espera máxima de la recuperación especulativa, en segundos. Por defecto es WAIT_TIMEOUT.
+
+    Returns:
+        tuple: Resultado reusado (o None), embedding de la consulta (o None), tipo ('lexical', 'semantic',
+            'miss' o 'none') y segundos ahorrados.
+    """
+    if prefetch is None:
+        stats.record('none', 0.0)
+        return None, None, 'none', 0.0
+
+    lexical = lexical_overlap(prefetch.prompt, query) >= lexical_threshold
+    vector = None if lexical else embed(query)
+    start = time.perf_counter()
+    try:
+        prompt_vector, result = prefetch.future.result(timeout=timeout)
+    except Exception as e:
+        logger_prefetch.warning(f"Recuperación especulativa descartada ({type(e).__name__}: {e}).")
+        stats.record('miss', 0.0)
+        return None, vector, 'miss', 0.0
+    waited = time.perf_counter() - start
+
+    if lexical:
+        kind, saved = 'lexical', prefetch.timings['embed'] + prefetch.timings['retrieve'] - waited
+    elif cosine(vector, prompt_vector) >= cosine_threshold:
+        kind, saved = 'semantic', prefetch.timings['retrieve'] - waited
+    else:
+        stats.record('miss', 0.0)
+        return None, vector, 'miss', 0.0
+    saved = max(saved, 0.0)
+    stats.record(kind, saved)
+    return result, vector, kind, saved
@@ -0,0 +1,126 @@
+import os, sys, time
+import random, threading, logging
+from collections import Counter
+from contextlib import nullcontext
+
+# Reuse the chat logger (configured in src/chatbot.py) so profiles are traced with the session
+logger_profiler = logging.getLogger(name="chat")
+
+class TurnProfiler(object):
+    """
+    Perfilador por muestreo de un turno de chat. Un hilo auxiliar toma cada `interval`
+    segundos la pila del hilo que atiende el turno y acumula las pilas colapsadas
+    (formato `frame;frame;frame cantidad`, listo para flamegraph).
+    """
+
+    def __init__(self, folderpath: str, session_id: str, turn_id: int, interval: float=0.005) -> None:
+        self.folderpath = folderpath
+        self.session_id = session_id
+        self.turn_id = turn_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.n_samples = 0
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def filepath(self) -> str:
+        return os.path.join(self.folderpath, f"{self.session_id}_{self.turn_id:04d}.collapsed")
+
+    @staticmethod
+    def frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(TurnProfiler.frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.n_samples += 1
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="turn-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._stop.set()
+        self._thread.join()
+        elapsed = time.perf_counter() - self._start
+        try:
+            self.write()
+            logger_profiler.info(f"[id:{self.session_id}] Turno {self.turn_id} perfilado: {self.n_samples} "
+                                 f"muestras en {elapsed:.3f}s -> {self.filepath}")
+        except OSError as e:
+            logger_profiler.error(f"[id:{self.session_id}] No se pudo guardar el perfil del turno {self.turn_id}: {e}")
+        return False
+
+    def write(self) -> None:
+        os.makedirs(self.folderpath, exist_ok=True)
+        with open(self.filepath, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def profile_turn(session_id: str, turn_id: int, rate: float, folderpath: str, interval: float=0.005):
+    """
+    Devuelve el contexto de perfilado para un turno de chat. Con `rate` igual a 0 (modo
+    desactivado) se devuelve un `nullcontext`, de modo que el costo es nulo.
+
+    Args:
+        session_id (str): ID de la sesión, usado para etiquetar el archivo de salida.
+        turn_id (int): Número de turno dentro de la sesión.
+        rate (float): Fracción de turnos a perfilar, entre 0 y 1.
+        folderpath (str): Carpeta donde se escriben las pilas colapsadas.
+        interval (float, optional): Segundos entre muestras. Por defecto es 0.005.
+
+    Returns:
+        TurnProfiler | nullcontext: Contexto a usar con `with`.
+    """
+    if rate <= 0 or random.random() >= rate:
+        return nullcontext()
+    return TurnProfiler(folderpath, session_id, turn_id, interval)
+
+def read_collapsed(filepath: str) -> Counter:
+    """
+    Leer un archivo de pilas colapsadas.
+
+    Args:
+        filepath (str): Ruta al archivo `.collapsed`.
+
+    Returns:
+        Counter: Cantidad de muestras por pila.
+    """
+    stacks = Counter()
+    with open(filepath, 'r') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+    return stacks
+
+def merge_collapsed(filepaths: list, by_turn: bool=False) -> Counter:
+    """
+    Combinar varios archivos de pilas colapsadas en un único resumen.
+
+    Args:
+        filepaths (list): Rutas a los archivos `.collapsed`.
+        by_turn (bool, optional): Si es True, se agrega como raíz de cada pila el nombre del
+            archivo (`sesion_turno`) para distinguir los turnos en el flame graph. Por defecto es False.
+
+    Returns:
+        Counter: Cantidad de muestras por pila.
+    """
+    merged = Counter()
+    for filepath in filepaths:
+        root = os.path.splitext(os.path.basename(filepath))[0]
+        for stack, count in read_collapsed(filepath).items():
+            merged[f"{root};{stack}" if by_turn else stack] += count
+    return merged
@@ -0,0 +1,241 @@
+import csv, json, queue, logging, threading
+import http.client
+from urllib.parse import urlsplit
+from src.catalog import facet_count, facet_counts, lookup_stock, open_catalog
+from src.chunker import collapse_chunks
+from src.stock import load_promo_index, normalize_ean, search_promos
+
+logger_retrieval = logging.getLogger(name=__name__)
+
+TIMEOUT   = 10.0    # seconds per request to the retrieval service
+POOL_SIZE = 8       # idle keep-alive connections kept by each client
+METHODS   = ("embed_query", "search", "lookup_eans", "facets", "facet", "promos", "count_stock")  # exposed by the service
+
+class Retrieval(object):
+    """
+    Recuperación de la app: embeddings de consultas, búsqueda vectorial, stock por EAN y los conteos
+    de las herramientas agregadas. Se usa en el proceso de la app o detrás de `run/retrieval_server.py`,
+    para que todos los procesos compartan un solo índice, cliente de embeddings y catálogo. Argumentos y
+    resultados son serializables en JSON.
+    """
+
+    def __init__(self, vector_index, embed_query, catalog_path: str, promo_index_path: str, stock_path: str) -> None:
+        """
+        Args:
+            vector_index (ExactIndex | ChromaIndex): Índice vectorial.
+            embed_query (callable): Función que recibe un texto y devuelve su embedding.
+            catalog_path (str): Ruta de la base del catálogo.
+            promo_index_path (str): Ruta del índice de promociones.
+            stock_path (str): Ruta del CSV de stock, si no se indica otra.
+        """
+        self.vector_index = vector_index
+        self.embed = embed_query
+        self.catalog_path = catalog_path
+        self.promo_index_path = promo_index_path
+        self.stock_path = stock_path
+
+    def embed_query(self, text: str) -> list:
+        return [float(value) for value in self.embed(text)]
+
+    def search(self, vector: list, k: int, stock_path: str=None) -> tuple:
+        """
+        Búsqueda vectorial y stock de los productos encontrados.
+
+        Returns:
+            tuple: Productos (ver `collapse_chunks`) y su stock (ver `lookup_eans`).
+        """
+        products = collapse_chunks(self.vector_index.search_vector(vector, k)) # chunk hits back to one entry per product
+        return products, self.lookup_eans([product['EAN'] for product in products], stock_path)
+
+    def lookup_eans(self, eans: list, stock_path: str=None) -> dict:
+        """
+        Stock, precio y promoción de una lista de EANs, desde el catálogo o, si no existe, desde el CSV de stock.
+
+        Returns:
+            dict: Posición en `eans` -> descripción del stock, solo para los EANs encontrados.
+        """
+        data = {}
+        catalog = open_catalog(self.catalog_path)
+        if catalog is not None:
+            # Indexed lookup in the catalog database
+            ean_map = {normalize_ean(ean): idx for idx, ean in enumerate(eans)}
+            for ean, stock, price, promo in lookup_stock(catalog, eans):
+                data[ean_map[ean]] = f"Stock: {stock}. Precio: ${price}. Promoción: {promo}."
+            return data
+
+        ean_map = {str(ean): idx for idx, ean in enumerate(eans)}
+        with open(stock_path or self.stock_path, mode='r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                if row['ean'] in ean_map:
+                    stock = int(round(float(row['stock']))) # stock must be an integer
+                    data[ean_map[row['ean']]] = f"Stock: {stock}. Precio: ${row['precio']}. Promoción: {row['promo']}."
+        return data
+
+    def facets(self, facet: str, sede: str='') -> list:
+        # Precomputed counts, refreshed whenever the catalog or a stock snapshot is published
+        catalog = open_catalog(self.catalog_path)
+        return [list(row) for row in facet_counts(catalog, facet, sede)] if catalog is not None else []
+
+    def facet(self, facet: str, value: str, sede: str=''):
+        catalog = open_catalog(self.catalog_path)
+        row = facet_count(catalog, facet, value, sede) if catalog is not None else None
+        return list(row) if row is not None else None
+
+    def promos(self, brand: str=None, k: int=5) -> list:
+        # Promo index built when the stock snapshot was published
+        return search_promos(load_promo_index(self.promo_index_path), brand=brand, k=k)
+
+    def count_stock(self, stock_path: str=None, minimum: int=None, maximum: int=None) -> int:
+        """Productos del CSV de stock con stock entre `minimum` y `maximum` unidades (inclusive; None: sin límite)."""
+        products = 0
+        with open(stock_path or self.stock_path, mode='r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                stock = int(round(float(row['stock']))) # stock must be an integer
+                products += (minimum is None or stock >= minimum) and (maximum is None or stock <= maximum)
+        return products
+
+class RetrievalClient(object):
+    """
+    Cliente del servicio de recuperación (`run/retrieval_server.py`), con la misma interfaz que
+    `Retrieval`. Reutiliza conexiones HTTP keep-alive entre llamadas y sesiones. El servicio lee siempre
+    su propio CSV de stock, así que `stock_path` no se envía.
+    """
+
+    def __init__(self, url: str, timeout: float=TIMEOUT, pool_size: int=POOL_SIZE) -> None:
+        """
+        Args:
+            url (str): URL del servicio, por ejemplo "http://127.0.0.1:8765".
+            timeout (float, optional): Segundos por pedido. Por defecto es TIMEOUT.
+            pool_size (int, optional): Conexiones ociosas que se conservan. Por defecto es POOL_SIZE.
+        """
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connection(self) -> tuple:
+        try:
+            return self.pool.get_nowait(), True
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+
+    def _release(self, connection) -> None:
+        try:
+            self.pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def call(self, method: str, **kwargs):
+        """
+        Llamar a un método del servicio. Si una conexión reutilizada fue cerrada por el servidor, se reintenta
+        con otra.
+
+        Returns:
+            Resultado del método, decodificado de JSON.
+
+        Raises:
+            RuntimeError: Si el servicio responde con un error.
+            TimeoutError: Si el servicio no responde a tiempo.
+        """
+        body = json.dumps(kwargs).encode('utf-8')
+        while True:
+            connection, reused = self._connection()
+            try:
+                connection.request("POST", f"/{method}", body=body, headers={"Content-Type": "application/json"})
+                response = connection.getresponse()
+                payload = json.loads(response.read())
+            except (ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if reused:
+                    continue    # stale keep-alive connection, closed by the server
+                raise
+            except Exception:
+                connection.close()
+                raise
+            self._release(connection)
+            if response.status != 200:
+                raise RuntimeError(f"Servicio de recuperación, {method}: {payload.get('error', response.status)}")
+            return payload
+
+    def embed_query(self, text: str) -> list:
+        return self.call("embed_query", text=text)
+
+    def search(self, vector: list, k: int, stock_path: str=None) -> tuple:
+        products, data = self.call("search", vector=[float(value) for value in vector], k=k)
+        return products, {int(idx): stock for idx, stock in data.items()}
+
+    def lookup_eans(self, eans: list, stock_path: str=None) -> dict:
+        return {int(idx): stock for idx, stock in self.call("lookup_eans", eans=eans).items()}
+
+    def facets(self, facet: str, sede: str='') -> list:
+        return self.call("facets", facet=facet, sede=sede)
+
+    def facet(self, facet: str, value: str, sede: str=''):
+        return self.call("facet", facet=facet, value=value, sede=sede)
+
+    def promos(self, brand: str=None, k: int=5) -> list:
+        return self.call("promos", brand=brand, k=k)
+
+    def count_stock(self, stock_path: str=None, minimum: int=None, maximum: int=None) -> int:
+        return self.call("count_stock", minimum=minimum, maximum=maximum)
+
+def build_retrieval(repo_path: str, swap_sqlite: bool=False) -> Retrieval:
+    """
+    Cargar el cliente de embeddings, el índice vectorial configurado y el catálogo.
+
+    Args:
+        repo_path (str): Raíz del repositorio.
+        swap_sqlite (bool, optional): Reemplazar sqlite3 por pysqlite3 (Chroma necesita una versión más nueva). Por defecto es False.
+
+    Returns:
+        Retrieval: Recuperación local.
+    """
+    import os, sys
+    from langchain_openai import OpenAIEmbeddings
+    from src.embedder import shared_query_batcher
+    from src.parameters import (CATALOG_DB_PATH, CHROMA_DB_PATH, COLLECTION_NAME, EMBED_BATCH_MAX_SIZE,
+                                EMBED_BATCH_WINDOW_MS, EXACT_INDEX_PATH, EXACT_INDEX_RERANK, HNSW_SETTINGS,
+                                OPENAI_API_KEY, PROMO_INDEX_PATH, RETRIEVAL_TIMEOUT, STOCK_CSV_PATH, VECTOR_BACKEND)
+    from src.vectors import ChromaIndex, ExactIndex
+
+    embedding = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
+    # Query embeddings from every session are sent in small batches by a process-wide batcher
+    query_embedder = shared_query_batcher(embedding.embed_documents, window_ms=EMBED_BATCH_WINDOW_MS,
+                                          max_batch=EMBED_BATCH_MAX_SIZE, timeout=RETRIEVAL_TIMEOUT)
+    if VECTOR_BACKEND == "exact":
+        vector_index = ExactIndex(os.path.join(repo_path, EXACT_INDEX_PATH), embed=query_embedder.embed_query,
+                                  rerank=EXACT_INDEX_RERANK)
+    else:
+        if swap_sqlite:
+            # Trick to update sqlite (only Chroma needs it)
+            __import__('pysqlite3')
+            sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+        from langchain_community.vectorstores import Chroma
+        from src.indexer import hnsw_metadata
+        vector_index = ChromaIndex(Chroma(collection_name=COLLECTION_NAME, persist_directory=os.path.join(repo_path, CHROMA_DB_PATH),
+                                          embedding_function=query_embedder, collection_metadata=hnsw_metadata(HNSW_SETTINGS)))
+    return Retrieval(vector_index, query_embedder.embed_query, os.path.join(repo_path, CATALOG_DB_PATH),
+                     os.path.join(repo_path, PROMO_INDEX_PATH), os.path.join(repo_path, STOCK_CSV_PATH))
+
+_retrievals = {}    # (repo path, url) -> Retrieval or RetrievalClient, shared by every session of the process
+_lock = threading.Lock()
+
+def shared_retrieval(repo_path: str, url: str='', timeout: float=TIMEOUT, swap_sqlite: bool=False):
+    """
+    Recuperación única del proceso: el cliente del servicio si hay una URL configurada (así su pool de
+    conexiones se reutiliza entre re-ejecuciones del script), o la recuperación local.
+
+    Args:
+        repo_path (str): Raíz del repositorio.
+        url (str, optional): URL del servicio de recuperación. Por defecto, ninguna (recuperación local).
+        timeout (float, optional): Segundos por pedido al servicio. Por defecto es TIMEOUT.
+        swap_sqlite (bool, optional): Ver `build_retrieval`. Por defecto es False.
+
+    Returns:
+        Retrieval | RetrievalClient: Recuperación compartida.
+    """
+    with _lock:
+        key = (repo_path, url)
+        if key not in _retrievals:
+            _retrievals[key] = RetrievalClient(url, timeout) if url else build_retrieval(repo_path, swap_sqlite)
+        return _retrievals[key]
@@ -0,0 +1,206 @@
+import hmac, json, time, zlib, hashlib, sqlite3, logging, threading
+
+logger_sessions = logging.getLogger(name=__name__)
+
+SESSION_TTL   = 24 * 3600   # seconds without activity before a session expires
+PURGE_EVERY   = 100         # saves between sweeps of expired sessions
+BUSY_TIMEOUT  = 5000        # ms a writer waits for the lock held by another process
+TURN_LEASE    = 300         # seconds a turn keeps its conversation locked if it never releases it
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    updated REAL NOT NULL,          -- unix time of the last save
+    state BLOB NOT NULL,            -- zlib-compressed JSON of the persisted keys
+    owner TEXT NOT NULL DEFAULT ''  -- digest of the browser secret that created the session ('': never restored)
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated);
+CREATE TABLE IF NOT EXISTS turns (
+    id TEXT PRIMARY KEY,            -- session id
+    holder TEXT NOT NULL,           -- app session running the turn
+    expires REAL NOT NULL           -- unix time the lease ends if it is not released
+);
+"""
+
+def pack(state: dict) -> bytes:
+    """Estado de una sesión como JSON compacto comprimido con zlib."""
+    return zlib.compress(json.dumps(state, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def unpack(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+def owner_digest(secret: str) -> str:
+    """Digest del secreto del navegador que identifica al dueño de una sesión ('' si no hay secreto)."""
+    return hashlib.sha256(secret.encode('utf-8')).hexdigest() if secret else ''
+
+def same_owner(stored: str, owner: str) -> bool:
+    # A session without an owner, or a caller without one, is never restored
+    return bool(stored) and bool(owner) and hmac.compare_digest(stored, owner)
+
+class MemorySessionStore(object):
+    """Sesiones en memoria del proceso: no sobreviven a un reinicio ni se comparten entre réplicas."""
+
+    def __init__(self, ttl: float=SESSION_TTL) -> None:
+        self.ttl = ttl
+        self.sessions = {}  # session id -> (updated, owner, state)
+        self.turns = {}     # session id -> (holder, expires)
+        self.lock = threading.Lock()
+
+    def load(self, session_id: str, owner: str) -> dict:
+        with self.lock:
+            updated, stored, blob = self.sessions.get(session_id, (0.0, '', None))
+        if blob is None or time.time() - updated >= self.ttl or not same_owner(stored, owner):
+            return None
+        return unpack(blob)
+
+    def save(self, session_id: str, state: dict, owner: str) -> None:
+        with self.lock:
+            self.sessions[session_id] = (time.time(), owner, pack(state))
+            expired = [key for key, (updated, _, _) in self.sessions.items() if time.time() - updated >= self.ttl]
+            for key in expired:
+                del self.sessions[key]
+
+    def delete(self, session_id: str) -> None:
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+    def acquire_turn(self, session_id: str, holder: str, lease: float=TURN_LEASE) -> bool:
+        with self.lock:
+            current, expires = self.turns.get(session_id, (holder, 0.0))
+            if current != holder and expires > time.time():
+                return False
+            self.turns[session_id] = (holder, time.time() + lease)
+            return True
+
+    def release_turn(self, session_id: str, holder: str) -> None:
+        with self.lock:
+            if self.turns.get(session_id, (None, 0.0))[0] == holder:
+                del self.turns[session_id]
+
+class SQLiteSessionStore(object):
+    """
+    Sesiones en una base SQLite en modo WAL, compartida por todos los procesos de la app en la misma
+    máquina: cualquier réplica puede retomar una conversación y un reinicio no la pierde. Los lectores
+    no bloquean al escritor; las escrituras de otros procesos esperan hasta BUSY_TIMEOUT.
+    """
+
+    def __init__(self, db_path: str, ttl: float=SESSION_TTL, purge_every: int=PURGE_EVERY) -> None:
+        """
+        Args:
+            db_path (str): Ruta de la base de sesiones (se crea si no existe).
+            ttl (float, optional): Segundos sin actividad hasta que una sesión vence. Por defecto es SESSION_TTL.
+            purge_every (int, optional): Guardados entre barridos de sesiones vencidas. Por defecto es PURGE_EVERY.
+        """
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self.saves = 0
+        self.lock = threading.Lock()    # one connection per store, shared by the session threads
+        self.connection = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT / 1000, check_same_thread=False,
+                                          isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        if 'owner' not in {row[1] for row in self.connection.execute("PRAGMA table_info(sessions)")}:
+            # Bases created before sessions had owners: their sessions can no longer be restored
+            self.connection.execute("ALTER TABLE sessions ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+
+    def load(self, session_id: str, owner: str) -> dict:
+        """
+        Estado guardado de una sesión, solo si la pide su dueño: el ID viaja en la URL, así que un enlace
+        copiado no alcanza para abrir la conversación de otro.
+
+        Args:
+            session_id (str): ID de la sesión.
+            owner (str): Digest del secreto del navegador que la pide (ver `owner_digest`).
+
+        Returns:
+            dict: Estado de la sesión, o None si no existe, venció o es de otro dueño.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT owner, state FROM sessions WHERE id = ? AND updated > ?",
+                                          (session_id, time.time() - self.ttl)).fetchone()
+        return unpack(row[1]) if row is not None and same_owner(row[0], owner) else None
+
+    def save(self, session_id: str, state: dict, owner: str) -> None:
+        """
+        Guardar (o reemplazar) el estado de una sesión y, cada `purge_every` guardados, borrar las vencidas.
+
+        Args:
+            session_id (str): ID de la sesión.
+            state (dict): Estado serializable en JSON.
+            owner (str): Digest del secreto del navegador dueño de la sesión.
+        """
+        blob = pack(state)
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO sessions (id, updated, state, owner) VALUES (?, ?, ?, ?)",
+                                    (session_id, time.time(), blob, owner))
+            self.saves += 1
+            if self.saves % self.purge_every == 0:
+                self.purge()
+
+    def delete(self, session_id: str) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def acquire_turn(self, session_id: str, holder: str, lease: float=TURN_LEASE) -> bool:
+        """
+        Tomar la conversación para un turno, para que dos pestañas (o réplicas) no corran turnos a la vez
+        sobre el mismo hilo: la API de Assistants rechaza mensajes nuevos mientras hay una corrida activa.
+
+        Args:
+            session_id (str): ID de la sesión.
+            holder (str): ID de la sesión de la app que corre el turno; puede volver a tomarla.
+            lease (float, optional): Segundos hasta que se libera sola. Por defecto es TURN_LEASE.
+
+        Returns:
+            bool: True si la tomó; False si otra sesión de la app está corriendo un turno.
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")     # check and set atomically across processes
+            try:
+                row = self.connection.execute("SELECT holder, expires FROM turns WHERE id = ?", (session_id,)).fetchone()
+                acquired = row is None or row[0] == holder or row[1] <= now
+                if acquired:
+                    self.connection.execute("INSERT OR REPLACE INTO turns (id, holder, expires) VALUES (?, ?, ?)",
+                                            (session_id, holder, now + lease))
+            finally:
+                self.connection.execute("COMMIT")
+        return acquired
+
+    def release_turn(self, session_id: str, holder: str) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM turns WHERE id = ? AND holder = ?", (session_id, holder))
+
+    def purge(self) -> int:
+        """Borrar las sesiones vencidas y devolver cuántas eran."""
+        self.connection.execute("DELETE FROM turns WHERE expires <= ?", (time.time(),))
+        deleted = self.connection.execute("DELETE FROM sessions WHERE updated <= ?", (time.time() - self.ttl,)).rowcount
+        if deleted:
+            logger_sessions.info(f"{deleted} sesiones vencidas borradas.")
+        return deleted
+
+_stores = {}    # (backend, path) -> store, shared by every session of the process
+_lock = threading.Lock()
+
+def shared_session_store(backend: str, db_path: str=None, ttl: float=SESSION_TTL):
+    """
+    Store de sesiones del proceso: uno solo por backend y ruta, aunque el script se vuelva a ejecutar.
+
+    Args:
+        backend (str): "sqlite" o "memory".
+        db_path (str, optional): Ruta de la base, para el backend "sqlite".
+        ttl (float, optional): Segundos sin actividad hasta que una sesión vence. Por defecto es SESSION_TTL.
+
+    Returns:
+        MemorySessionStore | SQLiteSessionStore: Store compartido.
+    """
+    with _lock:
+        key = (backend, db_path)
+        if key not in _stores:
+            if backend == "sqlite":
+                _stores[key] = SQLiteSessionStore(db_path, ttl)
+            elif backend == "memory":
+                _stores[key] = MemorySessionStore(ttl)
+            else:
+                raise ValueError(f"Backend de sesiones desconocido: {backend}.")
+        return _stores[key]
@@ -0,0 +1,164 @@
+import time, random, logging
+
+logger_sheets = logging.getLogger(name=__name__)
+
+MAX_CHUNK_CELLS = 5000      # cells per batchUpdate request, well below the API payload limit
+MAX_RETRIES     = 5         # attempts per request
+BACKOFF_BASE    = 1.0       # seconds, doubled on every retry
+BACKOFF_CAP     = 32.0      # max seconds between retries
+RETRY_STATUSES  = {429, 500, 502, 503, 504}     # rate limited or transient server errors
+
+def column_letter(index: int) -> str:
+    """Letra de una columna de la hoja a partir de su índice (0 -> 'A', 26 -> 'AA')."""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+def cell_diff(old: list, new: list) -> list:
+    """
+    Celdas que cambian entre los valores leídos de la hoja y los nuevos. La API omite las celdas
+    vacías al final de cada fila, así que una celda que falta vale ''.
+
+    Args:
+        old (list): Filas leídas de la hoja.
+        new (list): Filas a escribir, desde la misma celda de origen.
+
+    Returns:
+        list: Cambios `(fila, columna, valor anterior, valor nuevo)`, con índices desde 0.
+    """
+    changes = []
+    for i, row in enumerate(new):
+        old_row = old[i] if i < len(old) else []
+        for j, value in enumerate(row):
+            previous = str(old_row[j]) if j < len(old_row) else ''
+            if str(value) != previous:
+                changes.append((i, j, previous, str(value)))
+    return changes
+
+def changed_ranges(changes: list, sheet: str, first_row: int=1, first_column: int=0, max_cells: int=MAX_CHUNK_CELLS) -> list:
+    """
+    Agrupar los cambios en rangos verticales: celdas consecutivas de una misma columna (el caso de una
+    columna de precios que cambia entera) van en un solo rango, de a lo sumo `max_cells` celdas.
+
+    Args:
+        changes (list): Cambios de `cell_diff`.
+        sheet (str): Nombre de la hoja.
+        first_row (int, optional): Fila de la hoja (desde 1) de la primera fila de valores. Por defecto es 1.
+        first_column (int, optional): Columna de la hoja (desde 0) de la primera columna de valores. Por defecto es 0.
+        max_cells (int, optional): Celdas por rango. Por defecto es MAX_CHUNK_CELLS.
+
+    Returns:
+        list: Rangos `{'range': 'hoja!C2:C40', 'values': [[...], ...]}` en notación A1.
+    """
+    ranges, run = [], []
+    for change in sorted(changes, key=lambda change: (change[1], change[0])) + [None]:
+        if run and (change is None or change[1] != run[-1][1] or change[0] != run[-1][0] + 1 or len(run) == max_cells):
+            column = column_letter(first_column + run[0][1])
+            ranges.append({'range': f"{sheet}!{column}{first_row + run[0][0]}:{column}{first_row + run[-1][0]}",
+                           'values': [[value] for _, _, _, value in run]})
+            run = []
+        if change is not None:
+            run.append(change)
+    return ranges
+
+def chunk_ranges(ranges: list, max_cells: int=MAX_CHUNK_CELLS) -> list:
+    """Repartir los rangos en lotes de a lo sumo `max_cells` celdas, uno por pedido."""
+    chunks, chunk, cells = [], [], 0
+    for data in ranges:
+        size = sum(len(row) for row in data['values'])
+        if chunk and cells + size > max_cells:
+            chunks.append(chunk)
+            chunk, cells = [], 0
+        chunk.append(data)
+        cells += size
+    return chunks + [chunk] if chunk else chunks
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    return status in RETRY_STATUSES or isinstance(error, (ConnectionError, TimeoutError))
+
+def with_backoff(request, retries: int=MAX_RETRIES, base: float=BACKOFF_BASE, cap: float=BACKOFF_CAP,
+                 sleep=time.sleep, rng=random):
+    """
+    Ejecutar un pedido reintentando los errores transitorios con espera exponencial y jitter completo
+    (una espera al azar entre 0 y `min(cap, base * 2**intento)`), para que varios clientes no reintenten a la vez.
+
+    Args:
+        request (callable): Función sin argumentos que hace el pedido.
+        retries (int, optional): Intentos en total. Por defecto es MAX_RETRIES.
+        base (float, optional): Espera base en segundos. Por defecto es BACKOFF_BASE.
+        cap (float, optional): Espera máxima en segundos. Por defecto es BACKOFF_CAP.
+        sleep (callable, optional): Función de espera. Por defecto es time.sleep.
+        rng (random.Random, optional): Generador de números al azar. Por defecto es el módulo random.
+
+    Returns:
+        Resultado del pedido.
+    """
+    for attempt in range(retries):
+        try:
+            return request()
+        except Exception as e:
+            if not is_retryable(e) or attempt == retries - 1:
+                raise
+            delay = rng.uniform(0, min(cap, base * 2 ** attempt))
+            logger_sheets.warning(f"Intento {attempt + 1} fallido ({e}); reintento en {delay:.1f} s.")
+            sleep(delay)
+
+class SheetWriter(object):
+    """
+    Escritura de valores en una hoja de Google Sheets enviando solo las celdas que cambiaron, en pedidos
+    `batchUpdate` de tamaño acotado.
+    """
+
+    def __init__(self, service, spreadsheet_id: str, max_cells: int=MAX_CHUNK_CELLS, retries: int=MAX_RETRIES,
+                 sleep=time.sleep) -> None:
+        """
+        Args:
+            service: Servicio de la API de Sheets (`googleapiclient.discovery.build("sheets", "v4", ...)`) u otro compatible.
+            spreadsheet_id (str): ID de la planilla.
+            max_cells (int, optional): Celdas por pedido. Por defecto es MAX_CHUNK_CELLS.
+            retries (int, optional): Intentos por pedido. Por defecto es MAX_RETRIES.
+            sleep (callable, optional): Función de espera entre reintentos. Por defecto es time.sleep.
+        """
+        self.values = service.spreadsheets().values()
+        self.spreadsheet_id = spreadsheet_id
+        self.max_cells = max_cells
+        self.retries = retries
+        self.sleep = sleep
+
+    def read(self, range_name: str) -> list:
+        request = self.values.get(spreadsheetId=self.spreadsheet_id, range=range_name)
+        return with_backoff(request.execute, self.retries, sleep=self.sleep).get("values", [])
+
+    def write(self, sheet: str, old: list, new: list, dry_run: bool=False) -> dict:
+        """
+        Escribir `new` sobre la hoja, desde la celda A1, enviando solo las diferencias con `old`.
+
+        Args:
+            sheet (str): Nombre de la hoja.
+            old (list): Filas leídas de la hoja (ver `read`).
+            new (list): Filas a escribir.
+            dry_run (bool, optional): Solo mostrar las diferencias, sin escribir. Por defecto es False.
+
+        Returns:
+            dict: Celdas cambiadas, rangos y pedidos enviados.
+        """
+        changes = cell_diff(old, new)
+        ranges = changed_ranges(changes, sheet, max_cells=self.max_cells)
+        chunks = chunk_ranges(ranges, self.max_cells)
+        summary = {'cells': len(changes), 'ranges': len(ranges), 'requests': 0 if dry_run else len(chunks)}
+        if dry_run:
+            for i, j, previous, value in changes:
+                print(f"{sheet}!{column_letter(j)}{i + 1}: {previous!r} -> {value!r}")
+            print(f"{len(changes)} celdas en {len(ranges)} rangos ({len(chunks)} pedidos); no se escribió nada.")
+            return summary
+
+        for chunk in chunks:
+            request = self.values.batchUpdate(spreadsheetId=self.spreadsheet_id,
+                                              body={"valueInputOption": "RAW", "data": chunk})
+            with_backoff(request.execute, self.retries, sleep=self.sleep)
+        logger_sheets.info(f"{len(changes)} celdas actualizadas en {len(ranges)} rangos y {len(chunks)} pedidos.")
+        return summary
@@ -0,0 +1,151 @@
+import os, re, csv, json, logging
+import pandas as pd
+from src.brands import BRANDS
+
+logger_stock = logging.getLogger(name=__name__)
+
+STOCK_COLUMNS = ["codigo", "ean", "stock", "precio", "promo", "descripcion"]
+re_percent = re.compile(r'(\d+(?:[.,]\d+)?)\s*%')
+re_bundle = re.compile(r'(\d+)\s*x\s*(\d+)', re.IGNORECASE)
+
+# Promo index cache: (path, mtime) -> rows, so the app reloads it only when a snapshot is published
+_promo_index = {'key': None, 'rows': []}
+
+def normalize_ean(value) -> str:
+    """EAN como cadena de dígitos sin ceros a la izquierda (el stock los guarda como número y el catálogo como texto)."""
+    value = str(value).strip()
+    if value.endswith('.0'):
+        value = value[:-2]
+    return value.lstrip('0') if value.isdigit() else value
+
+def discount(promo) -> float:
+    """
+    Descuento de una promoción como fracción del precio: "40%" -> 0.4, "2x1" -> 0.5, "3x2" -> 0.333.
+
+    Args:
+        promo: Valor de la columna 'promo' del stock.
+
+    Returns:
+        float: Descuento, o None si el producto no tiene promoción.
+    """
+    if not isinstance(promo, str):
+        return None
+    match = re_percent.search(promo)
+    if match:
+        value = float(match.group(1).replace(',', '.')) / 100
+        return value if value > 0 else None
+    match = re_bundle.search(promo)
+    if match:
+        take, pay = int(match.group(1)), int(match.group(2))
+        return 1 - pay / take if take > pay > 0 else None
+    return None
+
+def write_atomic(filepath: str, write) -> None:
+    """Escribir un archivo con `write(file)` en un temporal y reemplazarlo con `os.replace`."""
+    temporary = f"{filepath}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8', newline='') as f:
+        write(f)
+    os.replace(temporary, filepath)
+
+def read_catalog(catalog_folderpath: str) -> dict:
+    """
+    Leer los documentos del catálogo (`{marca}.csv` con columnas EAN, Producto, Link).
+
+    Args:
+        catalog_folderpath (str): Carpeta de los CSV del catálogo.
+
+    Returns:
+        dict: Marca y documento por EAN normalizado (la primera aparición de cada EAN).
+    """
+    catalog = {}
+    for spec in BRANDS.values():
+        filepath = os.path.join(catalog_folderpath, os.path.splitext(spec['table'])[0] + '.csv')
+        if not os.path.exists(filepath):
+            logger_stock.warning(f"No se encontró el catálogo {filepath}.")
+            continue
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                ean = normalize_ean(row['EAN'] or '')
+                if ean and ean not in catalog:
+                    catalog[ean] = (spec['brand'], row['Producto'])
+    return catalog
+
+def build_promo_index(stock: pd.DataFrame, catalog: dict) -> list:
+    """
+    Índice de promociones: productos con stock y en promoción que están en el catálogo, ordenados
+    por descuento (de mayor a menor) y luego por EAN.
+
+    Args:
+        stock (pd.DataFrame): Stock con columnas ean, stock, precio y promo.
+        catalog (dict): Marca y documento por EAN normalizado, como devuelve `read_catalog`.
+
+    Returns:
+        list: Filas con ean, marca, documento, stock, precio, promo y descuento.
+    """
+    rows = []
+    for record in stock.to_dict('records'):
+        ean, value = normalize_ean(record['ean']), discount(record['promo'])
+        if value is None or ean not in catalog or float(record['stock']) <= 0:
+            continue
+        brand, document = catalog[ean]
+        rows.append({'ean': ean, 'marca': brand, 'documento': document, 'stock': int(round(float(record['stock']))),
+                     'precio': record['precio'], 'promo': record['promo'], 'descuento': round(value, 4)})
+    rows.sort(key=lambda row: (-row['descuento'], row['ean']))
+    return rows
+
+def publish_snapshot(stock: pd.DataFrame, stock_path: str, promo_index_path: str, catalog_folderpath: str) -> int:
+    """
+    Publicar una foto del stock: guarda el CSV de stock y reconstruye el índice de promociones.
+    Ambos archivos se reemplazan de forma atómica, así la app nunca lee uno a medio escribir.
+
+    Args:
+        stock (pd.DataFrame): Stock con columnas codigo, ean, stock, precio, promo y descripcion.
+        stock_path (str): Ruta del CSV de stock.
+        promo_index_path (str): Ruta del índice de promociones (JSON).
+        catalog_folderpath (str): Carpeta de los CSV del catálogo.
+
+    Returns:
+        int: Cantidad de productos en el índice de promociones.
+    """
+    write_atomic(stock_path, lambda f: stock.to_csv(f, index=False))
+    rows = build_promo_index(stock, read_catalog(catalog_folderpath))
+    write_atomic(promo_index_path, lambda f: json.dump(rows, f, ensure_ascii=False))
+    logger_stock.info(f"Stock publicado: {len(stock)} productos, {len(rows)} en promoción con documento.")
+    return len(rows)
+
+def load_promo_index(promo_index_path: str) -> list:
+    """
+    Leer el índice de promociones, desde memoria si el archivo no cambió desde la última lectura.
+
+    Args:
+        promo_index_path (str): Ruta del índice de promociones (JSON).
+
+    Returns:
+        list: Filas del índice, ordenadas por descuento. Vacía si todavía no se publicó.
+    """
+    try:
+        key = (promo_index_path, os.stat(promo_index_path).st_mtime_ns)
+    except FileNotFoundError:
+        return []
+    if _promo_index['key'] != key:
+        with open(promo_index_path, 'r', encoding='utf-8') as f:
+            _promo_index['rows'] = json.load(f)
+        _promo_index['key'] = key
+    return _promo_index['rows']
+
+def search_promos(rows: list, brand: str=None, k: int=5) -> list:
+    """
+    Primeras `k` filas del índice de promociones, opcionalmente de una sola marca.
+
+    Args:
+        rows (list): Filas del índice de promociones.
+        brand (str, optional): Marca a filtrar (sin distinguir mayúsculas). Por defecto, todas.
+        k (int, optional): Cantidad de filas. Por defecto es 5.
+
+    Returns:
+        list: Filas seleccionadas, en el orden del índice.
+    """
+    if brand:
+        brand = brand.strip().lower()
+        rows = (row for row in rows if row['marca'].lower() == brand)
+    return [row for _, row in zip(range(k), rows)]
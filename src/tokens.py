@@ -0,0 +1,31 @@
+import math
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:     # optional: fall back to a conservative character-based estimate
+    tiktoken = None
+
+ENCODING_NAME   = "cl100k_base"     # encoding of the OpenAI embedding models
+CHARS_PER_TOKEN = 3                 # conservative for Spanish text when tiktoken is not installed
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str=ENCODING_NAME):
+    return tiktoken.get_encoding(name) if tiktoken is not None else None
+
+def count_tokens(text: str, encoding_name: str=ENCODING_NAME) -> int:
+    """
+    Contar los tokens de un texto con tiktoken, o estimarlos por cantidad de caracteres si
+    tiktoken no está instalado (la estimación tiende a sobrecontar, nunca a subcontar mucho).
+
+    Args:
+        text (str): Texto a contar.
+        encoding_name (str, optional): Codificación de tiktoken. Por defecto es ENCODING_NAME.
+
+    Returns:
+        int: Cantidad de tokens.
+    """
+    encoding = get_encoding(encoding_name)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
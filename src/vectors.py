@@ -0,0 +1,287 @@
+import os, json, mmap, shutil, logging
+import numpy as np
+from typing import NamedTuple
+
+logger_vectors = logging.getLogger(name=__name__)
+
+QUERY_BLOCK = 256       # queries scored at once by exact search (bounds the distance matrix in memory)
+COPY_BLOCK  = 65536     # rows copied at once when an exact index is finalized
+SCAN_BLOCK  = 256       # int8 rows widened to float32 at once by the quantized first stage (fits in cache)
+
+# Files of an exact index: unit-norm float32 matrix, ids, documents (one JSON line each) and their byte offsets
+VECTORS_FILE, IDS_FILE, DOCUMENTS_FILE, OFFSETS_FILE = "vectors.npy", "ids.npy", "documents.jsonl", "offsets.npy"
+# Optional int8 copy of the matrix for the first stage, with one scale per dimension
+CODES_FILE, SCALES_FILE = "codes.npy", "scales.npy"
+
+class Document(NamedTuple):
+    """Documento recuperado, con los mismos atributos que el `Document` de langchain."""
+    page_content: str
+    metadata: dict
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Filas de una matriz con norma 1 (las filas nulas quedan en cero)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def distances(matrix: np.ndarray, queries: np.ndarray, space: str='l2') -> np.ndarray:
+    """
+    Distancias entre consultas y vectores, con las mismas definiciones que Chroma/hnswlib: 'l2' es
+    la distancia euclídea al cuadrado, 'cosine' es 1 - coseno e 'ip' es 1 - producto interno.
+
+    Args:
+        matrix (np.ndarray): Vectores indexados, una fila por documento.
+        queries (np.ndarray): Vectores de consulta, una fila por consulta.
+        space (str, optional): 'l2', 'cosine' o 'ip'. Por defecto es 'l2'.
+
+    Returns:
+        np.ndarray: Matriz de distancias (consultas x documentos).
+    """
+    if space == 'cosine':
+        return 1 - normalize_rows(queries) @ normalize_rows(matrix).T
+    products = queries @ matrix.T
+    if space == 'ip':
+        return 1 - products
+    if space == 'l2':
+        return (np.einsum('ij,ij->i', queries, queries)[:, None] - 2 * products
+                + np.einsum('ij,ij->i', matrix, matrix)[None, :])
+    raise ValueError(f"Espacio desconocido: {space}")
+
+def top_k(scores: np.ndarray, k: int) -> tuple:
+    """
+    Los `k` menores valores de cada fila, ordenados, con una selección parcial (`argpartition`)
+    en lugar de ordenar la fila completa.
+
+    Args:
+        scores (np.ndarray): Distancias (consultas x documentos).
+        k (int): Cantidad de resultados por consulta.
+
+    Returns:
+        tuple: Índices y distancias de los resultados, de mejor a peor.
+    """
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        candidates = np.argpartition(scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(candidate_scores, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+def exact_search(matrix: np.ndarray, queries: np.ndarray, k: int, space: str='l2') -> tuple:
+    """
+    Búsqueda exacta (fuerza bruta) de los `k` vecinos más cercanos, de a bloques de consultas.
+
+    Args:
+        matrix (np.ndarray): Vectores indexados, una fila por documento.
+        queries (np.ndarray): Vectores de consulta, una fila por consulta.
+        k (int): Cantidad de vecinos por consulta.
+        space (str, optional): 'l2', 'cosine' o 'ip'. Por defecto es 'l2'.
+
+    Returns:
+        tuple: Índices y distancias de los vecinos (consultas x k), de mejor a peor.
+    """
+    queries = np.atleast_2d(queries)
+    indices, scores = [], []
+    for start in range(0, len(queries), QUERY_BLOCK):
+        block_indices, block_scores = top_k(distances(matrix, queries[start:start + QUERY_BLOCK], space), k)
+        indices.append(block_indices)
+        scores.append(block_scores)
+    return np.vstack(indices), np.vstack(scores)
+
+def fit_scales(matrix: np.ndarray) -> np.ndarray:
+    """Escala por dimensión para cuantizar a int8: el máximo valor absoluto de la dimensión va a 127."""
+    peak = np.zeros(matrix.shape[1], dtype=np.float32)
+    for start in range(0, len(matrix), COPY_BLOCK):
+        peak = np.maximum(peak, np.abs(matrix[start:start + COPY_BLOCK]).max(axis=0))
+    return np.where(peak > 0, peak / 127, 1).astype(np.float32)
+
+def quantize(matrix: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Cuantizar vectores a int8 con una escala por dimensión (`vector ≈ códigos * escalas`)."""
+    return np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+
+def recall_at_k(found: list, truth: np.ndarray) -> float:
+    """
+    Recall@k promedio: fracción de los `k` vecinos exactos de cada consulta que aparecen en sus resultados.
+
+    Args:
+        found (list): Resultados de cada consulta (índices o identificadores).
+        truth (np.ndarray): Vecinos exactos de cada consulta (consultas x k), en el mismo formato.
+
+    Returns:
+        float: Recall entre 0 y 1.
+    """
+    hits = [len(set(result) & set(expected)) / len(expected) for result, expected in zip(found, truth) if len(expected)]
+    return float(np.mean(hits)) if hits else 0.0
+
+def synthetic_embeddings(n: int, dim: int, seed: int=0) -> np.ndarray:
+    """Vectores unitarios agrupados alrededor de n/50 centros, parecidos a embeddings de productos de pocas marcas."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 50, 1), dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, dim), dtype=np.float32)
+    return normalize_rows(vectors).astype(np.float32)
+
+def latency_summary(seconds: list) -> dict:
+    """Latencias de consulta en milisegundos: media, p50, p95 y p99."""
+    ms = np.asarray(seconds) * 1e3
+    return {'mean': float(ms.mean()), 'p50': float(np.percentile(ms, 50)),
+            'p95': float(np.percentile(ms, 95)), 'p99': float(np.percentile(ms, 99))}
+
+def hnsw_memory_bytes(n: int, dim: int, M: int) -> int:
+    """
+    Memoria estimada de un índice hnswlib: vectores, enlaces del nivel 0 (2M por nodo), enlaces de
+    los niveles superiores (M por nivel, con 1/(M-1) niveles esperados por nodo) y etiquetas.
+    """
+    level0 = dim * 4 + 2 * M * 4 + 4 + 8
+    upper = (M * 4 + 4) / max(M - 1, 1)
+    return int(n * (level0 + upper + 8))
+
+def folder_size(path: str) -> int:
+    """Tamaño en disco (bytes) de un archivo o de todos los archivos de una carpeta."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+class ExactIndexWriter(object):
+    """
+    Escritura en flujo de un índice exacto: los vectores se normalizan y se agregan a un archivo
+    crudo, y `close` arma la matriz `.npy` definitiva (y su copia int8 si `quantize` es True). El
+    índice se construye en una carpeta aparte que reemplaza a la anterior al cerrar, así la app
+    nunca lee uno a medio escribir. `add` tiene la firma de la función `write` de `run_pipeline`.
+    """
+
+    def __init__(self, folderpath: str, quantize: bool=True) -> None:
+        self.folderpath = folderpath
+        self.quantize = quantize
+        self.building = folderpath.rstrip("/") + ".building"
+        if os.path.exists(self.building):
+            shutil.rmtree(self.building)
+        os.makedirs(self.building)
+        self.raw = open(os.path.join(self.building, "vectors.f32"), "wb")
+        self.documents = open(os.path.join(self.building, DOCUMENTS_FILE), "wb")
+        self.ids, self.offsets, self.dim = [], [0], None
+
+    def add(self, chunk: list, embeddings: list) -> None:
+        vectors = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        self.dim = self.dim or vectors.shape[1]
+        self.raw.write(vectors.tobytes())
+        for id, text, metadata in chunk:
+            self.documents.write(json.dumps([text, metadata], ensure_ascii=False).encode("utf-8") + b"\n")
+            self.offsets.append(self.documents.tell())
+            self.ids.append(id)
+
+    def close(self) -> int:
+        self.raw.close()
+        self.documents.close()
+        n, raw_path = len(self.ids), os.path.join(self.building, "vectors.f32")
+        matrix = np.lib.format.open_memmap(os.path.join(self.building, VECTORS_FILE), mode="w+",
+                                           dtype=np.float32, shape=(n, self.dim or 0))
+        if n:
+            raw = np.memmap(raw_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+            for start in range(0, n, COPY_BLOCK):
+                matrix[start:start + COPY_BLOCK] = raw[start:start + COPY_BLOCK]
+            del raw
+        matrix.flush()
+        if self.quantize and n:
+            scales = fit_scales(matrix)
+            codes = np.lib.format.open_memmap(os.path.join(self.building, CODES_FILE), mode="w+",
+                                              dtype=np.int8, shape=(n, self.dim))
+            for start in range(0, n, COPY_BLOCK):
+                codes[start:start + COPY_BLOCK] = quantize(matrix[start:start + COPY_BLOCK], scales)
+            codes.flush()
+            del codes
+            np.save(os.path.join(self.building, SCALES_FILE), scales)
+        del matrix
+        os.remove(raw_path)
+        np.save(os.path.join(self.building, IDS_FILE), np.asarray(self.ids, dtype=str))
+        np.save(os.path.join(self.building, OFFSETS_FILE), np.asarray(self.offsets, dtype=np.int64))
+        if os.path.exists(self.folderpath):
+            shutil.rmtree(self.folderpath)
+        os.replace(self.building, self.folderpath)
+        return n
+
+class ExactIndex(object):
+    """
+    Índice vectorial exacto: la matriz de embeddings (normalizados) se mapea en memoria y cada
+    consulta es un producto matriz-vector seguido de una selección parcial de los `k` mejores.
+    Para unos pocos miles o decenas de miles de productos es más rápido que HNSW y no depende de
+    SQLite. Las distancias son coseno (1 - similitud), como el espacio 'cosine' de Chroma.
+
+    Con `rerank` > 0, la primera etapa recorre la copia int8 de la matriz (4 veces más chica, es lo
+    único que tiene que estar en memoria) y elige `k * rerank` candidatos, que se reordenan con sus
+    vectores float32 exactos; de la matriz float32 solo se leen esas filas.
+    """
+
+    def __init__(self, folderpath: str, embed=None, rerank: int=0) -> None:
+        """
+        Args:
+            folderpath (str): Carpeta del índice, escrita por ExactIndexWriter.
+            embed (callable, optional): Función que recibe un texto y devuelve su embedding (para `search`).
+            rerank (int, optional): Candidatos int8 por resultado (0: búsqueda float32 directa). Por defecto es 0.
+        """
+        self.embed = embed
+        self.rerank = rerank if os.path.exists(os.path.join(folderpath, CODES_FILE)) else 0
+        if rerank and not self.rerank:
+            logger_vectors.warning(f"El índice {folderpath} no tiene códigos int8: se usa la búsqueda float32.")
+        if self.rerank:
+            self.codes = np.load(os.path.join(folderpath, CODES_FILE), mmap_mode="r")
+            self.scales = np.load(os.path.join(folderpath, SCALES_FILE))
+        self.matrix = np.load(os.path.join(folderpath, VECTORS_FILE), mmap_mode="r")
+        self.ids = np.load(os.path.join(folderpath, IDS_FILE))
+        self.offsets = np.load(os.path.join(folderpath, OFFSETS_FILE))
+        with open(os.path.join(folderpath, DOCUMENTS_FILE), "rb") as f:
+            self.documents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b""
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def document(self, i: int) -> Document:
+        text, metadata = json.loads(self.documents[self.offsets[i]:self.offsets[i + 1]])
+        return Document(text, metadata)
+
+    def search_vector(self, vector, k: int) -> list:
+        """
+        Los `k` documentos más cercanos a un embedding.
+
+        Returns:
+            list: Resultados `(documento, distancia)`, de mejor a peor.
+        """
+        if not len(self):
+            return []
+        query = normalize_rows(np.asarray(vector, dtype=np.float32)[None, :])[0]
+        if not self.rerank:
+            indices, scores = top_k(1 - (self.matrix @ query)[None, :], k)
+            return [(self.document(i), float(score)) for i, score in zip(indices[0], scores[0])]
+
+        candidates = np.sort(top_k(-self.approximate_scores(query)[None, :], k * self.rerank)[0][0])
+        indices, scores = top_k(1 - (self.matrix[candidates] @ query)[None, :], k)
+        return [(self.document(candidates[i]), float(score)) for i, score in zip(indices[0], scores[0])]
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Similitud aproximada de la consulta con todos los documentos, con los códigos int8."""
+        scaled = query * self.scales
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        buffer = np.empty((SCAN_BLOCK, self.codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.codes), SCAN_BLOCK):
+            block = self.codes[start:start + SCAN_BLOCK]
+            widened = buffer[:len(block)]
+            np.copyto(widened, block, casting='unsafe')
+            np.matmul(widened, scaled, out=scores[start:start + len(block)])
+        return scores
+
+    def search(self, text: str, k: int) -> list:
+        return self.search_vector(self.embed(text), k)
+
+class ChromaIndex(object):
+    """Índice vectorial sobre un vectorstore Chroma de langchain (HNSW)."""
+
+    def __init__(self, store) -> None:
+        self.store = store
+
+    def __len__(self) -> int:
+        return self.store._collection.count()
+
+    def search(self, text: str, k: int) -> list:
+        return self.store.similarity_search_with_score(text, k=k)
+
+    def search_vector(self, vector, k: int) -> list:
+        return self.store.similarity_search_by_vector_with_relevance_scores(vector, k=k)